@@ -0,0 +1,193 @@
+"""Mesura del temps de cada pas (spans) i traça JSONL amb rotació.
+
+Cada acció de l'usuari (Sol, Lluna, Aplicar, ...) és un span arrel amb un
+identificador propi; els passos de dins (aturada de Redshift, arrencada de redshift-gtk,
+escriptura dels temes, lectura i escriptura de fitxers) en són fills. Cada span
+acabat s'escriu com una línia JSON:
+
+    {"ts": 1760000000.123, "action": 7, "span": "terminate", "parent": "kill_redshift_processes",
+     "ms": 12.4, "thread": "MainThread", "pids": 2, "still_alive": 0}
+
+La traça està desactivada per defecte. Aleshores `span()` retorna un context
+buit compartit i `traced` es limita a comprovar un atribut, de manera que el
+cost és pràcticament nul. El temps total de cada acció es mesura sempre, per
+mostrar-lo a la barra d'estat.
+"""
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+
+# Activa la traça encara que prefs.ini no ho digui (p.ex. CONTROL_PANTALLA_TRACE=1)
+TRACE_ENV_VAR = "CONTROL_PANTALLA_TRACE"
+TRACE_MAX_BYTES = 1024 * 1024
+TRACE_BACKUPS = 3
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "attrs", "write", "action_id", "parent", "wall", "t0", "elapsed_ms")
+
+    def __init__(self, tracer, name, attrs, write=True, action_id=None):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.write = write
+        self.action_id = action_id
+        self.elapsed_ms = None
+
+    def set(self, **attrs):
+        """Afegeix atributs al span (p.ex. el resultat del pas)."""
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        stack = self.tracer._stack()
+        if self.action_id is None:
+            self.action_id = stack[-1].action_id if stack else 0
+        self.parent = stack[-1].name if stack else None
+        stack.append(self)
+        self.wall = time.time()
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.elapsed_ms = (time.perf_counter() - self.t0) * 1000
+        self.tracer._stack().pop()
+        if self.write and self.tracer.path is not None:
+            record = {"ts": round(self.wall, 3), "action": self.action_id, "span": self.name,
+                      "parent": self.parent, "ms": round(self.elapsed_ms, 3),
+                      "thread": threading.current_thread().name}
+            if exc_type is not None:
+                record["error"] = f"{exc_type.__name__}: {exc}"
+            record.update(self.attrs)
+            self.tracer._write(record)
+        return False
+
+
+class Tracer:
+    def __init__(self):
+        self.path = None
+        self.max_bytes = TRACE_MAX_BYTES
+        self.backups = TRACE_BACKUPS
+        self._file = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._action_ids = itertools.count(1)
+
+    @property
+    def enabled(self):
+        return self.path is not None
+
+    def enable(self, path, max_bytes=TRACE_MAX_BYTES, backups=TRACE_BACKUPS):
+        with self._lock:
+            if self._file is not None and path != self.path:
+                self._file.close()
+                self._file = None
+            self.path = path
+            self.max_bytes = max_bytes
+            self.backups = backups
+
+    def disable(self):
+        with self._lock:
+            self.path = None
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def span(self, name, **attrs):
+        if self.path is None:
+            return _NULL_SPAN
+        return _Span(self, name, attrs)
+
+    def bind(self, func):
+        """Retorna `func` lligada al span actual, perquè els spans que obri en un altre fil en siguin fills."""
+        stack = self._stack()
+        if self.path is None or not stack:
+            return func
+        parent = stack[-1]
+
+        @functools.wraps(func)
+        def run_in_context(*args, **kwargs):
+            child_stack = self._stack()
+            child_stack.append(parent)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                child_stack.pop()
+        return run_in_context
+
+    def action(self, name, **attrs):
+        """Span arrel d'una acció; es cronometra sempre (`elapsed_ms`), encara que no es desi."""
+        return _Span(self, name, attrs, write=self.path is not None, action_id=next(self._action_ids))
+
+    def _write(self, record):
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            if self.path is None:
+                return
+            try:
+                if self._file is None:
+                    self._file = open(self.path, "a", encoding="utf-8")
+                if self._file.tell() + len(line) > self.max_bytes:
+                    self._rotate()
+                self._file.write(line)
+                self._file.flush()
+            except OSError as e:
+                print(f"No s'ha pogut escriure la traça a {self.path}: {e}. Es desactiva.")
+                self.path = None
+                self._file = None
+
+    def _rotate(self):
+        """trace.jsonl -> trace.jsonl.1 -> ... -> trace.jsonl.N (el més antic s'esborra)."""
+        self._file.close()
+        for index in range(self.backups - 1, 0, -1):
+            older = f"{self.path}.{index}"
+            if os.path.exists(older):
+                os.replace(older, f"{self.path}.{index + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.unlink(self.path)
+        self._file = open(self.path, "a", encoding="utf-8")
+
+
+# Traçador compartit per tota l'aplicació
+tracer = Tracer()
+
+
+def traced(name=None):
+    """Decorador: executa la funció dins d'un span (o directament, si la traça està desactivada)."""
+    def decorator(func):
+        span_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if tracer.path is None:
+                return func(*args, **kwargs)
+            with _Span(tracer, span_name, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,107 @@
+"""Utilitats compartides pels benchmarks: Xvfb, HOME temporal i línies base JSON."""
+import json
+import os
+import subprocess
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+APP_MODULE = "redshift_control_and_teme_dark_gui_V4"
+BASELINE_DIR = os.path.join(BENCH_DIR, "baselines")
+# Una mètrica és una regressió si empitjora més d'aquest percentatge i d'aquest valor absolut
+REGRESSION_RATIO = 0.20
+REGRESSION_MIN_DELTA = 2.0
+# Prefix de la línia amb què els processos fill retornen els resultats
+RESULT_PREFIX = "BENCH_RESULT "
+BENCH_THEMES = ("Ambiant-MATE", "Ambiant-MATE-Dark", "Bench-Theme")
+
+
+class Xvfb:
+    """Servidor X virtual; el número de pantalla el tria el mateix Xvfb (-displayfd)."""
+
+    def __init__(self):
+        self.proc = None
+        self.display = None
+
+    def __enter__(self):
+        read_fd, write_fd = os.pipe()
+        self.proc = subprocess.Popen(["Xvfb", "-displayfd", str(write_fd), "-nolisten", "tcp",
+                                      "-screen", "0", "1280x1024x24"],
+                                     pass_fds=(write_fd,), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        os.close(write_fd)
+        with os.fdopen(read_fd) as f:
+            number = f.readline().strip()
+        if not number:
+            raise RuntimeError("Xvfb no ha pogut arrencar")
+        self.display = f":{number}"
+        return self
+
+    def __exit__(self, *exc):
+        self.proc.terminate()
+        self.proc.wait()
+
+
+def make_fake_home(parent):
+    """HOME temporal amb uns quants temes i sense preferències (primera execució)."""
+    home = os.path.join(parent, "home")
+    for theme in BENCH_THEMES:
+        os.makedirs(os.path.join(home, ".themes", theme, "gtk-3.0"))
+    os.makedirs(os.path.join(home, ".config"))
+    return home
+
+
+def isolated_env(base_env, home, display):
+    """Entorn per als processos fill: HOME propi i cap accés a l'escriptori real."""
+    env = dict(base_env, HOME=home, DISPLAY=display)
+    # Gio escriu en memòria en lloc de dconf, i sense bus de sessió no es toca res més
+    env["GSETTINGS_BACKEND"] = "memory"
+    env.pop("DBUS_SESSION_BUS_ADDRESS", None)
+    env.pop("XDG_RUNTIME_DIR", None)
+    return env
+
+
+def parse_child_result(stdout):
+    line = next((l for l in stdout.splitlines() if l.startswith(RESULT_PREFIX)), None)
+    return None if line is None else json.loads(line[len(RESULT_PREFIX):])
+
+
+def print_child_result(result):
+    # Sortida en una sola línia perquè el pare la pugui separar dels missatges de l'aplicació
+    print(RESULT_PREFIX + json.dumps(result), flush=True)
+
+
+def compare_with_baseline(results, baseline):
+    regressions = []
+    for key, value in results.items():
+        old = baseline.get(key)
+        if old is None:
+            continue
+        if value > old * (1 + REGRESSION_RATIO) and value - old > REGRESSION_MIN_DELTA:
+            regressions.append(f"{key}: {old:.1f} -> {value:.1f}")
+    return regressions
+
+
+def report(results, baseline_path, save_baseline):
+    """Mostra els resultats i els desa o compara amb la línia base. Retorna el codi de sortida."""
+    for key, value in sorted(results.items()):
+        print(f"{key:48s} {value:10.1f}")
+
+    if save_baseline:
+        os.makedirs(os.path.dirname(baseline_path), exist_ok=True)
+        with open(baseline_path, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Línia base desada a {baseline_path}")
+        return 0
+
+    if not os.path.exists(baseline_path):
+        print(f"No hi ha línia base a {baseline_path}; executa amb --save-baseline per crear-ne una.")
+        return 0
+    with open(baseline_path) as f:
+        regressions = compare_with_baseline(results, json.load(f))
+    if regressions:
+        print("Regressions respecte de la línia base:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print("Cap regressió respecte de la línia base.")
+    return 0
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""Benchmark de latència dels canvis de mode, de punta a punta, amb eines simulades.
+
+Per a cada escenari es mesura el temps d'execució de l'acció de l'aplicació
+(activate_mode_sol, activate_mode_lluna, apply_and_restart_redshift_manually)
+i el nombre de processos que llança, comptats amb el registre de fake_tools.py.
+Les accions es criden directament al fil de Tk, de manera que el temps és el
+de l'acció sencera i no el de posar-la a la cua del fil de treball.
+
+Els retards de les eines simulades es poden ajustar per simular un sistema
+lent (p.ex. --gtk-startup-delay 0.3).
+
+Ús:
+    python3 benchmarks/bench_mode_switch.py [--runs N] [--save-baseline] [--baseline FITXER]
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from bench_common import (APP_MODULE, BASELINE_DIR, BENCH_THEMES, REPO_DIR, Xvfb, isolated_env,
+                          make_fake_home, parse_child_result, print_child_result, report)
+from fake_tools import FakeTools
+
+DEFAULT_BASELINE = os.path.join(BASELINE_DIR, "mode_switch.json")
+DEFAULT_RUNS = 5
+STARTUP_TIMEOUT_S = 30
+THEME_SOL, THEME_LLUNA = BENCH_THEMES[0], BENCH_THEMES[1]
+
+
+def scenarios(app):
+    """Escenaris en ordre; cadascun parteix de l'estat que deixa l'anterior."""
+    temps = iter(range(4000, 6000, 10))
+    last = {}
+
+    def apply_new_values():
+        last["temp"] = next(temps)
+        app.apply_and_restart_redshift_manually(last["temp"], 0.8)
+
+    return [
+        ("lluna_redshift_aturat", lambda: app.activate_mode_lluna(THEME_LLUNA)),
+        ("lluna_repetit", lambda: app.activate_mode_lluna(THEME_LLUNA)),
+        ("sol_redshift_actiu", lambda: app.activate_mode_sol(THEME_SOL)),
+        ("sol_repetit", lambda: app.activate_mode_sol(THEME_SOL)),
+        ("lluna_despres_de_sol", lambda: app.activate_mode_lluna(THEME_LLUNA)),
+        ("aplicar_valors_nous", apply_new_values),
+        ("aplicar_sense_canvis", lambda: app.apply_and_restart_redshift_manually(last["temp"], 0.8)),
+    ]
+
+
+def run_child():
+    import tkinter as tk
+    sys.path.insert(0, REPO_DIR)
+    app_module = __import__(APP_MODULE)
+    tools = FakeTools(os.environ["BENCH_FAKE_TOOLS_DIR"])
+    runs = int(os.environ["BENCH_RUNS"])
+
+    root = tk.Tk()
+    app = app_module.RedshiftControlApp(root)
+    # Els diàlegs bloquejarien el benchmark; només es compten
+    dialogs = []
+    app.show_dialog = lambda dialog, title, message: dialogs.append(title)
+
+    def wait_startup():
+        if "redshift" in app.startup_timings:
+            root.quit()
+        else:
+            root.after(5, wait_startup)
+
+    root.after(5, wait_startup)
+    root.after(STARTUP_TIMEOUT_S * 1000, root.quit)
+    root.mainloop()
+
+    samples = {}
+    for _ in range(runs):
+        for name, action in scenarios(app):
+            spawned_before = len(tools.spawn_log())
+            t0 = time.perf_counter()
+            action()
+            elapsed_ms = (time.perf_counter() - t0) * 1000
+            spawned = len(tools.spawn_log()) - spawned_before
+            samples.setdefault(f"{name}_ms", []).append(elapsed_ms)
+            samples.setdefault(f"{name}_processos", []).append(spawned)
+    root.destroy()
+    result = {key: statistics.median(values) for key, values in samples.items()}
+    result["dialegs"] = len(dialogs)
+    print_child_result(result)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--gtk-startup-delay", type=float, default=0.05,
+                        help="segons que el redshift-gtk simulat triga a engegar redshift")
+    parser.add_argument("--exit-delay", type=float, default=0.02,
+                        help="segons que els processos simulats triguen a sortir després de SIGTERM")
+    parser.add_argument("--settings-delay", type=float, default=0.0,
+                        help="retard de cada crida a gsettings/dconf simulats")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child()
+        return 0
+
+    if shutil.which("Xvfb") is None:
+        print("Xvfb no està instal·lat: no es pot executar aquest benchmark.")
+        return 0
+
+    config = {
+        "redshift-gtk": {"startup_delay": args.gtk_startup_delay, "exit_delay": args.exit_delay},
+        "redshift": {"exit_delay": args.exit_delay},
+        "gsettings": {"delay": args.settings_delay},
+        "dconf": {"delay": args.settings_delay},
+    }
+    with tempfile.TemporaryDirectory(prefix="bench_mode_switch_") as tmp, Xvfb() as xvfb, \
+            FakeTools(os.path.join(tmp, "tools"), config) as tools:
+        home = make_fake_home(tmp)
+        env = tools.env(isolated_env(os.environ, home, xvfb.display))
+        env["BENCH_FAKE_TOOLS_DIR"] = tools.base_dir
+        env["BENCH_RUNS"] = str(args.runs)
+        out = subprocess.run([sys.executable, os.path.abspath(__file__), "--child"],
+                             env=env, capture_output=True, text=True)
+        results = parse_child_result(out.stdout)
+        if results is None:
+            print(f"El benchmark no ha retornat resultats:\n{out.stdout}\n{out.stderr}")
+            return 2
+        print("Processos llançats per eina:", json.dumps(tools.spawn_counts(), sort_keys=True))
+    return report(results, args.baseline, args.save_baseline)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
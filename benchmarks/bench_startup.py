@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""Benchmark de l'arrencada de redshift_control_and_teme_dark_gui_V4.py.
+
+Mesura:
+  * el temps d'importació de tkinter, configparser i tkinter.messagebox (cada
+    mostra en un intèrpret nou, perquè no hi hagi res a la memòria cau);
+  * el temps fins al primer frame sota Xvfb i fins que cada sonda d'arrencada
+    (temes, redshift.conf, Redshift) ha acabat, amb les eines simulades de
+    fake_tools.py al PATH i un HOME temporal.
+
+Els resultats es poden desar com a línia base JSON (--save-baseline) i es
+comparen amb la línia base existent; si alguna mètrica empitjora més del
+llindar, el procés acaba amb codi 1.
+
+Ús:
+    python3 benchmarks/bench_startup.py [--runs N] [--save-baseline] [--baseline FITXER]
+"""
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from bench_common import (APP_MODULE, BASELINE_DIR, REPO_DIR, Xvfb, isolated_env, make_fake_home,
+                          parse_child_result, print_child_result, report)
+from fake_tools import FakeTools
+
+DEFAULT_BASELINE = os.path.join(BASELINE_DIR, "startup.json")
+DEFAULT_RUNS = 5
+# Temps màxim que s'espera que totes les sondes d'arrencada acabin
+STARTUP_TIMEOUT_S = 30
+IMPORT_TARGETS = ("tkinter", "configparser", "tkinter.messagebox")
+STARTUP_STAGES = ("first_frame", "themes", "config", "redshift", "presets")
+
+
+def measure_import(module, runs):
+    """Mediana (ms) del temps d'importar `module` en un intèrpret nou."""
+    code = ("import time; t = time.perf_counter(); import " + module +
+            "; print((time.perf_counter() - t) * 1000)")
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True)
+        samples.append(float(out.stdout.strip()))
+    return statistics.median(samples)
+
+
+def run_child():
+    """Procés fill: importa l'aplicació, crea la finestra i espera totes les sondes."""
+    t0 = time.perf_counter()
+    import tkinter as tk
+    sys.path.insert(0, REPO_DIR)
+    app_module = __import__(APP_MODULE)
+    t_import = time.perf_counter()
+    root = tk.Tk()
+    app = app_module.RedshiftControlApp(root)
+
+    def check_done():
+        if all(stage in app.startup_timings for stage in STARTUP_STAGES):
+            root.destroy()
+        else:
+            root.after(5, check_done)
+
+    root.after(5, check_done)
+    root.after(STARTUP_TIMEOUT_S * 1000, root.destroy)
+    root.mainloop()
+    result = {"import_app_ms": (t_import - t0) * 1000}
+    for stage in STARTUP_STAGES:
+        if stage in app.startup_timings:
+            result[f"{stage}_ms"] = app.startup_timings[stage]
+    print_child_result(result)
+
+
+def measure_startup(runs):
+    if shutil.which("Xvfb") is None:
+        print("Xvfb no està instal·lat: s'ometen les mesures de primer frame.")
+        return {}
+    samples = {}
+    with tempfile.TemporaryDirectory(prefix="bench_startup_") as tmp, Xvfb() as xvfb:
+        for i in range(runs):
+            with FakeTools(os.path.join(tmp, f"tools{i}")) as tools:
+                home = make_fake_home(os.path.join(tmp, f"run{i}"))
+                env = tools.env(isolated_env(os.environ, home, xvfb.display))
+                out = subprocess.run([sys.executable, os.path.abspath(__file__), "--child"],
+                                     env=env, capture_output=True, text=True, timeout=STARTUP_TIMEOUT_S + 10)
+            result = parse_child_result(out.stdout)
+            if result is None:
+                raise RuntimeError(f"La mostra {i} no ha retornat resultats:\n{out.stdout}\n{out.stderr}")
+            for key, value in result.items():
+                samples.setdefault(key, []).append(value)
+    return {key: statistics.median(values) for key, values in samples.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child()
+        return 0
+
+    results = {}
+    for module in IMPORT_TARGETS:
+        results[f"import_{module}_ms"] = measure_import(module, args.runs)
+    results.update(measure_startup(args.runs))
+    return report(results, args.baseline, args.save_baseline)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,258 @@
+"""Versions simulades de redshift-gtk, redshift, pgrep, killall, gsettings i dconf.
+
+`FakeTools` crea un directori bin/ amb els executables simulats per posar-lo
+al davant del PATH. Cada eina llegeix la seva configuració (retards d'inici i
+de sortida, codi d'error) d'un fitxer JSON, apunta cada execució a un registre
+(per comptar quants processos llança cada acció) i, en el cas de gsettings i
+dconf, llegeix i escriu un magatzem de claus JSON semblant a dconf.
+
+Els executables són scripts de Python amb el camí absolut de l'intèrpret al
+shebang, de manera que el nom del procés (/proc/PID/comm) és el de l'eina,
+igual que amb els binaris reals.
+
+Exemple:
+    with FakeTools(tmp, {"redshift-gtk": {"startup_delay": 0.05}}) as tools:
+        env = tools.env()
+        ...
+        print(tools.spawn_counts())
+"""
+import json
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from desktop_settings import DCONF_SCHEMA_PATHS  # noqa: E402
+
+TOOL_NAMES = ("redshift-gtk", "redshift", "pgrep", "killall", "gsettings", "dconf")
+
+# Configuració per defecte de cada eina. Els retards són en segons; `exit_code`
+# diferent de 0 fa fallar l'eina sense fer res.
+DEFAULT_TOOL_CONFIG = {
+    "redshift-gtk": {"startup_delay": 0.0, "exit_delay": 0.0, "exit_code": 0},
+    "redshift": {"startup_delay": 0.0, "exit_delay": 0.0, "exit_code": 0},
+    "pgrep": {"exit_code": 0},
+    "killall": {"exit_code": 0},
+    "gsettings": {"delay": 0.0, "exit_code": 0, "fail_keys": []},
+    "dconf": {"delay": 0.0, "exit_code": 0},
+}
+
+_STUB_SOURCE = r'''
+import json, os, signal, subprocess, sys, time
+
+STATE_DIR = {state_dir!r}
+BIN_DIR = {bin_dir!r}
+TOOL = os.path.basename(sys.argv[0])
+ARGS = sys.argv[1:]
+
+with open(os.path.join(STATE_DIR, "config.json")) as f:
+    _config = json.load(f)
+CONFIG = _config["tools"].get(TOOL, {{}})
+SCHEMA_PATHS = _config["schema_paths"]
+
+fd = os.open(os.path.join(STATE_DIR, "spawns.log"), os.O_WRONLY | os.O_APPEND | os.O_CREAT)
+os.write(fd, (TOOL + " " + " ".join(ARGS) + "\n").encode())
+os.close(fd)
+
+if CONFIG.get("exit_code", 0):
+    sys.exit(CONFIG["exit_code"])
+
+
+def fake_pids(name):
+    """PID dels processos simulats (només els d'aquest bin/) amb nom `name`."""
+    pids = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit() or int(entry) == os.getpid():
+            continue
+        try:
+            with open(f"/proc/{{entry}}/comm") as f:
+                comm = f.read().strip()
+            with open(f"/proc/{{entry}}/cmdline", "rb") as f:
+                cmdline = f.read()
+        except OSError:
+            continue
+        if comm == name and BIN_DIR.encode() in cmdline:
+            pids.append(int(entry))
+    return pids
+
+
+def wait_for_term(child=None):
+    def on_term(signum, frame):
+        if child is not None and child.poll() is None:
+            child.terminate()
+            child.wait()
+        time.sleep(CONFIG.get("exit_delay", 0.0))
+        sys.exit(0)
+    signal.signal(signal.SIGTERM, on_term)
+    signal.signal(signal.SIGINT, on_term)
+    while True:
+        signal.pause()
+
+
+class Store:
+    """Magatzem de claus JSON {{camí dconf: valor GVariant en text}} amb bloqueig."""
+
+    def __init__(self):
+        import fcntl
+        self.path = os.path.join(STATE_DIR, "dconf.json")
+        self.lock = open(self.path + ".lock", "w")
+        fcntl.flock(self.lock, fcntl.LOCK_EX)
+        try:
+            with open(self.path) as f:
+                self.data = json.load(f)
+        except (OSError, ValueError):
+            self.data = {{}}
+
+    def save(self):
+        with open(self.path + ".tmp", "w") as f:
+            json.dump(self.data, f)
+        os.replace(self.path + ".tmp", self.path)
+
+
+def gvariant_string(value):
+    return "'" + value.replace("\\", "\\\\").replace("'", "\\'") + "'"
+
+
+if TOOL == "redshift-gtk":
+    time.sleep(CONFIG.get("startup_delay", 0.0))
+    child = subprocess.Popen([os.path.join(BIN_DIR, "redshift")])
+    wait_for_term(child)
+
+elif TOOL == "redshift":
+    time.sleep(CONFIG.get("startup_delay", 0.0))
+    if "-O" in ARGS or "-x" in ARGS or "-p" in ARGS:
+        sys.exit(0)  # Mode d'un sol cop: aplica i surt
+    wait_for_term()
+
+elif TOOL == "pgrep":
+    pids = fake_pids(ARGS[-1])
+    for pid in pids:
+        print(pid)
+    sys.exit(0 if pids else 1)
+
+elif TOOL == "killall":
+    names = [a for a in ARGS if not a.startswith("-")]
+    killed = False
+    for name in names:
+        for pid in fake_pids(name):
+            try:
+                os.kill(pid, signal.SIGTERM)
+                killed = True
+            except ProcessLookupError:
+                pass
+    sys.exit(0 if killed else 1)
+
+elif TOOL == "gsettings":
+    time.sleep(CONFIG.get("delay", 0.0))
+    command, schema, key = ARGS[0], ARGS[1], ARGS[2]
+    if schema not in SCHEMA_PATHS or key in CONFIG.get("fail_keys", []):
+        print(f"No such schema or key “{{schema}} {{key}}”", file=sys.stderr)
+        sys.exit(1)
+    path = SCHEMA_PATHS[schema] + key
+    store = Store()
+    if command == "set":
+        store.data[path] = gvariant_string(ARGS[3])
+        store.save()
+    elif command == "get":
+        print(store.data.get(path, "''"))
+
+elif TOOL == "dconf":
+    time.sleep(CONFIG.get("delay", 0.0))
+    store = Store()
+    if ARGS[0] == "load":
+        base = ARGS[1].rstrip("/")
+        section = ""
+        for line in sys.stdin.read().splitlines():
+            line = line.strip()
+            if line.startswith("[") and line.endswith("]"):
+                section = line[1:-1].strip("/")
+            elif "=" in line:
+                key, value = line.split("=", 1)
+                store.data[f"{{base}}/{{section}}/{{key}}".replace("//", "/")] = value
+        store.save()
+    elif ARGS[0] == "read":
+        if ARGS[1] in store.data:
+            print(store.data[ARGS[1]])
+    elif ARGS[0] == "write":
+        store.data[ARGS[1]] = ARGS[2]
+        store.save()
+'''
+
+
+class FakeTools:
+    """Directori temporal amb les eines simulades, el registre de processos i el magatzem."""
+
+    def __init__(self, base_dir, config=None):
+        self.base_dir = base_dir
+        self.bin_dir = os.path.join(base_dir, "bin")
+        self.state_dir = os.path.join(base_dir, "state")
+        self.config = {name: dict(values) for name, values in DEFAULT_TOOL_CONFIG.items()}
+        for name, values in (config or {}).items():
+            self.config.setdefault(name, {}).update(values)
+
+    def __enter__(self):
+        os.makedirs(self.bin_dir, exist_ok=True)
+        os.makedirs(self.state_dir, exist_ok=True)
+        self.configure()
+        source = _STUB_SOURCE.format(state_dir=self.state_dir, bin_dir=self.bin_dir)
+        for name in TOOL_NAMES:
+            path = os.path.join(self.bin_dir, name)
+            with open(path, "w") as f:
+                # -S: sense el mòdul site, per arrencar més de pressa
+                f.write(f"#!{sys.executable} -S\n{source}")
+            os.chmod(path, 0o755)
+        return self
+
+    def __exit__(self, *exc):
+        self.kill_all()
+
+    def configure(self, **tool_overrides):
+        """Canvia la configuració d'algunes eines; s'aplica a les execucions següents."""
+        for name, values in tool_overrides.items():
+            self.config.setdefault(name.replace("_", "-"), {}).update(values)
+        with open(os.path.join(self.state_dir, "config.json"), "w") as f:
+            json.dump({"tools": self.config, "schema_paths": DCONF_SCHEMA_PATHS}, f)
+
+    def env(self, base_env=None):
+        env = dict(os.environ if base_env is None else base_env)
+        env["PATH"] = self.bin_dir + os.pathsep + env.get("PATH", "")
+        return env
+
+    def spawn_log(self):
+        try:
+            with open(os.path.join(self.state_dir, "spawns.log")) as f:
+                return [line.rstrip("\n") for line in f]
+        except OSError:
+            return []
+
+    def spawn_counts(self):
+        counts = {}
+        for line in self.spawn_log():
+            tool = line.split(" ", 1)[0]
+            counts[tool] = counts.get(tool, 0) + 1
+        return counts
+
+    def store(self):
+        try:
+            with open(os.path.join(self.state_dir, "dconf.json")) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def kill_all(self):
+        """Mata els processos simulats que encara estiguin vius."""
+        import signal
+        for entry in os.listdir("/proc"):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f"/proc/{entry}/cmdline", "rb") as f:
+                    cmdline = f.read()
+            except OSError:
+                continue
+            if self.bin_dir.encode() in cmdline:
+                try:
+                    os.kill(int(entry), signal.SIGKILL)
+                except (ProcessLookupError, PermissionError):
+                    pass
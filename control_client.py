@@ -0,0 +1,64 @@
+"""Client mínim del dimoni de control (control_daemon.py).
+
+Només fa servir la biblioteca estàndard perquè la línia d'ordres pugui enviar
+una ordre al dimoni sense carregar res més. El protocol és una línia JSON per
+petició i una línia JSON per resposta:
+
+    -> {"command": "lluna", "theme": null, "temp": null, "brightness": null, "preview": false}
+    <- {"ok": true, "messages": ["Activant Mode Lluna...", ...], "elapsed_ms": 3.2}
+
+L'ordre `estat` afegeix a la resposta la clau "state" (vegeu
+DisplayController.state_summary).
+"""
+import json
+import os
+import socket
+
+SOCKET_NAME = "control_pantalla_mate.sock"
+# Engegar redshift-gtk pot trigar uns segons; el client espera la resposta sencera
+CLIENT_TIMEOUT = 15.0
+MAX_MESSAGE_SIZE = 1 << 20
+
+
+def socket_path():
+    """Camí del socket a $XDG_RUNTIME_DIR, o None si la sessió no en té."""
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if not runtime_dir:
+        return None
+    return os.path.join(runtime_dir, SOCKET_NAME)
+
+
+def encode_message(message):
+    return (json.dumps(message) + "\n").encode("utf-8")
+
+
+def read_message(sock):
+    """Llegeix un missatge JSON acabat en salt de línia."""
+    data = b""
+    while not data.endswith(b"\n"):
+        chunk = sock.recv(65536)
+        if not chunk:
+            raise ConnectionError("La connexió s'ha tancat abans d'acabar el missatge.")
+        data += chunk
+        if len(data) > MAX_MESSAGE_SIZE:
+            raise ValueError("Missatge massa gran.")
+    return json.loads(data.decode("utf-8"))
+
+
+def send_request(request, path=None, timeout=CLIENT_TIMEOUT):
+    """Envia `request` al dimoni i en retorna la resposta, o None si no hi ha cap dimoni escoltant."""
+    if path is None:
+        path = socket_path()
+    if path is None:
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        try:
+            sock.connect(path)
+        except (FileNotFoundError, ConnectionRefusedError):
+            return None
+        sock.sendall(encode_message(request))
+        return read_message(sock)
+    finally:
+        sock.close()
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""Dimoni de control: manté DisplayController carregat i rep ordres per un socket Unix.
+
+En lloc de pagar l'arrencada de Python i la càrrega de temes, preferències, Gio
+i XRandR a cada drecera de teclat, el dimoni ho carrega una sola vegada i
+escolta a $XDG_RUNTIME_DIR/control_pantalla_mate.sock. control_pantalla_cli.py
+li envia les ordres si està en marxa, i si no, les executa ell mateix.
+
+Les ordres s'atenen d'una en una, de manera que dues dreceres seguides no es
+poden trepitjar. Els temes instal·lats es mantenen al dia amb inotify, i
+prefs.ini i redshift.conf es tornen a llegir només si han canviat.
+
+Ús:
+    control_daemon.py [--socket CAMÍ]
+"""
+import argparse
+import bisect
+import os
+import selectors
+import signal
+import socket
+import sys
+import time
+
+from control_client import encode_message, read_message, socket_path
+from display_controller import (APP_PREFS_FILE, COMMANDS, CONFIG_FILE_PATH_REDSHIFT, PRESETS_FILE,
+                                THEME_PATHS, DisplayController, get_installed_gtk_themes,
+                                get_installed_window_themes)
+from gtk_themes import THEME_GTK3, THEME_METACITY
+from theme_watcher import ThemeWatcher
+
+# Temps màxim per rebre la petició d'un client, perquè un client penjat no bloquegi el dimoni
+CLIENT_READ_TIMEOUT = 2.0
+LISTEN_BACKLOG = 8
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+class DaemonController(DisplayController):
+    """DisplayController que recull els missatges de cada ordre per retornar-los al client."""
+
+    def __init__(self):
+        DisplayController.__init__(self)
+        self.suspend_redshift_on_preview = True
+        self.messages = []
+        self.installed_themes = []
+        self.installed_window_themes = []
+        self.theme_watcher = None
+        # -1: encara no s'han llegit (None vol dir que el fitxer no existeix)
+        self._prefs_mtime = -1
+        self._config_mtime = -1
+        self._presets_mtime = -1
+
+    def set_status(self, text):
+        DisplayController.set_status(self, text)
+        self.messages.append(text)
+
+    def show_dialog(self, kind, title, message):
+        DisplayController.show_dialog(self, kind, title, message)
+        self.messages.append(f"[{title}] {message}")
+
+    def warm_up(self):
+        """Carrega tot el que les ordres necessiten, una sola vegada."""
+        self.reload_if_changed()
+        themes_by_root = self.load_theme_index()
+        self.installed_themes = get_installed_gtk_themes(themes_by_root)
+        self.installed_window_themes = get_installed_window_themes(themes_by_root)
+        try:
+            self.theme_watcher = ThemeWatcher(THEME_PATHS, self.on_theme_added, self.on_theme_removed,
+                                              initial_themes=themes_by_root)
+        except (OSError, AttributeError) as e:
+            print(f"No s'ha pogut iniciar la vigilància de temes: {e}")
+        # La primera lectura carrega Gio i obre la connexió amb dconf
+        self.read_desktop_state()
+        if self.uses_native_backend():
+            self.gamma_engine.available()
+
+    def reload_if_changed(self):
+        """Torna a llegir prefs.ini, redshift.conf i presets.ini si algú (p.ex. la finestra) els ha modificat."""
+        prefs_mtime = _mtime(APP_PREFS_FILE)
+        if prefs_mtime != self._prefs_mtime:
+            self._prefs_mtime = prefs_mtime
+            self.load_app_preferences()
+            # Les rampes precalculades depenen dels perfils de cada monitor i del motor de color
+            self._presets_mtime = -1
+        config_mtime = _mtime(CONFIG_FILE_PATH_REDSHIFT)
+        if config_mtime != self._config_mtime:
+            self._config_mtime = config_mtime
+            self.load_initial_redshift_config()
+        presets_mtime = _mtime(PRESETS_FILE)
+        if presets_mtime != self._presets_mtime:
+            self._presets_mtime = presets_mtime
+            self.load_presets()
+
+    def on_theme_added(self, theme_name, info):
+        DisplayController.on_theme_added(self, theme_name, info)
+        for themes, capability in ((self.installed_themes, THEME_GTK3),
+                                   (self.installed_window_themes, THEME_METACITY)):
+            if info[0] & capability and theme_name not in themes:
+                bisect.insort(themes, theme_name)
+        print(f"Tema nou detectat: {theme_name}")
+
+    def on_theme_removed(self, theme_name):
+        DisplayController.on_theme_removed(self, theme_name)
+        for themes in (self.installed_themes, self.installed_window_themes):
+            if theme_name in themes:
+                themes.remove(theme_name)
+        print(f"Tema eliminat: {theme_name}")
+
+    def state_summary(self):
+        summary = DisplayController.state_summary(self)
+        summary["installed_themes"] = list(self.installed_themes)
+        summary["installed_window_themes"] = list(self.installed_window_themes)
+        return summary
+
+    def handle_request(self, request):
+        """Executa una petició del client i en retorna la resposta."""
+        t0 = time.perf_counter()
+        self.messages = []
+        command = request.get("command") if isinstance(request, dict) else None
+        if command not in COMMANDS:
+            return {"ok": False, "messages": [f"Ordre desconeguda: {command}"]}
+        try:
+            temp = request.get("temp")
+            brightness = request.get("brightness")
+            if temp is not None: temp = int(temp)
+            if brightness is not None: brightness = float(brightness)
+            self.reload_if_changed()
+            ok = self.run_command(command, theme=request.get("theme"), temp=temp, brightness=brightness,
+                                  preview=bool(request.get("preview")), window_theme=request.get("window_theme"),
+                                  preset=request.get("preset"))
+        except Exception as e:
+            print(f"Error executant l'ordre {command}: {e}")
+            self.messages.append(f"Error executant l'ordre {command}: {e}")
+            ok = False
+        response = {"ok": ok, "messages": self.messages}
+        if command == "estat":
+            response["state"] = self.state_summary()
+        response["elapsed_ms"] = (time.perf_counter() - t0) * 1000
+        return response
+
+
+def claim_socket(path):
+    """Crea el socket d'escolta a `path`; retorna None si ja hi ha un dimoni escoltant-hi."""
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+        return None
+    except (FileNotFoundError, ConnectionRefusedError):
+        pass
+    finally:
+        probe.close()
+    # Socket orfe d'un dimoni que no va acabar bé
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    # Només l'usuari pot connectar-s'hi
+    old_umask = os.umask(0o077)
+    try:
+        listener.bind(path)
+    finally:
+        os.umask(old_umask)
+    listener.listen(LISTEN_BACKLOG)
+    return listener
+
+
+class ControlDaemon:
+    def __init__(self, controller, listener, path):
+        self.controller = controller
+        self.listener = listener
+        self.path = path
+        self.selector = selectors.DefaultSelector()
+
+    def serve_forever(self):
+        self.selector.register(self.listener, selectors.EVENT_READ, self._accept)
+        watcher = self.controller.theme_watcher
+        if watcher is not None:
+            self.selector.register(watcher.fd, selectors.EVENT_READ, watcher.handle_events)
+        while True:
+            for key, _ in self.selector.select():
+                key.data()
+
+    def _accept(self):
+        conn, _ = self.listener.accept()
+        with conn:
+            conn.settimeout(CLIENT_READ_TIMEOUT)
+            try:
+                request = read_message(conn)
+            except OSError as e:
+                print(f"Petició incompleta: {e}")
+                return
+            except ValueError as e:
+                print(f"Petició no vàlida: {e}")
+                response = {"ok": False, "messages": [f"Petició no vàlida: {e}"]}
+            else:
+                response = self.controller.handle_request(request)
+            try:
+                conn.sendall(encode_message(response))
+            except OSError as e:
+                print(f"No s'ha pogut enviar la resposta: {e}")
+
+    def close(self):
+        self.selector.close()
+        self.listener.close()
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+        if self.controller.theme_watcher is not None:
+            self.controller.theme_watcher.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--socket", default=socket_path(), help="camí del socket Unix")
+    args = parser.parse_args(argv)
+    if args.socket is None:
+        print("XDG_RUNTIME_DIR no està definit; indica el camí del socket amb --socket.")
+        return 1
+
+    listener = claim_socket(args.socket)
+    if listener is None:
+        print(f"Ja hi ha un dimoni escoltant a {args.socket}.")
+        return 1
+    controller = DaemonController()
+    controller.warm_up()
+    daemon = ControlDaemon(controller, listener, args.socket)
+    # SIGTERM surt pel mateix camí que Ctrl+C, perquè s'esborri el socket
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    print(f"Escoltant a {args.socket}")
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        daemon.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
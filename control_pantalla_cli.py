@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""Control de pantalla des de la línia d'ordres, sense interfície gràfica.
+
+Fa servir la mateixa lògica que la finestra (display_controller.py) però no
+importa mai tkinter, de manera que arrenca ràpid i es pot cridar des de dreceres
+de teclat, cron o scripts de sessió.
+
+Ús:
+    control_pantalla_cli.py sol [--tema TEMA] [--finestra TEMA]
+    control_pantalla_cli.py lluna [--tema TEMA] [--finestra TEMA]
+    control_pantalla_cli.py aplica [--temp K] [--brillantor B] [--previsualitza]
+    control_pantalla_cli.py preajust NOM
+    control_pantalla_cli.py atura
+    control_pantalla_cli.py estat
+
+Sense --tema ni --finestra s'usen els temes preferits desats per la finestra
+(prefs.ini), i sense --temp/--brillantor, els valors de redshift.conf. Els
+preajustos són a presets.ini (`estat` en mostra la llista). El codi de sortida és 1
+si alguna acció ha fallat.
+
+Si el dimoni de control (control_daemon.py) està en marxa, l'ordre s'hi envia
+pel seu socket i aquest procés no carrega res més; si no, s'executa aquí
+mateix (o sempre aquí, amb --local).
+"""
+import argparse
+import sys
+
+from control_client import send_request
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--local", action="store_true",
+                        help="executa l'ordre en aquest procés encara que el dimoni de control estigui en marxa")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    sol = commands.add_parser("sol", help="activa el mode Sol (tema clar, Redshift apagat)")
+    sol.add_argument("--tema", help="tema GTK (per defecte, el preferit per al Sol)")
+    sol.add_argument("--finestra", help="tema de vora de finestra de Marco (per defecte, el preferit o el del tema GTK)")
+    lluna = commands.add_parser("lluna", help="activa el mode Lluna (tema fosc, Redshift actiu)")
+    lluna.add_argument("--tema", help="tema GTK (per defecte, el preferit per a la Lluna)")
+    lluna.add_argument("--finestra", help="tema de vora de finestra de Marco (per defecte, el preferit o el del tema GTK)")
+
+    apply_parser = commands.add_parser("aplica", help="desa i aplica temperatura i brillantor")
+    apply_parser.add_argument("--temp", type=int, help="temperatura de color en K (2500-6500)")
+    apply_parser.add_argument("--brillantor", type=float, help="brillantor (0.1-1.0)")
+    apply_parser.add_argument("--previsualitza", action="store_true",
+                              help="aplica els valors una sola vegada, sense desar-los ni reiniciar Redshift")
+
+    preset_parser = commands.add_parser("preajust", help="aplica un preajust amb nom, sense desar-lo a redshift.conf")
+    preset_parser.add_argument("nom", help="nom del preajust (p.ex. Lectura)")
+
+    commands.add_parser("atura", help="tanca redshift-gtk i redshift")
+    commands.add_parser("estat", help="mostra els temes actuals i si Redshift s'està executant")
+    return parser
+
+
+def print_state(state):
+    print(f"Tema GTK: {state['gtk_theme'] or '(desconegut)'}")
+    print(f"Tema de finestra: {state['window_theme'] or '(desconegut)'}")
+    print(f"redshift-gtk: {' '.join(map(str, state['redshift_gtk_pids'])) or 'aturat'}")
+    print(f"redshift: {' '.join(map(str, state['redshift_pids'])) or 'aturat'}")
+    print(f"Motor de color: {state['color_backend']}")
+    print(f"redshift.conf: {state['temp']}K, brillantor {state['brightness']:.2f}")
+    if state.get("supervised_pid") is not None:
+        print(f"redshift-gtk supervisat: PID {state['supervised_pid']}, en marxa fa {state['supervised_uptime']:.0f} s, "
+              f"{state['supervised_restarts']} reinicis")
+    if "outputs" in state:
+        print(f"Monitors: {', '.join(state['outputs']) or '(cap)'}")
+    for output, (temp_shift, brightness, gamma) in sorted(state.get("output_profiles", {}).items()):
+        print(f"Perfil {output}: {temp_shift:+d}K, brillantor x{brightness:.2f}, gamma {':'.join(f'{v:g}' for v in gamma)}")
+    if "presets" in state:
+        print(f"Preajustos: {', '.join(state['presets']) or '(cap)'}")
+    if "installed_themes" in state:
+        print(f"Temes instal·lats: {len(state['installed_themes'])} GTK, "
+              f"{len(state.get('installed_window_themes', ()))} de finestra")
+
+
+def run_in_daemon(request):
+    """Envia l'ordre al dimoni; retorna el codi de sortida, o None si no hi ha dimoni."""
+    try:
+        response = send_request(request)
+    except (OSError, ValueError) as e:
+        print(f"Error comunicant amb el dimoni de control: {e}")
+        return 1
+    if response is None:
+        return None
+    for message in response.get("messages", ()):
+        print(message)
+    if "state" in response:
+        print_state(response["state"])
+    return 0 if response.get("ok") else 1
+
+
+def run_locally(request):
+    # Només es carrega el controlador si no hi ha cap dimoni que faci la feina
+    from display_controller import DisplayController
+    controller = DisplayController()
+    controller.load_app_preferences()
+    controller.load_initial_redshift_config()
+    ok = controller.run_command(**request)
+    # El procés no pot acabar a mig fos de color del motor natiu
+    controller.gamma_transition.wait()
+    if request["command"] == "estat":
+        controller.load_presets()
+        print_state(controller.state_summary())
+    return 0 if ok else 1
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    request = {
+        "command": args.command,
+        "theme": getattr(args, "tema", None),
+        "window_theme": getattr(args, "finestra", None),
+        "temp": getattr(args, "temp", None),
+        "brightness": getattr(args, "brillantor", None),
+        "preview": getattr(args, "previsualitza", False),
+        "preset": getattr(args, "nom", None),
+    }
+    if not args.local:
+        exit_code = run_in_daemon(request)
+        if exit_code is not None:
+            return exit_code
+    return run_locally(request)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
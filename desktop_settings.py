@@ -0,0 +1,148 @@
+"""Escriptura de claus de GSettings en un sol lot, sense llançar un gsettings per clau.
+
+Ordre de preferència:
+  1. Gio (PyGObject), carregat la primera vegada que cal escriure.
+  2. Un únic `dconf load /` amb un keyfile generat amb totes les claus.
+  3. `gsettings set` per a cada clau (el comportament original).
+"""
+import subprocess
+
+# Camí de dconf de cada esquema (necessari per a la ruta `dconf load`)
+DCONF_SCHEMA_PATHS = {
+    "org.mate.interface": "/org/mate/desktop/interface/",
+    "org.mate.Marco.general": "/org/mate/marco/general/",
+}
+
+
+class SettingsError(Exception):
+    """No s'ha pogut escriure una clau de configuració de l'escriptori."""
+
+
+def _gvariant_string(value):
+    """Representa `value` com a cadena GVariant en format text ('...')."""
+    return "'" + value.replace("\\", "\\\\").replace("'", "\\'") + "'"
+
+
+def build_dconf_keyfile(changes):
+    """Genera el keyfile per a `dconf load /` a partir de [(esquema, clau, valor)]."""
+    sections = {}
+    for schema, key, value in changes:
+        path = DCONF_SCHEMA_PATHS.get(schema)
+        if path is None:
+            raise SettingsError(f"Camí de dconf desconegut per a l'esquema {schema}.")
+        sections.setdefault(path.strip("/"), []).append(f"{key}={_gvariant_string(value)}")
+    lines = []
+    for section, entries in sections.items():
+        lines.append(f"[{section}]")
+        lines.extend(entries)
+        lines.append("")
+    return "\n".join(lines)
+
+
+class SettingsBackend:
+    """Escriu diverses claus de cadena de GSettings amb un sol viatge d'anada i tornada."""
+
+    def __init__(self):
+        self._gio = None
+        self._gio_checked = False
+        self._settings = {}  # esquema -> Gio.Settings
+        # Últims valors escrits amb èxit; sense Gio és l'única manera barata de saber l'estat
+        self._last_written = {}
+
+    def _load_gio(self):
+        # Importar gi és car; només es fa la primera vegada que es canvia un tema
+        if not self._gio_checked:
+            self._gio_checked = True
+            try:
+                import gi
+                gi.require_version("Gio", "2.0")
+                from gi.repository import Gio
+                self._gio = Gio
+            except (ImportError, ValueError) as e:
+                print(f"Gio no disponible ({e}); s'usarà dconf.")
+        return self._gio
+
+    def _gio_settings(self, schema):
+        settings = self._settings.get(schema)
+        if settings is None:
+            # Gio.Settings.new() avorta el procés si l'esquema no existeix: cal comprovar-ho abans
+            source = self._gio.SettingsSchemaSource.get_default()
+            if source is None or source.lookup(schema, True) is None:
+                raise SettingsError(f"L'esquema {schema} no està instal·lat.")
+            settings = self._settings[schema] = self._gio.Settings.new(schema)
+        return settings
+
+    def read(self, keys):
+        """Llegeix [(esquema, clau)]; retorna {(esquema, clau): valor o None si és desconegut}.
+
+        Amb Gio el valor és el real de dconf. Sense Gio no es llança cap procés:
+        es retorna l'últim valor escrit en aquesta sessió, si n'hi ha.
+        """
+        if not self._load_gio():
+            return {key: self._last_written.get(key) for key in keys}
+        values = {}
+        for schema, key in keys:
+            try:
+                settings = self._gio_settings(schema)
+                values[(schema, key)] = settings.get_string(key)
+            except Exception as e:
+                print(f"No s'ha pogut llegir {schema} {key}: {e}")
+                values[(schema, key)] = None
+        return values
+
+    def write(self, changes):
+        """Escriu [(esquema, clau, valor)]; retorna {(esquema, clau): excepció o None}."""
+        if self._load_gio():
+            results = self._write_gio(changes)
+        else:
+            try:
+                results = self._write_dconf(changes)
+            except FileNotFoundError:
+                print("Avís: no s'ha trobat 'dconf'; s'usarà gsettings.")
+                results = self._write_gsettings(changes)
+        for schema, key, value in changes:
+            if results.get((schema, key)) is None:
+                self._last_written[(schema, key)] = value
+            else:
+                self._last_written.pop((schema, key), None)
+        return results
+
+    def _write_gio(self, changes):
+        results = {}
+        delayed = []
+        for schema, key, value in changes:
+            try:
+                settings = self._gio_settings(schema)
+                if not settings.props.settings_schema.has_key(key):
+                    raise SettingsError(f"L'esquema {schema} no té la clau {key}.")
+                if settings not in delayed:
+                    settings.delay()
+                    delayed.append(settings)
+                if not settings.set_string(key, value):
+                    raise SettingsError(f"La clau {schema} {key} no es pot escriure.")
+                results[(schema, key)] = None
+            except Exception as e:
+                results[(schema, key)] = e
+        for settings in delayed:
+            settings.apply()
+        # Una sola espera perquè totes les escriptures arribin a dconf
+        self._gio.Settings.sync()
+        return results
+
+    def _write_dconf(self, changes):
+        keyfile = build_dconf_keyfile(changes)
+        proc = subprocess.run(["dconf", "load", "/"], input=keyfile, text=True, capture_output=True)
+        error = None
+        if proc.returncode != 0:
+            error = SettingsError(proc.stderr.strip() or f"dconf load ha retornat {proc.returncode}")
+        return {(schema, key): error for schema, key, _ in changes}
+
+    def _write_gsettings(self, changes):
+        results = {}
+        for schema, key, value in changes:
+            try:
+                subprocess.run(["gsettings", "set", schema, key, value], check=True, capture_output=True)
+                results[(schema, key)] = None
+            except Exception as e:
+                results[(schema, key)] = e
+        return results
@@ -0,0 +1,942 @@
+"""Lògica de Redshift, temes de MATE i motor de color, sense cap dependència de Tk.
+
+`DisplayController` és la base de la finestra de redshift_control_and_teme_dark_gui_V4.py
+i de la línia d'ordres control_pantalla_cli.py. Els missatges per a l'usuari passen
+per `set_status` i `show_dialog`, que per defecte s'escriuen a la sortida estàndard.
+"""
+import os
+import configparser
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from action_trace import TRACE_ENV_VAR, traced, tracer
+from desktop_settings import SettingsBackend
+from gamma_transition import GammaTransition
+from gtk_themes import (THEME_METACITY, find_themes_by_root, gtk_theme_names, merge_theme_roots,
+                        window_theme_for, window_theme_names)
+from mode_reconciler import (ACTION_APPLY_GAMMA, ACTION_DEPENDENCIES, ACTION_FAILURE_MESSAGES,
+                             ACTION_RESET_GAMMA, ACTION_START_REDSHIFT, ACTION_STOP_REDSHIFT,
+                             DesiredState, DesktopState, plan_actions)
+from presets import load_presets, make_preset, redshift_command, save_presets
+from redshift_config import format_gamma, parse_gamma, redshift_config_is_current, write_redshift_config
+from redshift_processes import (ProcessScanner, read_session_id, resume_processes, suspend_processes,
+                                terminate_processes, wait_until_ready)
+from redshift_supervisor import RedshiftSupervisor
+from task_graph import run_task_graph
+from xrandr_gamma import NEUTRAL_TEMP, GammaEngine, GammaEngineError, OutputProfile
+
+# --- Constants Globals ---
+CONFIG_FILE_PATH_REDSHIFT = os.path.expanduser("~/.config/redshift.conf")
+# Fitxer per desar les preferències d'aquesta aplicació (temes seleccionats per Sol/Lluna)
+APP_PREFS_DIR = os.path.expanduser("~/.config/control_pantalla_mate")
+APP_PREFS_FILE = os.path.join(APP_PREFS_DIR, "prefs.ini")
+# Índex de temes desat entre execucions (es valida amb el mtime/inode de cada directori de temes)
+THEME_INDEX_FILE = os.path.join(APP_PREFS_DIR, "theme_index.json")
+# Taula anual de sortides i postes de sol per a la ubicació configurada
+SOLAR_TABLE_FILE = os.path.join(APP_PREFS_DIR, "solar_table.json")
+# Biblioteca de preajustos amb nom (vegeu presets.py)
+PRESETS_FILE = os.path.join(APP_PREFS_DIR, "presets.ini")
+# Traça JSONL amb el temps de cada pas (vegeu action_trace.py)
+TRACE_FILE = os.path.join(APP_PREFS_DIR, "trace.jsonl")
+# Existeix mentre a la pantalla hi ha un color d'un sol cop (redshift -P -O) que ningú no desfarà;
+# es comparteix entre processos perquè un `sol` de la línia d'ordres desfaci el `preajust` d'un altre
+ONESHOT_TINT_FILE = os.path.join(APP_PREFS_DIR, "oneshot_tint")
+THEME_PATHS = [
+    "/usr/share/themes",
+    os.path.expanduser("~/.themes")
+]
+
+REDSHIFT_GTK_PROCESS_NAME = "redshift-gtk"
+REDSHIFT_PROCESS_NAME = "redshift"
+# Temps màxims (en segons) d'espera perquè Redshift acabi o estigui a punt
+REDSHIFT_EXIT_TIMEOUT = 2.0
+# Espera addicional després de SIGKILL si Redshift no ha respost a SIGTERM
+REDSHIFT_KILL_TIMEOUT = 1.0
+REDSHIFT_START_TIMEOUT = 3.0
+# Segons després de l'última previsualització en què el redshift resident torna a funcionar
+PREVIEW_RESUME_DELAY = 10.0
+# Fils per executar en paral·lel les accions independents d'un canvi de mode
+MODE_ACTION_WORKERS = 3
+
+# Claus de GSettings (esquema, clau) dels temes GTK i de vora de finestra (Marco)
+GTK_THEME_KEY = ("org.mate.interface", "gtk-theme")
+MARCO_THEME_KEY = ("org.mate.Marco.general", "theme")
+
+# Noms de temes per defecte si no hi ha preferències desades
+DEFAULT_THEME_LLUNA = "Ambiant-MATE-Dark"
+DEFAULT_THEME_SOL = "Ambiant-MATE"
+
+# Valors de Redshift per defecte si redshift.conf no existeix o per als sliders
+DEFAULT_REDSHIFT_TEMP = 4500
+DEFAULT_REDSHIFT_BRIGHTNESS = 0.8
+# Valors per al mode Sol si Redshift es posa en neutre en lloc de tancar-se
+REDSHIFT_TEMP_SOL_NEUTRE = 6500
+REDSHIFT_BRIGHTNESS_SOL_NEUTRE = 1.0
+
+# Motors de color: redshift-gtk (procés resident) o rampes de gamma aplicades directament via XRandR
+COLOR_BACKEND_REDSHIFT = "redshift-gtk"
+COLOR_BACKEND_NATIVE = "natiu (XRandR)"
+COLOR_BACKENDS = (COLOR_BACKEND_REDSHIFT, COLOR_BACKEND_NATIVE)
+DEFAULT_COLOR_BACKEND = COLOR_BACKEND_REDSHIFT
+# Durada (s) de les transicions de color del motor natiu; 0 = canvi immediat
+DEFAULT_TRANSITION_DURATION = 2.0
+MAX_TRANSITION_DURATION = 60.0
+
+# Seccions de prefs.ini amb la correcció de color de cada monitor, p.ex. [Pantalla HDMI-1]
+OUTPUT_SECTION_PREFIX = "Pantalla "
+
+# Tipus de diàleg de show_dialog; la interfície gràfica els converteix en finestres de messagebox
+DIALOG_INFO = "info"
+DIALOG_WARNING = "warning"
+DIALOG_ERROR = "error"
+
+# Ordres que accepten la línia d'ordres i el dimoni de control
+COMMANDS = ("sol", "lluna", "aplica", "atura", "estat", "preajust")
+
+
+def get_installed_gtk_themes(themes_by_root=None):
+    """Detecta els temes GTK (amb gtk-3.0) instal·lats al sistema i a l'usuari."""
+    if themes_by_root is None:
+        themes_by_root = find_themes_by_root(THEME_PATHS, THEME_INDEX_FILE)
+    themes = set(gtk_theme_names(merge_theme_roots(themes_by_root)))
+    
+    # Si les llistes per defecte no estan, afegir-les per si de cas
+    if DEFAULT_THEME_LLUNA not in themes: themes.add(DEFAULT_THEME_LLUNA)
+    if DEFAULT_THEME_SOL not in themes: themes.add(DEFAULT_THEME_SOL)
+    
+    return sorted(list(themes))
+
+
+def get_installed_window_themes(themes_by_root=None):
+    """Detecta els temes de vora de finestra (amb metacity-1, els que fa servir Marco)."""
+    if themes_by_root is None:
+        themes_by_root = find_themes_by_root(THEME_PATHS, THEME_INDEX_FILE)
+    return window_theme_names(merge_theme_roots(themes_by_root))
+
+
+class DisplayController:
+    def __init__(self):
+        # Crear directori de preferències si no existeix
+        os.makedirs(APP_PREFS_DIR, exist_ok=True)
+
+        # Només els processos d'aquest usuari i d'aquesta sessió: mai els d'altres sessions
+        self.process_scanner = ProcessScanner((REDSHIFT_GTK_PROCESS_NAME, REDSHIFT_PROCESS_NAME),
+                                              owner_uid=os.getuid(), session_id=read_session_id())
+        # redshift-gtk iniciat per nosaltres: es recull quan surt i es reinicia si peta
+        self.redshift_supervisor = RedshiftSupervisor([REDSHIFT_GTK_PROCESS_NAME], on_exit=self.on_redshift_exit)
+        # El motor natiu només obre la connexió X la primera vegada que s'utilitza
+        self.gamma_engine = GammaEngine()
+        # Escriu els temes GTK i Marco d'una sola vegada (Gio es carrega en el primer canvi)
+        self.settings_backend = SettingsBackend()
+        # Fos progressiu entre valors de gamma (només amb el motor natiu; redshift-gtk faria un procés per pas)
+        self.gamma_transition = GammaTransition(self.gamma_engine.apply)
+        # Es crea la primera vegada que un canvi de mode té més d'una acció
+        self._mode_executor = None
+        # {tema: [capacitats, tema Marco]} de tots els temes instal·lats (vegeu gtk_themes.py)
+        self.theme_index = {}
+
+        # Valors per defecte fins que es llegeixin prefs.ini i redshift.conf
+        self.pref_sol_theme = DEFAULT_THEME_SOL
+        self.pref_lluna_theme = DEFAULT_THEME_LLUNA
+        # Tema de vora de finestra de cada mode; "" = el que correspon al tema GTK
+        self.pref_sol_window_theme = ""
+        self.pref_lluna_window_theme = ""
+        self.color_backend = DEFAULT_COLOR_BACKEND
+        self.transition_duration = DEFAULT_TRANSITION_DURATION
+        # Canvi automàtic Sol/Lluna segons la sortida i la posta de sol (cal latitud i longitud)
+        self.schedule_enabled = False
+        self.latitude = None
+        self.longitude = None
+        self.current_temp_val = DEFAULT_REDSHIFT_TEMP
+        self.current_brightness_val = DEFAULT_REDSHIFT_BRIGHTNESS
+        # Nombre de diàlegs d'error mostrats; la línia d'ordres en fa el codi de sortida
+        self.error_count = 0
+        self.trace_enabled = False
+        # {sortida XRandR: OutputProfile} llegits de prefs.ini (només motor natiu)
+        self.output_profiles = {}
+        # {nom: Preset} de presets.ini (None fins que es llegeix) i l'ordre de Redshift de cadascun
+        self.presets = None
+        self._preset_commands = {}
+        # Només els processos que duren (finestra, dimoni) aturen el redshift resident per previsualitzar:
+        # una ordre d'un sol cop acabaria abans que la represa i desfaria la mateixa previsualització
+        self.suspend_redshift_on_preview = False
+        # PID de redshift aturats (SIGSTOP) mentre dura una previsualització, i el temporitzador que els reprèn
+        self._suspended_pids = set()
+        self._resume_timer = None
+        self._suspend_lock = threading.Lock()
+        # (nom, mil·lisegons) de l'última acció executada amb run_timed
+        self.last_action = None
+
+    def set_status(self, text):
+        print(text)
+
+    def show_dialog(self, kind, title, message):
+        """Informa l'usuari; `kind` és DIALOG_INFO, DIALOG_WARNING o DIALOG_ERROR."""
+        if kind == DIALOG_ERROR:
+            self.error_count += 1
+        print(f"[{title}] {message}")
+
+    @traced()
+    def load_app_preferences(self):
+        """Llegeix les preferències de tema desades per l'usuari."""
+        config = configparser.ConfigParser()
+        # Valors per defecte si el fitxer o les claus no existeixen
+        self.pref_sol_theme = DEFAULT_THEME_SOL
+        self.pref_lluna_theme = DEFAULT_THEME_LLUNA
+        self.pref_sol_window_theme = ""
+        self.pref_lluna_window_theme = ""
+        self.color_backend = DEFAULT_COLOR_BACKEND
+        self.transition_duration = DEFAULT_TRANSITION_DURATION
+        self.schedule_enabled = False
+        self.latitude = None
+        self.longitude = None
+        self.trace_enabled = False
+        self.output_profiles = {}
+
+        if os.path.exists(APP_PREFS_FILE):
+            try:
+                config.read(APP_PREFS_FILE)
+                if 'TemesPreferits' in config:
+                    self.pref_sol_theme = config.get('TemesPreferits', 'tema_sol', fallback=DEFAULT_THEME_SOL)
+                    self.pref_lluna_theme = config.get('TemesPreferits', 'tema_lluna', fallback=DEFAULT_THEME_LLUNA)
+                    self.pref_sol_window_theme = config.get('TemesPreferits', 'finestra_sol', fallback="")
+                    self.pref_lluna_window_theme = config.get('TemesPreferits', 'finestra_lluna', fallback="")
+                if 'MotorColor' in config:
+                    backend = config.get('MotorColor', 'motor', fallback=DEFAULT_COLOR_BACKEND)
+                    if backend in COLOR_BACKENDS:
+                        self.color_backend = backend
+                    duration = config.getfloat('MotorColor', 'transicio', fallback=DEFAULT_TRANSITION_DURATION)
+                    self.transition_duration = min(max(duration, 0.0), MAX_TRANSITION_DURATION)
+                if 'Programacio' in config:
+                    self.schedule_enabled = config.getboolean('Programacio', 'actiu', fallback=False)
+                    self.latitude = config.getfloat('Programacio', 'latitud', fallback=None)
+                    self.longitude = config.getfloat('Programacio', 'longitud', fallback=None)
+                if 'Diagnostic' in config:
+                    self.trace_enabled = config.getboolean('Diagnostic', 'traca', fallback=False)
+                for section in config.sections():
+                    if section.startswith(OUTPUT_SECTION_PREFIX):
+                        self._load_output_profile(config, section)
+            except Exception as e:
+                print(f"Error llegint preferències de l'aplicació des de {APP_PREFS_FILE}: {e}")
+        else:
+            print(f"Fitxer de preferències {APP_PREFS_FILE} no trobat. S'usaran valors per defecte.")
+        
+        print(f"Tema Sol carregat/per defecte: {self.pref_sol_theme}")
+        print(f"Tema Lluna carregat/per defecte: {self.pref_lluna_theme}")
+        print(f"Motor de color: {self.color_backend}")
+        if self.schedule_enabled:
+            print(f"Canvi automàtic Sol/Lluna a la ubicació {self.latitude}, {self.longitude}")
+        if self.output_profiles:
+            print(f"Perfils de color per monitor: {', '.join(sorted(self.output_profiles))}")
+        self.gamma_engine.set_output_profiles(self.output_profiles)
+        self.configure_tracing()
+
+    def _load_output_profile(self, config, section):
+        output = section[len(OUTPUT_SECTION_PREFIX):].strip()
+        try:
+            profile = OutputProfile(
+                temp_shift=config.getint(section, 'temperatura', fallback=0),
+                brightness=min(max(config.getfloat(section, 'brillantor', fallback=1.0), 0.1), 1.0),
+                gamma=parse_gamma(config.get(section, 'gamma', fallback="1.0")))
+        except ValueError as e:
+            print(f"Perfil de la pantalla {output} no vàlid a {APP_PREFS_FILE}: {e}")
+            return
+        self.output_profiles[output] = profile
+
+    @traced()
+    def save_app_preferences(self):
+        """Guarda els temes preferits i el motor de color al fitxer de preferències."""
+        config = configparser.ConfigParser()
+        config.add_section('TemesPreferits')
+        config.set('TemesPreferits', 'tema_sol', self.pref_sol_theme)
+        config.set('TemesPreferits', 'tema_lluna', self.pref_lluna_theme)
+        config.set('TemesPreferits', 'finestra_sol', self.pref_sol_window_theme)
+        config.set('TemesPreferits', 'finestra_lluna', self.pref_lluna_window_theme)
+        config.add_section('MotorColor')
+        config.set('MotorColor', 'motor', self.color_backend)
+        config.set('MotorColor', 'transicio', str(self.transition_duration))
+        config.add_section('Programacio')
+        config.set('Programacio', 'actiu', 'true' if self.schedule_enabled else 'false')
+        if self.latitude is not None and self.longitude is not None:
+            config.set('Programacio', 'latitud', str(self.latitude))
+            config.set('Programacio', 'longitud', str(self.longitude))
+        config.add_section('Diagnostic')
+        config.set('Diagnostic', 'traca', 'true' if self.trace_enabled else 'false')
+        for output, profile in sorted(self.output_profiles.items()):
+            section = OUTPUT_SECTION_PREFIX + output
+            config.add_section(section)
+            config.set(section, 'temperatura', str(profile.temp_shift))
+            config.set(section, 'brillantor', str(profile.brightness))
+            config.set(section, 'gamma', format_gamma(profile.gamma))
+        
+        try:
+            with open(APP_PREFS_FILE, 'w') as configfile:
+                config.write(configfile)
+            print(f"Preferències guardades a {APP_PREFS_FILE}")
+            self.set_status("Preferències guardades.")
+        except Exception as e:
+            print(f"Error guardant preferències a {APP_PREFS_FILE}: {e}")
+            self.set_status("Error guardant preferències.")
+
+    def configure_tracing(self):
+        """Activa la traça JSONL si ho demanen prefs.ini ([Diagnostic] traca) o la variable d'entorn."""
+        if self.trace_enabled or os.environ.get(TRACE_ENV_VAR, "") not in ("", "0"):
+            if not tracer.enabled:
+                print(f"Traça de temps activada a {TRACE_FILE}")
+            tracer.enable(TRACE_FILE)
+        else:
+            tracer.disable()
+
+    def run_timed(self, action, *args, **kwargs):
+        """Executa `action` com una acció cronometrada (span arrel de la traça)."""
+        with tracer.action(action.__name__) as span:
+            result = action(*args, **kwargs)
+        self.last_action = (action.__name__, span.elapsed_ms)
+        return result
+
+    def schedule_location(self):
+        """(latitud, longitud) si el canvi automàtic està activat i la ubicació és vàlida, o None."""
+        if not self.schedule_enabled or self.latitude is None or self.longitude is None:
+            return None
+        if not (-90 <= self.latitude <= 90 and -180 <= self.longitude <= 180):
+            return None
+        return self.latitude, self.longitude
+
+    def uses_native_backend(self):
+        return self.color_backend == COLOR_BACKEND_NATIVE
+
+    @traced()
+    def apply_native_gamma(self, temp, brightness, silent=False):
+        """Aplica temperatura i brillantor amb el motor natiu, sense cap procés de Redshift."""
+        # Si redshift-gtk segueix actiu tornaria a escriure les seves pròpies rampes
+        if self.is_process_running(REDSHIFT_GTK_PROCESS_NAME) or self.is_process_running(REDSHIFT_PROCESS_NAME):
+            self.kill_redshift_processes()
+        try:
+            if self.transition_duration > 0 and self.gamma_engine.available():
+                # Sense cap valor aplicat encara, la pantalla és neutra (redshift la restaura en sortir)
+                origin = self.gamma_engine.last_applied or (NEUTRAL_TEMP, 1.0)
+                self.gamma_transition.start(origin, (temp, brightness), self.transition_duration)
+                print(f"Transició de gamma cap a {int(temp)}K, {float(brightness):.2f} en {self.transition_duration:.1f} s")
+            else:
+                self.gamma_transition.cancel()
+                self.gamma_engine.apply(temp, brightness)
+                print(f"Rampes de gamma aplicades (Temp: {int(temp)}K, Bright: {float(brightness):.2f})")
+            return True
+        except (GammaEngineError, OSError) as e:
+            error_msg = f"No s'han pogut aplicar les rampes de gamma: {e}"
+            print(error_msg)
+            if not silent: self.show_dialog(DIALOG_ERROR, "Error motor de color", error_msg)
+            return False
+
+    @traced()
+    def preview_values(self, temp, brightness):
+        """Aplica temperatura i brillantor una sola vegada, sense desar res ni reiniciar Redshift."""
+        temp_str = str(int(temp))
+        brightness_str = f"{float(brightness):.2f}"
+        try:
+            if self.uses_native_backend():
+                # La previsualització segueix el slider directament, sense fos
+                self.gamma_transition.cancel()
+                self.gamma_engine.apply(temp, brightness)
+            else:
+                # El redshift resident tornaria a escriure els seus colors al proper cicle
+                if self.suspend_redshift_on_preview:
+                    self.suspend_redshift_for_preview()
+                self.run_oneshot_redshift([REDSHIFT_PROCESS_NAME, "-P", "-O", temp_str, "-b", brightness_str])
+            self.set_status(f"Previsualització: {temp_str}K, brillantor {brightness_str} (sense desar).")
+            return True
+        except Exception as e:
+            print(f"Error en previsualitzar Redshift ({temp_str}K, {brightness_str}): {e}")
+            self.set_status("Error en previsualitzar els ajustaments.")
+            return False
+
+    @traced()
+    def activate_mode_sol(self, theme_to_apply=None, window_theme=None):
+        """Activa el mode Sol; retorna False si alguna de les accions ha fallat."""
+        self.set_status("Activant Mode Sol...")
+        print("\n--- Activant Mode Sol (Dia) ---")
+        if theme_to_apply is None:
+            theme_to_apply = self.pref_sol_theme
+        if window_theme is None:
+            window_theme = self.pref_sol_window_theme
+        window_theme = self.resolve_window_theme(theme_to_apply, window_theme)
+        gamma = (REDSHIFT_TEMP_SOL_NEUTRE, REDSHIFT_BRIGHTNESS_SOL_NEUTRE) if self.uses_native_backend() else None
+        desired = DesiredState("sol", theme_to_apply, window_theme, redshift_running=False, gamma=gamma)
+        skipped, failed = self.reconcile_mode(desired)
+        
+        self.set_status(self._mode_status(f"Mode Sol Activat (Tema: {theme_to_apply}, Redshift Apagat).", skipped, failed))
+        print(f"Mode Sol Activat. Tema: {theme_to_apply}.")
+        return not failed
+
+    @traced()
+    def activate_mode_lluna(self, theme_to_apply=None, window_theme=None):
+        """Activa el mode Lluna; retorna False si alguna de les accions ha fallat."""
+        self.set_status("Activant Mode Lluna...")
+        # Si es previsualitzava, el redshift-gtk que ja corre ha de tornar als seus valors
+        self.resume_redshift()
+        print("\n--- Activant Mode Lluna (Nit) ---")
+        if theme_to_apply is None:
+            theme_to_apply = self.pref_lluna_theme
+        if window_theme is None:
+            window_theme = self.pref_lluna_window_theme
+        window_theme = self.resolve_window_theme(theme_to_apply, window_theme)
+        if self.uses_native_backend():
+            self.load_initial_redshift_config()
+            desired = DesiredState("lluna", theme_to_apply, window_theme, redshift_running=False,
+                                   gamma=(self.current_temp_val, self.current_brightness_val))
+        else:
+            desired = DesiredState("lluna", theme_to_apply, window_theme, redshift_running=True, gamma=None)
+        skipped, failed = self.reconcile_mode(desired)
+        
+        self.set_status(self._mode_status(f"Mode Lluna Activat (Tema: {theme_to_apply}, Redshift actiu).", skipped, failed))
+        print(f"Mode Lluna Activat. Tema: {theme_to_apply}.")
+        return not failed
+
+    def load_presets(self):
+        """Llegeix presets.ini i en prepara l'aplicació: l'ordre de Redshift i, amb el motor natiu, les rampes."""
+        self.presets = load_presets(PRESETS_FILE)
+        self._preset_commands = {name: redshift_command(preset, REDSHIFT_PROCESS_NAME)
+                                 for name, preset in self.presets.items()}
+        if self.uses_native_backend() and self.gamma_engine.available():
+            try:
+                self.gamma_engine.precompute([(p.temp, p.brightness, p.gamma) for p in self.presets.values()])
+            except GammaEngineError as e:
+                print(f"No s'han pogut precalcular les rampes dels preajustos: {e}")
+        return list(self.presets)
+
+    def suspend_redshift_for_preview(self):
+        """Atura el redshift resident mentre es previsualitza i en reprograma la represa.
+
+        Cada previsualització allarga l'aturada PREVIEW_RESUME_DELAY segons més; en
+        reprendre's, Redshift torna a aplicar els valors de redshift.conf.
+        """
+        with self._suspend_lock:
+            if self._resume_timer is not None:
+                self._resume_timer.cancel()
+                self._resume_timer = None
+            if not self._suspended_pids:
+                self.process_scanner.invalidate()
+                self._suspended_pids = set(self.process_scanner.pids(REDSHIFT_PROCESS_NAME))
+                suspend_processes(self._suspended_pids)
+            if self._suspended_pids:
+                # No és un fil dimoni: si el procés acaba abans, espera a reprendre Redshift
+                self._resume_timer = threading.Timer(PREVIEW_RESUME_DELAY, self.resume_redshift)
+                self._resume_timer.start()
+
+    def resume_redshift(self):
+        """Fa continuar el redshift aturat per una previsualització (si n'hi ha cap)."""
+        with self._suspend_lock:
+            if self._resume_timer is not None:
+                self._resume_timer.cancel()
+                self._resume_timer = None
+            pids, self._suspended_pids = self._suspended_pids, set()
+        if pids:
+            resume_processes(pids)
+            print("Previsualització acabada: Redshift torna a aplicar els seus valors.")
+
+    @property
+    def oneshot_tint(self):
+        """Cert si s'ha aplicat un color d'un sol cop sense cap Redshift que el gestioni (vegeu ONESHOT_TINT_FILE)."""
+        return os.path.exists(ONESHOT_TINT_FILE)
+
+    @oneshot_tint.setter
+    def oneshot_tint(self, tinted):
+        try:
+            if tinted:
+                with open(ONESHOT_TINT_FILE, "w"):
+                    pass
+            else:
+                os.unlink(ONESHOT_TINT_FILE)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"No s'ha pogut actualitzar {ONESHOT_TINT_FILE}: {e}")
+
+    def resume_stopped_redshift(self):
+        """Fa continuar els redshift aturats que no són d'una previsualització d'aquest procés.
+
+        Queden aturats si el procés que previsualitzava ha acabat (o ha petat) abans de
+        reprendre'ls; per a la resta de l'aplicació, un redshift aturat no està actiu.
+        """
+        with self._suspend_lock:
+            ours = set(self._suspended_pids)
+        stale = [pid for pid in self.process_scanner.stopped_pids(REDSHIFT_PROCESS_NAME) if pid not in ours]
+        if stale:
+            print(f"Redshift aturat per una previsualització anterior ({', '.join(map(str, stale))}); es reprèn.")
+            resume_processes(stale)
+
+    def run_oneshot_redshift(self, command):
+        """Executa un `redshift -P -O` d'un sol cop i recorda si caldrà desfer-lo en passar a Sol."""
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        # Les rampes han canviat sense passar pel motor natiu
+        self.gamma_engine.invalidate()
+        # Si hi ha un redshift en marxa (p.ex. aturat durant una previsualització), ell mateix el desfarà
+        self.process_scanner.invalidate()
+        self.oneshot_tint = not self.is_process_running(REDSHIFT_PROCESS_NAME)
+
+    @traced()
+    def reset_oneshot_tint(self):
+        """Torna a posar rampes neutres després d'un preajust o una previsualització d'un sol cop."""
+        try:
+            if self.gamma_engine.available():
+                self.gamma_engine.reset()
+            else:
+                subprocess.run([REDSHIFT_PROCESS_NAME, "-x"], check=True,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        except (GammaEngineError, OSError, subprocess.CalledProcessError) as e:
+            print(f"No s'han pogut restablir les rampes de gamma: {e}")
+            return False
+        self.oneshot_tint = False
+        return True
+
+    @traced()
+    def apply_preset(self, name, silent=False):
+        """Aplica un preajust d'una sola vegada: no reescriu redshift.conf ni reinicia Redshift."""
+        if self.presets is None:
+            self.load_presets()
+        preset = self.presets.get(name)
+        if preset is None:
+            error_msg = f"No hi ha cap preajust anomenat '{name}'. Disponibles: {', '.join(self.presets) or '(cap)'}."
+            print(error_msg)
+            if not silent: self.show_dialog(DIALOG_ERROR, "Preajust", error_msg)
+            return False
+        try:
+            # Si redshift-gtk segueix actiu, al proper cicle tornaria a escriure les seves pròpies rampes
+            if self.is_process_running(REDSHIFT_GTK_PROCESS_NAME) or self.is_process_running(REDSHIFT_PROCESS_NAME):
+                self.kill_redshift_processes()
+            if self.uses_native_backend():
+                self.gamma_transition.cancel()
+                self.gamma_engine.apply(preset.temp, preset.brightness, preset.gamma)
+            else:
+                self.run_oneshot_redshift(self._preset_commands[name])
+        except (GammaEngineError, OSError, subprocess.CalledProcessError) as e:
+            error_msg = f"No s'ha pogut aplicar el preajust {name}: {e}"
+            print(error_msg)
+            if not silent: self.show_dialog(DIALOG_ERROR, "Preajust", error_msg)
+            return False
+        theme_ok = True
+        if preset.gtk_theme:
+            window_theme = self.resolve_window_theme(preset.gtk_theme, preset.window_theme)
+            theme_ok = self.apply_mate_theme_direct(preset.gtk_theme, window_theme, silent=True)
+        self.set_status(f"Preajust {name}: {preset.temp}K, brillantor {preset.brightness:.2f}"
+                        + (f", tema {preset.gtk_theme}." if preset.gtk_theme else ".")
+                        + ("" if theme_ok else " Errors: no s'ha pogut aplicar el tema."))
+        return theme_ok
+
+    @traced()
+    def save_preset(self, name, temp, brightness):
+        """Desa (o substitueix) un preajust amb aquests valors, conservant-ne el tema i la gamma si ja existia."""
+        if self.presets is None:
+            self.load_presets()
+        old = self.presets.get(name.strip())
+        if old is not None:
+            preset = make_preset(name, temp, brightness, old.gamma, old.gtk_theme, old.window_theme)
+        else:
+            preset = make_preset(name, temp, brightness)
+        if not preset.name:
+            self.set_status("Cal un nom per desar el preajust.")
+            return False
+        presets = dict(self.presets)
+        presets[preset.name] = preset
+        try:
+            save_presets(PRESETS_FILE, presets)
+        except OSError as e:
+            print(f"Error desant els preajustos a {PRESETS_FILE}: {e}")
+            self.set_status("Error desant el preajust.")
+            return False
+        self.load_presets()
+        self.set_status(f"Preajust {preset.name} desat ({preset.temp}K, brillantor {preset.brightness:.2f}).")
+        return True
+
+    def run_command(self, command, theme=None, temp=None, brightness=None, preview=False, window_theme=None,
+                    preset=None):
+        """Executa una de les ordres de COMMANDS; retorna False si alguna acció ha fallat."""
+        with tracer.action(command) as span:
+            ok = self._run_command(command, theme, temp, brightness, preview, window_theme, preset)
+        self.last_action = (command, span.elapsed_ms)
+        return ok
+
+    def _run_command(self, command, theme, temp, brightness, preview, window_theme, preset):
+        errors_before = self.error_count
+        ok = True
+        if command == "sol":
+            ok = self.activate_mode_sol(theme, window_theme)
+        elif command == "lluna":
+            ok = self.activate_mode_lluna(theme, window_theme)
+        elif command == "aplica":
+            if temp is None: temp = self.current_temp_val
+            if brightness is None: brightness = self.current_brightness_val
+            if preview:
+                if not self.preview_values(temp, brightness):
+                    return False
+            else:
+                self.apply_and_restart_redshift_manually(temp, brightness)
+        elif command == "atura":
+            ok = self.quit_redshift()
+        elif command == "preajust":
+            if not self.apply_preset(preset):
+                return False
+        elif command != "estat":
+            raise ValueError(f"Ordre desconeguda: {command}")
+        # Els modes no mostren diàlegs d'error: les accions fallades arriben pel valor de retorn
+        return ok and self.error_count == errors_before
+
+    def load_theme_index(self):
+        """Llegeix l'índex de temes (desat entre execucions) i en retorna {arrel: {tema: info}}."""
+        themes_by_root = find_themes_by_root(THEME_PATHS, THEME_INDEX_FILE)
+        self.theme_index = merge_theme_roots(themes_by_root)
+        return themes_by_root
+
+    def on_theme_added(self, theme_name, info):
+        self.theme_index[theme_name] = info
+
+    def on_theme_removed(self, theme_name):
+        self.theme_index.pop(theme_name, None)
+
+    def resolve_window_theme(self, gtk_theme, window_theme):
+        """Tema Marco a aplicar amb `gtk_theme`, o None si no n'hi ha cap de vàlid (no es toca).
+
+        `window_theme` buit vol dir "el que correspon al tema GTK" (metatema o mateix nom).
+        """
+        if not self.theme_index:
+            self.load_theme_index()
+        if not self.theme_index:
+            # Sense índex (cap directori de temes llegible) es manté el comportament antic
+            return window_theme or gtk_theme
+        if window_theme:
+            info = self.theme_index.get(window_theme)
+            if info is not None and info[0] & THEME_METACITY:
+                return window_theme
+            print(f"Avís: {window_theme} no és un tema de finestra instal·lat; es farà servir el del tema GTK.")
+        resolved = window_theme_for(self.theme_index, gtk_theme)
+        if resolved is None:
+            print(f"El tema {gtk_theme} no té tema de finestra (metacity-1); no es canvia la vora de les finestres.")
+        return resolved
+
+    def state_summary(self):
+        """Estat actual en un diccionari serialitzable (per a l'ordre `estat`)."""
+        state = self.read_desktop_state()
+        summary = {
+            "gtk_theme": state.gtk_theme,
+            "window_theme": state.window_theme,
+            "redshift_gtk_pids": list(state.redshift_gtk_pids),
+            "redshift_pids": list(state.redshift_pids),
+            "color_backend": self.color_backend,
+            "temp": self.current_temp_val,
+            "brightness": self.current_brightness_val,
+            "supervised_pid": self.redshift_supervisor.pid,
+            "supervised_uptime": self.redshift_supervisor.uptime(),
+            "supervised_restarts": self.redshift_supervisor.restart_count,
+            "output_profiles": {output: [profile.temp_shift, profile.brightness, list(profile.gamma)]
+                                for output, profile in self.output_profiles.items()},
+        }
+        if self.presets is not None:
+            summary["presets"] = list(self.presets)
+        # Noms dels monitors, per saber com anomenar les seccions [Pantalla ...] de prefs.ini
+        if self.uses_native_backend() and not self.gamma_transition.running and self.gamma_engine.available():
+            summary["outputs"] = self.gamma_engine.outputs()
+        return summary
+
+    def _mode_status(self, message, skipped, failed=()):
+        if failed:
+            message = f"{message} Errors: {', '.join(failed)}."
+        if skipped:
+            return f"{message} Sense canvis: {', '.join(skipped)}."
+        return message
+
+    @traced()
+    def read_desktop_state(self):
+        """Llegeix l'estat actual: temes GTK/Marco, processos de Redshift i gamma del motor natiu."""
+        self.process_scanner.invalidate()
+        self.resume_stopped_redshift()
+        with tracer.span("settings_read"):
+            themes = self.settings_backend.read([GTK_THEME_KEY, MARCO_THEME_KEY])
+        redshift_gtk_pids = self.process_scanner.pids(REDSHIFT_GTK_PROCESS_NAME)
+        redshift_pids = self.process_scanner.pids(REDSHIFT_PROCESS_NAME)
+        return DesktopState(gtk_theme=themes.get(GTK_THEME_KEY),
+                            window_theme=themes.get(MARCO_THEME_KEY),
+                            redshift_gtk_pids=redshift_gtk_pids,
+                            redshift_pids=redshift_pids,
+                            # Mentre Redshift corre les rampes són seves: la gamma és desconeguda
+                            gamma=None if redshift_gtk_pids or redshift_pids else self.gamma_engine.last_applied,
+                            tinted=self.oneshot_tint and not (redshift_gtk_pids or redshift_pids))
+
+    def reconcile_mode(self, desired):
+        """Executa només les accions que falten per arribar a `desired`.
+
+        Les accions independents (p.ex. el tema i el cicle de vida de Redshift) s'executen
+        alhora. Retorna (omeses, fallades), dues llistes de descripcions per a l'usuari; una
+        acció que llança una excepció compta com a fallada.
+        """
+        actions, skipped = plan_actions(self.read_desktop_state(), desired)
+        tasks = {action: tracer.bind(self._mode_action(action, desired)) for action in actions}
+        failed = []
+        if tasks:
+            results = run_task_graph(tasks, ACTION_DEPENDENCIES, self._get_mode_executor())
+            for action in actions:
+                ok, error = results[action]
+                if error is not None:
+                    print(f"Error inesperat a l'acció {action}: {error}")
+                if error is not None or not ok:
+                    failed.append(ACTION_FAILURE_MESSAGES[action])
+        if skipped:
+            print(f"Mode {desired.mode}: omès perquè ja estava al dia: {', '.join(skipped)}.")
+        return skipped, failed
+
+    def _get_mode_executor(self):
+        if self._mode_executor is None:
+            self._mode_executor = ThreadPoolExecutor(max_workers=MODE_ACTION_WORKERS, thread_name_prefix="mode")
+        return self._mode_executor
+
+    def _mode_action(self, action, desired):
+        """Funció sense arguments que executa `action` i retorna si ha anat bé."""
+        if action == ACTION_STOP_REDSHIFT:
+            def run():
+                return self.quit_redshift(silent=True)
+        elif action == ACTION_START_REDSHIFT:
+            def run():
+                self.ensure_redshift_gtk_running(silent=True)
+                return self.is_process_running(REDSHIFT_GTK_PROCESS_NAME)
+        elif action == ACTION_APPLY_GAMMA:
+            def run():
+                return self.apply_native_gamma(*desired.gamma, silent=True)
+        elif action == ACTION_RESET_GAMMA:
+            run = self.reset_oneshot_tint
+        else:
+            def run():
+                return self.apply_mate_theme_direct(desired.gtk_theme, desired.window_theme, silent=True)
+        return run
+
+    # --- Mètodes de Suport (is_process_running, quit_redshift, ensure_redshift_gtk_running, etc.) ---
+    # Aquests mètodes són pràcticament iguals que a l'última versió funcional,
+    # amb petits ajustos per a 'silent' i la lògica de quan escriure redshift.conf.
+    # He copiat el cos d'aquests mètodes de la teva última versió funcional de referència (V3 corregida)
+    # i els he enganxat aquí per brevetat, assegurant-me que els paràmetres 'silent' s'utilitzen.
+    # Si us plau, verifica que són els correctes o informa'm si cal copiar-los explícitament de nou.
+
+    @traced()
+    def is_process_running(self, process_name):
+        return self.process_scanner.is_running(process_name)
+
+    @traced()
+    def kill_redshift_processes(self):
+        """Atura els processos de Redshift d'aquesta sessió (SIGTERM i, si cal, SIGKILL) i espera que surtin."""
+        # Una sortida demanada no s'ha de prendre per una fallada
+        supervised = self.redshift_supervisor.release()
+        # Un procés aturat per una previsualització no atendria SIGTERM fins a continuar
+        self.resume_redshift()
+        self.process_scanner.invalidate()
+        pids = set(self.process_scanner.pids(REDSHIFT_PROCESS_NAME) + self.process_scanner.pids(REDSHIFT_GTK_PROCESS_NAME))
+        if supervised is not None:
+            pids.add(supervised.pid)
+        with tracer.span("terminate", pids=len(pids)) as span:
+            still_alive = terminate_processes(pids, REDSHIFT_EXIT_TIMEOUT, REDSHIFT_KILL_TIMEOUT)
+            span.set(still_alive=len(still_alive))
+        self.process_scanner.invalidate()
+        if pids:
+            # Redshift restaura la gamma en sortir: les rampes que recordava el motor natiu ja no hi són
+            self.gamma_engine.invalidate()
+        return not still_alive
+
+    @traced()
+    def spawn_redshift_gtk(self):
+        """Inicia redshift-gtk i espera que el seu procés redshift estigui en marxa."""
+        # redshift-gtk escriu les seves pròpies rampes: cap transició del motor natiu ha de continuar
+        self.gamma_transition.cancel()
+        self.gamma_engine.invalidate()
+        with tracer.span("popen", process=REDSHIFT_GTK_PROCESS_NAME):
+            proc = self.redshift_supervisor.start()
+        self.oneshot_tint = False
+        with tracer.span("wait_until_ready") as span:
+            ready = wait_until_ready(proc, self._redshift_started, REDSHIFT_START_TIMEOUT)
+            span.set(ready=bool(ready))
+        self.process_scanner.invalidate()
+        return ready
+
+    def _redshift_started(self):
+        self.process_scanner.invalidate()
+        return self.process_scanner.is_running(REDSHIFT_PROCESS_NAME)
+
+    def on_redshift_exit(self, returncode, restart_delay):
+        """Avís del supervisor (des del seu fil) quan el redshift-gtk que hem iniciat surt."""
+        self.process_scanner.invalidate()
+        if restart_delay is None:
+            print(f"{REDSHIFT_GTK_PROCESS_NAME} ha sortit (codi {returncode}).")
+        else:
+            self.set_status(f"{REDSHIFT_GTK_PROCESS_NAME} s'ha aturat inesperadament (codi {returncode}). "
+                            f"Es reiniciarà d'aquí a {restart_delay:.0f} s.")
+
+    @traced()
+    def quit_redshift(self, silent=False):
+        if not silent: self.set_status("Tancant Redshift...")
+        print("Intentant tancar tots els processos de Redshift...")
+        try:
+            # Els supervivents de terminate_processes diuen si tots han sortit, sense tornar a recórrer /proc
+            if self.kill_redshift_processes():
+                if not silent: self.set_status("Redshift tancat.")
+                print("Tots els processos de Redshift s'han tancat.")
+                if not silent: self.show_dialog(DIALOG_INFO, "Redshift", "S'han tancat els processos de Redshift.")
+                return True
+            else:
+                if not silent: self.set_status("Error: Redshift encara s'està executant.")
+                print("Avís: Un o més processos de Redshift encara podrien estar executant-se.")
+                if not silent: self.show_dialog(DIALOG_WARNING, "Redshift", "No s'han pogut tancar tots els processos de Redshift.")
+                return False
+        except Exception as e:
+            error_msg = f"Un error ha ocorregut en intentar tancar Redshift:\n{e}"
+            if not silent: 
+                self.set_status(f"Error en tancar Redshift: {e}")
+                self.show_dialog(DIALOG_ERROR, "Error", error_msg)
+            else: 
+                print(error_msg)
+            return False
+
+    @traced()
+    def ensure_redshift_gtk_running(self, is_initial_start=False, silent=False):
+        if not silent: self.set_status("Comprovant/Iniciant Redshift...")
+        
+        if is_initial_start and not os.path.exists(CONFIG_FILE_PATH_REDSHIFT):
+            print(f"El fitxer de configuració {CONFIG_FILE_PATH_REDSHIFT} no existeix. Creant un de bàsic.")
+            self.write_redshift_config_direct(DEFAULT_REDSHIFT_TEMP, DEFAULT_REDSHIFT_BRIGHTNESS, silent=True)
+
+        if not self.is_process_running(REDSHIFT_GTK_PROCESS_NAME):
+            print(f"No s'ha trobat {REDSHIFT_GTK_PROCESS_NAME} en execució. S'intentarà iniciar.")
+            try:
+                self.spawn_redshift_gtk()
+                if self.is_process_running(REDSHIFT_GTK_PROCESS_NAME):
+                    if not silent: self.set_status(f"{REDSHIFT_GTK_PROCESS_NAME} iniciat.")
+                    print(f"{REDSHIFT_GTK_PROCESS_NAME} iniciat correctament.")
+                else: 
+                    if not silent: self.set_status(f"Error en iniciar {REDSHIFT_GTK_PROCESS_NAME}.")
+                    print(f"Sembla que {REDSHIFT_GTK_PROCESS_NAME} no s'ha iniciat correctament.")
+            except Exception as e:
+                error_msg = f"No s'ha pogut iniciar {REDSHIFT_GTK_PROCESS_NAME}:\n{e}"
+                if not silent: 
+                    self.set_status(f"Excepció en iniciar Redshift: {e}")
+                    self.show_dialog(DIALOG_ERROR, "Error", error_msg)
+                else: print(error_msg)
+        else: 
+             if not silent: self.set_status(f"{REDSHIFT_GTK_PROCESS_NAME} ja s'està executant.")
+             print(f"{REDSHIFT_GTK_PROCESS_NAME} ja s'està executant.")
+
+    @traced()
+    def restart_redshift_process(self, silent=False):
+        if not silent: self.set_status("Reiniciant Redshift...")
+        print("Intentant reiniciar processos Redshift...")
+        try:
+            self.kill_redshift_processes()
+            self.spawn_redshift_gtk()
+            if self.is_process_running(REDSHIFT_GTK_PROCESS_NAME):
+                if not silent: self.set_status("Redshift reiniciat.")
+                print(f"{REDSHIFT_GTK_PROCESS_NAME} reiniciat correctament.")
+            else:
+                if not silent: self.set_status(f"Error en reiniciar {REDSHIFT_GTK_PROCESS_NAME}.")
+                print(f"Sembla que {REDSHIFT_GTK_PROCESS_NAME} no s'ha reiniciat correctament.")
+        except Exception as e:
+            error_msg = f"No s'ha pogut reiniciar Redshift:\n{e}"
+            if not silent: 
+                self.set_status(f"Excepció en reiniciar Redshift: {e}")
+                self.show_dialog(DIALOG_ERROR, "Error reiniciant Redshift", error_msg)
+            else: print(error_msg)
+
+    @traced()
+    def apply_and_restart_redshift_manually(self, new_temp=None, new_brightness=None): 
+        self.set_status("Aplicant ajustaments manuals de Redshift...")
+        # La interfície llegeix els valors dels sliders al fil de Tk; sense valors, es reutilitzen els actuals
+        if new_temp is None: new_temp = self.current_temp_val
+        if new_brightness is None: new_brightness = self.current_brightness_val
+        if not self.uses_native_backend() and redshift_config_is_current(CONFIG_FILE_PATH_REDSHIFT, new_temp, new_brightness):
+            # Res a escriure: només cal reiniciar si redshift-gtk no s'està executant
+            if self.is_process_running(REDSHIFT_GTK_PROCESS_NAME):
+                # Redshift torna de seguida als valors desats, en lloc d'esperar que acabi la previsualització
+                self.resume_redshift()
+                self.set_status("Els ajustaments de Redshift no han canviat; no cal reiniciar.")
+                print("Configuració Redshift sense canvis; s'omet el reinici.")
+            else:
+                self.ensure_redshift_gtk_running(silent=False)
+            return
+        if not self.write_redshift_config_direct(new_temp, new_brightness, silent=False): 
+            self.set_status("Error en guardar la config de Redshift.")
+            return
+        if self.uses_native_backend():
+            if self.apply_native_gamma(new_temp, new_brightness, silent=False):
+                self.set_status("Ajustaments aplicats amb el motor natiu.")
+            return
+        self.restart_redshift_process(silent=False)
+
+    @traced()
+    def apply_mate_theme_direct(self, gtk_theme_name, window_theme_name, silent=False):
+        """Aplica el tema GTK i el de Marco; amb `window_theme_name` a None només el GTK."""
+        if not silent: self.set_status(f"Aplicant tema {gtk_theme_name}...")
+        print(f"Intentant aplicar tema GTK: {gtk_theme_name}, Tema Finestra: {window_theme_name}")
+        gtk_key = GTK_THEME_KEY
+        marco_key = MARCO_THEME_KEY
+        changes = [gtk_key + (gtk_theme_name,)]
+        if window_theme_name is not None:
+            changes.append(marco_key + (window_theme_name,))
+        try:
+            with tracer.span("settings_write"):
+                results = self.settings_backend.write(changes)
+        except Exception as e:
+            results = {gtk_key: e, marco_key: e}
+        e_gtk = results.get(gtk_key)
+        e_marco = results.get(marco_key)
+        success_gtk = e_gtk is None
+        success_marco = e_marco is None
+        if not success_gtk:
+            print(f"Error aplicant tema GTK {gtk_theme_name}: {e_gtk}")
+            if not silent: self.show_dialog(DIALOG_ERROR, "Error Tema GTK", f"No s'ha pogut aplicar el tema GTK {gtk_theme_name}.\nError: {e_gtk}")
+        if not success_marco:
+            print(f"Error aplicant tema Marco {window_theme_name}: {e_marco}")
+            if not silent : 
+                 self.show_dialog(DIALOG_WARNING, "Avís Tema Marco", f"No s'ha pogut aplicar el tema de finestra {window_theme_name}.\nError: {e_marco}")
+        if success_gtk and success_marco:
+            if not silent: self.set_status(f"Tema {gtk_theme_name} aplicat.")
+            if not silent: self.show_dialog(DIALOG_INFO, "Tema Canviat", f"S'ha intentat aplicar el tema {gtk_theme_name}.")
+            print("Temes aplicats.")
+        elif not silent :
+             self.set_status(f"Problemes en aplicar tema {gtk_theme_name}.")
+        return success_gtk and success_marco
+
+    @traced()
+    def load_initial_redshift_config(self):
+        if not os.path.exists(CONFIG_FILE_PATH_REDSHIFT):
+            print(f"Avís: {CONFIG_FILE_PATH_REDSHIFT} no existeix. S'usaran valors per defecte.")
+            self.current_temp_val = DEFAULT_REDSHIFT_TEMP
+            self.current_brightness_val = DEFAULT_REDSHIFT_BRIGHTNESS
+            return
+        config_reader = configparser.ConfigParser()
+        try:
+            config_reader.optionxform = str 
+            config_reader.read(CONFIG_FILE_PATH_REDSHIFT)
+            if config_reader.has_section('redshift'):
+                self.current_temp_val = config_reader.getint('redshift', 'temp-night', fallback=DEFAULT_REDSHIFT_TEMP)
+                self.current_brightness_val = config_reader.getfloat('redshift', 'brightness-night', fallback=DEFAULT_REDSHIFT_BRIGHTNESS)
+            else: 
+                print(f"Secció [redshift] no trobada a {CONFIG_FILE_PATH_REDSHIFT}. Valors per defecte.")
+                self.current_temp_val = DEFAULT_REDSHIFT_TEMP
+                self.current_brightness_val = DEFAULT_REDSHIFT_BRIGHTNESS
+        except Exception as e:
+            print(f"Error llegint {CONFIG_FILE_PATH_REDSHIFT}: {e}. Valors per defecte.")
+            self.current_temp_val = DEFAULT_REDSHIFT_TEMP
+            self.current_brightness_val = DEFAULT_REDSHIFT_BRIGHTNESS
+
+    @traced()
+    def write_redshift_config_direct(self, temp, brightness, silent=False):
+        brightness_str = f"{float(brightness):.2f}"
+        temp_str = str(int(temp))
+        try:
+            # Escriptura atòmica; si el contingut no canvia, el fitxer no es toca
+            if write_redshift_config(CONFIG_FILE_PATH_REDSHIFT, temp, brightness):
+                print(f"Configuració Redshift guardada (Temp: {temp_str}K, Bright: {brightness_str})")
+            else:
+                print(f"Configuració Redshift sense canvis (Temp: {temp_str}K, Bright: {brightness_str})")
+            if not silent:
+                 self.show_dialog(DIALOG_INFO, "Configuració Redshift", f"Configuració de Redshift guardada.")
+            return True
+        except Exception as e:
+            error_msg = f"No s'ha pogut guardar la config de Redshift: {e}"
+            if not silent: self.show_dialog(DIALOG_ERROR, "Error guardant config Redshift", error_msg)
+            else: print(error_msg)
+            return False
@@ -0,0 +1,125 @@
+"""Transicions suaus de temperatura i brillantor per al motor de color natiu.
+
+Un fil propi aplica passos intermedis a ritme constant (terminis absoluts des
+de l'inici, de manera que els retards no s'acumulen). El nombre de passos és
+el menor entre el que permet TRANSITION_FPS i el que cal perquè cada pas sigui
+un canvi apreciable (MIN_TEMP_STEP, MIN_BRIGHTNESS_STEP); així una transició
+llarga no recalcula rampes que no es veurien diferents.
+
+Si arriba una transició nova mentre n'hi ha una en curs, la nova parteix del
+valor que hi ha a la pantalla en aquell moment (sense salts). `cancel` la
+deixa on és.
+"""
+import math
+import threading
+import time
+
+# Passos per segon com a màxim
+TRANSITION_FPS = 20
+# Canvi mínim entre dos passos consecutius
+MIN_TEMP_STEP = 10
+MIN_BRIGHTNESS_STEP = 0.005
+
+
+def _ease(fraction):
+    """Corba suau (smoothstep): comença i acaba a poc a poc."""
+    return fraction * fraction * (3 - 2 * fraction)
+
+
+class _Fade:
+    def __init__(self, origin, target, duration, fps):
+        self.origin = origin
+        self.target = target
+        self.t0 = time.monotonic()
+        perceptible_steps = max(abs(target[0] - origin[0]) / MIN_TEMP_STEP,
+                                abs(target[1] - origin[1]) / MIN_BRIGHTNESS_STEP)
+        self.steps = max(1, min(int(duration * fps), math.ceil(perceptible_steps)))
+        self.interval = duration / self.steps
+        self.next_step = 1
+
+    def values(self, step):
+        fraction = _ease(step / self.steps)
+        return tuple(o + (t - o) * fraction for o, t in zip(self.origin, self.target))
+
+
+class GammaTransition:
+    def __init__(self, apply_fn, fps=TRANSITION_FPS):
+        """`apply_fn(temp, brightness)` s'executa al fil de la transició."""
+        self._apply = apply_fn
+        self.fps = fps
+        self._cond = threading.Condition()
+        # Garanteix que després de cancel() no s'aplica cap pas més
+        self._apply_lock = threading.Lock()
+        self._fade = None
+        self._generation = 0
+        self._thread = None
+        # Últims valors (temp, brillantor) aplicats per la transició
+        self.current = None
+
+    @property
+    def running(self):
+        return self._fade is not None
+
+    def start(self, origin, target, duration):
+        """Comença una transició cap a `target`; si n'hi ha una en curs, parteix del valor actual."""
+        target = (float(target[0]), float(target[1]))
+        with self._cond:
+            if self._fade is not None and self.current is not None:
+                origin = self.current
+            origin = (float(origin[0]), float(origin[1]))
+            self._fade = _Fade(origin, target, duration, self.fps)
+            self._generation += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="gamma-transition", daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+
+    def cancel(self):
+        """Atura la transició en curs i espera que acabi el pas que s'estigui aplicant."""
+        with self._cond:
+            if self._fade is None:
+                return
+            self._fade = None
+            self._generation += 1
+            self._cond.notify_all()
+        with self._apply_lock:
+            pass
+
+    def wait(self, timeout=None):
+        """Espera que acabi la transició en curs. Retorna False si s'ha esgotat el temps."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._fade is None, timeout)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                fade = self._fade
+                if fade is None:
+                    self._cond.wait()
+                    continue
+                now = time.monotonic()
+                deadline = fade.t0 + fade.next_step * fade.interval
+                if now < deadline:
+                    self._cond.wait(deadline - now)
+                    continue
+                # Si el fil s'ha endarrerit, salta al pas que toca en lloc d'aplicar-los tots
+                step = min(fade.steps, max(fade.next_step, int((now - fade.t0) / fade.interval)))
+                fade.next_step = step + 1
+                values = fade.values(step)
+                generation = self._generation
+            with self._apply_lock:
+                if generation != self._generation:
+                    continue
+                try:
+                    self._apply(*values)
+                    self.current = values
+                    error = None
+                except Exception as e:
+                    error = e
+            if error is not None:
+                print(f"Transició de color interrompuda: {error}")
+            if error is not None or step >= fade.steps:
+                with self._cond:
+                    if generation == self._generation:
+                        self._fade = None
+                        self._cond.notify_all()
@@ -0,0 +1,198 @@
+"""Descoberta de temes amb un índex persistent validat per mtime/inode.
+
+L'índex guarda la signatura de l'arrel (mtime, inode, dispositiu) i el mtime de
+cada directori de tema. Si la signatura de l'arrel coincideix, es reutilitza tot
+sense llegir cap subdirectori. Si només n'ha canviat el mtime, es tornen a llegir
+els temes el mtime dels quals ha canviat. Un tema modificat al seu lloc (p.ex.
+s'hi afegeix metacity-1) no canvia el mtime de l'arrel: l'índex no el veu fins al
+següent canvi a l'arrel, però mentre l'aplicació és oberta el vigilant de temes
+(theme_watcher) sí que el detecta.
+
+De cada tema es desa què conté, en forma compacta: [capacitats, tema Marco],
+on `capacitats` és una combinació de bits THEME_* i `tema Marco` és el
+MetacityTheme del metatema (index.theme), o None. Amb això es fan les llistes
+separades de temes GTK (gtk-3.0) i de vora de finestra (metacity-1).
+"""
+import configparser
+import json
+import os
+
+THEME_INDEX_VERSION = 3
+
+# Capacitats d'un tema (bits)
+THEME_GTK2 = 1
+THEME_GTK3 = 2
+THEME_METACITY = 4
+THEME_INDEX = 8
+# Variant fosca: gtk-3.0/gtk-dark.css o un nom que ho diu (p.ex. Ambiant-MATE-Dark)
+THEME_DARK = 16
+
+_DIR_CAPABILITIES = {"gtk-2.0": THEME_GTK2, "gtk-3.0": THEME_GTK3, "metacity-1": THEME_METACITY}
+METATHEME_SECTION = "X-GNOME-Metatheme"
+
+
+def _metatheme_window_theme(index_path):
+    """MetacityTheme declarat a index.theme, o None."""
+    parser = configparser.ConfigParser(interpolation=None, strict=False)
+    try:
+        parser.read(index_path, encoding="utf-8")
+    except (configparser.Error, UnicodeDecodeError):
+        return None
+    return parser.get(METATHEME_SECTION, "MetacityTheme", fallback=None) or None
+
+
+def scan_theme_dir(theme_dir):
+    """Capacitats d'un directori de tema amb una sola passada os.scandir: [capacitats, tema Marco]."""
+    capabilities = 0
+    window_theme = None
+    try:
+        with os.scandir(theme_dir) as entries:
+            for entry in entries:
+                flag = _DIR_CAPABILITIES.get(entry.name)
+                if flag is not None and entry.is_dir():
+                    capabilities |= flag
+                elif entry.name == "index.theme" and entry.is_file():
+                    capabilities |= THEME_INDEX
+                    window_theme = _metatheme_window_theme(entry.path)
+    except OSError:
+        return [0, None]
+    if capabilities & THEME_GTK3 and os.path.isfile(os.path.join(theme_dir, "gtk-3.0", "gtk-dark.css")):
+        capabilities |= THEME_DARK
+    if "dark" in os.path.basename(theme_dir).lower():
+        capabilities |= THEME_DARK
+    return [capabilities, window_theme]
+
+
+def is_theme(info):
+    """Un tema és vàlid si té gtk-3.0, metacity-1 o un fitxer index.theme."""
+    return bool(info[0] & (THEME_GTK3 | THEME_METACITY | THEME_INDEX))
+
+
+def _theme_dir_mtimes(path):
+    """{nom: mtime_ns} de cada subdirectori d'una arrel de temes (p.ex. /usr/share/themes)."""
+    mtimes = {}
+    with os.scandir(path) as entries:
+        for entry in entries:
+            try:
+                if entry.is_dir():
+                    mtimes[entry.name] = entry.stat().st_mtime_ns
+            except OSError:
+                continue
+    return mtimes
+
+
+def scan_theme_root(path, dir_mtimes, cached_dirs=None, cached_themes=None):
+    """Índex {tema: [capacitats, tema Marco]} dels temes vàlids de l'arrel `path`.
+
+    Els directoris amb el mateix mtime que a `cached_dirs` no es tornen a llegir:
+    es reutilitza el que en diu `cached_themes` (o no són temes, si no hi surten).
+    """
+    cached_dirs = cached_dirs or {}
+    cached_themes = cached_themes or {}
+    themes = {}
+    for name, mtime in dir_mtimes.items():
+        if cached_dirs.get(name) == mtime:
+            if name in cached_themes:
+                themes[name] = cached_themes[name]
+            continue
+        info = scan_theme_dir(os.path.join(path, name))
+        if is_theme(info):
+            themes[name] = info
+    return themes
+
+
+def merge_theme_roots(themes_by_root):
+    """Uneix els índexs de cada arrel; les arrels posteriors (p.ex. ~/.themes) tenen prioritat."""
+    themes = {}
+    for root_themes in themes_by_root.values():
+        themes.update(root_themes)
+    return themes
+
+
+def gtk_theme_names(themes):
+    return sorted(name for name, info in themes.items() if info[0] & THEME_GTK3)
+
+
+def window_theme_names(themes):
+    return sorted(name for name, info in themes.items() if info[0] & THEME_METACITY)
+
+
+def window_theme_for(themes, gtk_theme):
+    """Tema Marco que correspon a `gtk_theme`: el del metatema, el del mateix nom o None."""
+    info = themes.get(gtk_theme)
+    if info is None:
+        return None
+    declared = info[1]
+    if declared and declared in themes and themes[declared][0] & THEME_METACITY:
+        return declared
+    if info[0] & THEME_METACITY:
+        return gtk_theme
+    return None
+
+
+def _root_signature(path):
+    st = os.stat(path)
+    return {"mtime_ns": st.st_mtime_ns, "ino": st.st_ino, "dev": st.st_dev}
+
+
+def load_theme_index(index_path):
+    try:
+        with open(index_path, encoding="utf-8") as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(index, dict) or index.get("version") != THEME_INDEX_VERSION:
+        return {}
+    roots = index.get("roots")
+    return roots if isinstance(roots, dict) else {}
+
+
+def save_theme_index(index_path, roots):
+    tmp_path = f"{index_path}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": THEME_INDEX_VERSION, "roots": roots}, f)
+        os.replace(tmp_path, index_path)
+    except OSError as e:
+        print(f"No s'ha pogut desar l'índex de temes a {index_path}: {e}")
+
+
+def find_themes_by_root(theme_paths, index_path=None):
+    """Retorna {arrel: {tema: [capacitats, tema Marco]}} per a cada arrel existent de `theme_paths`.
+
+    Amb `index_path`, una arrel amb el mateix mtime, inode i dispositiu que a l'índex
+    desat es reutilitza sencera amb un sol os.stat. Si n'ha canviat el mtime, es
+    llegeixen els mtimes dels seus directoris de tema i només es tornen a escanejar
+    els que han canviat (o tota l'arrel, si n'ha canviat l'inode o el dispositiu).
+    Els canvis fets dins d'un tema existent, que no toquen el mtime de l'arrel, no
+    es recullen fins al següent canvi a l'arrel.
+    """
+    cached_roots = load_theme_index(index_path) if index_path else {}
+    roots = {}
+    changed = False
+    for path in theme_paths:
+        try:
+            signature = _root_signature(path)
+        except OSError:
+            # L'arrel no existeix (p.ex. ~/.themes en un usuari nou)
+            changed = changed or path in cached_roots
+            continue
+        entry = cached_roots.get(path) or {}
+        if all(entry.get(key) == value for key, value in signature.items()) and "themes" in entry:
+            # Arrel intacta: ni s'hi ha afegit, tret o canviat el nom de cap tema
+            roots[path] = entry
+            continue
+        try:
+            dir_mtimes = _theme_dir_mtimes(path)
+        except OSError as e:
+            print(f"Error llegint temes de {path}: {e}")
+            continue
+        if entry.get("ino") != signature["ino"] or entry.get("dev") != signature["dev"]:
+            # Directori arrel nou o substituït: no es pot reutilitzar res
+            entry = {}
+        root_themes = scan_theme_root(path, dir_mtimes, entry.get("dirs"), entry.get("themes"))
+        changed = True
+        roots[path] = dict(signature, dirs=dir_mtimes, themes=root_themes)
+    if index_path and changed:
+        save_theme_index(index_path, roots)
+    return {path: entry["themes"] for path, entry in roots.items()}
@@ -0,0 +1,79 @@
+"""Comparació entre l'estat actual de l'escriptori i el mode Sol/Lluna demanat.
+
+Només es decideix què cal fer; l'execució de les accions la fa qui crida.
+"""
+from collections import namedtuple
+
+# Estat llegit de l'escriptori. `gamma` és (temp, brillantor) de l'última aplicació
+# del motor natiu, o None si és desconegut; `tinted` és cert si a la pantalla hi ha un
+# color d'un sol cop (`redshift -P -O`) que cap Redshift en marxa no desfarà. Un tema a
+# None vol dir "desconegut".
+DesktopState = namedtuple("DesktopState", "gtk_theme window_theme redshift_gtk_pids redshift_pids gamma tinted")
+
+# Estat desitjat. `gamma` és None quan el color el gestiona redshift-gtk; `window_theme`
+# és None quan el tema GTK no té cap tema de Marco i la vora no s'ha de canviar.
+DesiredState = namedtuple("DesiredState", "mode gtk_theme window_theme redshift_running gamma")
+
+ACTION_STOP_REDSHIFT = "stop_redshift"
+ACTION_START_REDSHIFT = "start_redshift"
+ACTION_APPLY_GAMMA = "apply_gamma"
+ACTION_RESET_GAMMA = "reset_gamma"
+ACTION_APPLY_THEME = "apply_theme"
+
+# Accions que han d'esperar que n'acabin d'altres; la resta poden anar en paral·lel.
+# Redshift restaura la gamma original en sortir, per això les rampes s'apliquen després d'aturar-lo.
+ACTION_DEPENDENCIES = {
+    ACTION_APPLY_GAMMA: (ACTION_STOP_REDSHIFT,),
+    ACTION_RESET_GAMMA: (ACTION_STOP_REDSHIFT,),
+}
+
+# Descripció de cada acció per al missatge d'estat quan falla
+ACTION_FAILURE_MESSAGES = {
+    ACTION_STOP_REDSHIFT: "no s'ha pogut aturar Redshift",
+    ACTION_START_REDSHIFT: "no s'ha pogut iniciar Redshift",
+    ACTION_APPLY_GAMMA: "no s'ha pogut aplicar la gamma",
+    ACTION_RESET_GAMMA: "no s'han pogut restablir els colors",
+    ACTION_APPLY_THEME: "no s'ha pogut aplicar el tema",
+}
+
+
+def normalize_gamma(temp, brightness):
+    return (int(temp), round(float(brightness), 2))
+
+
+def plan_actions(current, desired):
+    """Retorna (accions, omeses): les accions a executar i què ja estava al dia.
+
+    L'ordre de les accions és un ordre vàlid d'execució en sèrie; ACTION_DEPENDENCIES
+    diu quines es poden fer alhora.
+    """
+    actions = []
+    skipped = []
+
+    if desired.redshift_running:
+        if current.redshift_gtk_pids:
+            skipped.append("Redshift ja estava actiu")
+        else:
+            actions.append(ACTION_START_REDSHIFT)
+    elif current.redshift_gtk_pids or current.redshift_pids:
+        actions.append(ACTION_STOP_REDSHIFT)
+    else:
+        skipped.append("Redshift ja estava aturat")
+
+    if desired.gamma is not None:
+        if current.gamma == normalize_gamma(*desired.gamma):
+            skipped.append("la gamma ja estava aplicada")
+        else:
+            actions.append(ACTION_APPLY_GAMMA)
+    elif not desired.redshift_running and current.tinted:
+        # Sense Redshift ni motor natiu, ningú més no treuria el color d'un preajust o d'una previsualització
+        actions.append(ACTION_RESET_GAMMA)
+
+    # Sense tema de finestra desitjat (None) la vora de les finestres no es toca
+    window_ok = desired.window_theme is None or current.window_theme == desired.window_theme
+    if current.gtk_theme == desired.gtk_theme and window_ok:
+        skipped.append(f"el tema {desired.gtk_theme} ja estava aplicat")
+    else:
+        actions.append(ACTION_APPLY_THEME)
+
+    return actions, skipped
@@ -0,0 +1,80 @@
+"""Biblioteca de preajustos amb nom: temperatura, brillantor, gamma i (opcionalment) tema.
+
+Els preajustos es desen a presets.ini, una secció per preajust:
+
+    [Lectura]
+    temperatura = 4500
+    brillantor = 0.90
+    gamma = 1:1:1
+    tema =
+    finestra =
+
+`tema` buit vol dir que el preajust no canvia el tema de l'escriptori; `finestra`
+buit, el tema de vora que correspon a `tema`. Si el fitxer no existeix es fan
+servir DEFAULT_PRESETS.
+"""
+import configparser
+from collections import namedtuple
+
+from redshift_config import atomic_write_text, format_gamma, parse_gamma
+from xrandr_gamma import MAX_TEMP, MIN_TEMP, NEUTRAL_GAMMA
+
+Preset = namedtuple("Preset", "name temp brightness gamma gtk_theme window_theme")
+
+DEFAULT_PRESETS = (
+    Preset("Lectura", 4500, 0.9, NEUTRAL_GAMMA, "", ""),
+    Preset("Nit tardana", 3000, 0.7, NEUTRAL_GAMMA, "", ""),
+    Preset("Fotografia", 6500, 1.0, NEUTRAL_GAMMA, "", ""),
+)
+
+
+def make_preset(name, temp, brightness, gamma=NEUTRAL_GAMMA, gtk_theme="", window_theme=""):
+    """Preajust amb els valors dins dels límits que accepten Redshift i el motor natiu."""
+    return Preset(name.strip(), min(max(int(temp), MIN_TEMP), MAX_TEMP),
+                  round(min(max(float(brightness), 0.1), 1.0), 2), tuple(gamma),
+                  gtk_theme or "", window_theme or "")
+
+
+def load_presets(path):
+    """{nom: Preset} en l'ordre del fitxer, o els preajustos per defecte si no existeix."""
+    config = configparser.ConfigParser(interpolation=None)
+    config.optionxform = str
+    try:
+        with open(path, encoding='utf-8') as f:
+            config.read_file(f)
+    except FileNotFoundError:
+        return {preset.name: preset for preset in DEFAULT_PRESETS}
+    except (OSError, configparser.Error, UnicodeDecodeError) as e:
+        print(f"Error llegint els preajustos de {path}: {e}")
+        return {preset.name: preset for preset in DEFAULT_PRESETS}
+    presets = {}
+    for name in config.sections():
+        section = config[name]
+        try:
+            preset = make_preset(name, section.getint('temperatura'), section.getfloat('brillantor', 1.0),
+                                 parse_gamma(section.get('gamma', "1")), section.get('tema', ""),
+                                 section.get('finestra', ""))
+        except (TypeError, ValueError) as e:
+            print(f"Preajust {name} no vàlid a {path}: {e}")
+            continue
+        presets[preset.name] = preset
+    return presets
+
+
+def save_presets(path, presets):
+    lines = []
+    for preset in presets.values():
+        lines += [f"[{preset.name}]",
+                  f"temperatura = {preset.temp}",
+                  f"brillantor = {preset.brightness:.2f}",
+                  f"gamma = {format_gamma(preset.gamma)}",
+                  f"tema = {preset.gtk_theme}",
+                  f"finestra = {preset.window_theme}",
+                  ""]
+    atomic_write_text(path, "\n".join(lines))
+
+
+def redshift_command(preset, redshift="redshift"):
+    """Ordre de Redshift d'un sol cop (-P -O) que aplica el color del preajust."""
+    return [redshift, "-P", "-O", str(preset.temp), "-b", f"{preset.brightness:.2f}",
+            "-g", format_gamma(preset.gamma)]
@@ -0,0 +1,96 @@
+"""Generació i escriptura atòmica de ~/.config/redshift.conf."""
+import os
+import tempfile
+
+
+def render_redshift_config(temp, brightness):
+    """Contingut de redshift.conf per a una temperatura fixa (dia = nit, sense transició)."""
+    brightness_str = f"{float(brightness):.2f}"
+    temp_str = str(int(temp))
+    return f"""[redshift]
+temp-day={temp_str}
+temp-night={temp_str}
+brightness-day={brightness_str}
+brightness-night={brightness_str}
+transition=0
+location-provider=manual
+adjustment-method=randr
+[manual]
+lat=0
+lon=0
+"""
+
+
+def parse_gamma(text):
+    """'0.9:1.0:0.8' (o un sol valor per als tres canals) -> (r, g, b), com a redshift.conf."""
+    values = tuple(float(v) for v in text.replace(",", ":").split(":"))
+    if len(values) == 1:
+        values = values * 3
+    if len(values) != 3 or not all(v > 0 for v in values):
+        raise ValueError(f"Gamma no vàlida: {text}")
+    return values
+
+
+def format_gamma(gamma):
+    return ":".join(f"{float(v):g}" for v in gamma)
+
+
+def read_file_text(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return f.read()
+    except (OSError, UnicodeDecodeError):
+        return None
+
+
+def redshift_config_is_current(path, temp, brightness):
+    """Cert si `path` ja conté exactament la configuració per a aquests valors."""
+    return read_file_text(path) == render_redshift_config(temp, brightness)
+
+
+def atomic_write_text(path, content):
+    """Escriu `content` a `path` sense que mai es pugui llegir un fitxer a mitges.
+
+    Es fa en un fitxer temporal del mateix directori, amb fsync, i després
+    es reanomena sobre el fitxer final.
+    """
+    # Si el fitxer és un enllaç simbòlic (p.ex. dotfiles), s'escriu el destí real
+    path = os.path.realpath(path)
+    directory = os.path.dirname(path)
+    try:
+        mode = os.stat(path).st_mode & 0o777
+    except OSError:
+        mode = 0o644
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", dir=directory)
+    try:
+        # mkstemp crea el fitxer amb 0600; es conserven els permisos de l'original
+        os.fchmod(fd, mode)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    # Assegura que el canvi de nom també arriba al disc
+    try:
+        dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    except OSError:
+        return
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+
+
+def write_redshift_config(path, temp, brightness):
+    """Escriu la configuració només si ha canviat. Retorna True si s'ha escrit."""
+    content = render_redshift_config(temp, brightness)
+    if read_file_text(path) == content:
+        return False
+    atomic_write_text(path, content)
+    return True
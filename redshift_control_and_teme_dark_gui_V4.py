@@ -1,69 +1,66 @@
 #!/usr/bin/env python3
 import tkinter as tk
 from tkinter import ttk, messagebox
-import os
-import configparser
-import subprocess
+import argparse
+import bisect
+import sys
+import threading
 import time
 
-# --- Constants Globals ---
-CONFIG_FILE_PATH_REDSHIFT = os.path.expanduser("~/.config/redshift.conf")
-# Fitxer per desar les preferències d'aquesta aplicació (temes seleccionats per Sol/Lluna)
-APP_PREFS_DIR = os.path.expanduser("~/.config/control_pantalla_mate")
-APP_PREFS_FILE = os.path.join(APP_PREFS_DIR, "prefs.ini")
-
-REDSHIFT_GTK_PROCESS_NAME = "redshift-gtk"
-REDSHIFT_PROCESS_NAME = "redshift"
-
-# Noms de temes per defecte si no hi ha preferències desades
-DEFAULT_THEME_LLUNA = "Ambiant-MATE-Dark"
-DEFAULT_THEME_SOL = "Ambiant-MATE"
-
-# Valors de Redshift per defecte si redshift.conf no existeix o per als sliders
-DEFAULT_REDSHIFT_TEMP = 4500
-DEFAULT_REDSHIFT_BRIGHTNESS = 0.8
-# Valors per al mode Sol si Redshift es posa en neutre en lloc de tancar-se
-REDSHIFT_TEMP_SOL_NEUTRE = 6500
-REDSHIFT_BRIGHTNESS_SOL_NEUTRE = 1.0
-
-
-def get_installed_gtk_themes():
-    """Detecta els temes GTK instal·lats al sistema i a l'usuari."""
-    themes = set()
-    theme_paths = [
-        "/usr/share/themes",
-        os.path.expanduser("~/.themes")
-    ]
-    for path in theme_paths:
-        if os.path.isdir(path):
-            try:
-                for theme_name in os.listdir(path):
-                    # Comprovar si és un tema GTK vàlid (p.ex., té gtk-3.0 o index.theme)
-                    # Una comprovació més robusta podria mirar el fitxer index.theme
-                    if os.path.isdir(os.path.join(path, theme_name, "gtk-3.0")) or \
-                       os.path.isfile(os.path.join(path, theme_name, "index.theme")):
-                        themes.add(theme_name)
-            except OSError as e:
-                print(f"Error llegint temes de {path}: {e}")
-    
-    # Si les llistes per defecte no estan, afegir-les per si de cas
-    if DEFAULT_THEME_LLUNA not in themes: themes.add(DEFAULT_THEME_LLUNA)
-    if DEFAULT_THEME_SOL not in themes: themes.add(DEFAULT_THEME_SOL)
-    
-    return sorted(list(themes))
-
-
-class RedshiftControlApp:
+from display_controller import (COLOR_BACKENDS, DEFAULT_THEME_LLUNA, DEFAULT_THEME_SOL, DIALOG_ERROR,
+                                DIALOG_INFO, DIALOG_WARNING, MAX_TRANSITION_DURATION, SOLAR_TABLE_FILE, THEME_PATHS,
+                                DisplayController, get_installed_gtk_themes, get_installed_window_themes)
+from control_client import encode_message, read_message
+from gtk_themes import THEME_GTK3, THEME_METACITY
+from single_instance import SingleInstance
+from solar_schedule import SolarScheduler
+from task_runner import TaskRunner
+from theme_watcher import ThemeWatcher
+
+# Text dels desplegables mentre encara es busquen els temes instal·lats
+LOADING_PLACEHOLDER = "Carregant temes..."
+# Primera opció dels desplegables de vora de finestra: el tema Marco que correspon al tema GTK
+WINDOW_THEME_AUTO = "Automàtic (segons el tema)"
+# Espera (ms) des de l'últim moviment d'un slider fins a aplicar la previsualització
+PREVIEW_DEBOUNCE_MS = 80
+# Funció de messagebox per a cada tipus de diàleg de DisplayController.show_dialog
+DIALOG_FUNCTIONS = {
+    DIALOG_INFO: messagebox.showinfo,
+    DIALOG_WARNING: messagebox.showwarning,
+    DIALOG_ERROR: messagebox.showerror,
+}
+# Ordres que una segona execució pot enviar a la finestra ja oberta
+INSTANCE_COMMANDS = ("mostra", "sol", "lluna")
+# Temps màxim per llegir l'ordre d'una altra instància (es llegeix al fil de Tk)
+INSTANCE_READ_TIMEOUT = 0.5
+# Segons de retard a partir dels quals un canvi automàtic es considera perdut (p.ex. després de suspendre)
+SOLAR_EVENT_LATE_S = 60
+
+
+class RedshiftControlApp(DisplayController):
     def __init__(self, master):
+        DisplayController.__init__(self)
+        self.suspend_redshift_on_preview = True
+        self.startup_t0 = time.perf_counter()
+        # Mil·lisegons des de l'inici de __init__ fins a cada etapa de l'arrencada
+        self.startup_timings = {}
         self.master = master
         master.title("Control Ràpid de Pantalla")
-        master.geometry("380x500") # Ajustem mida per als nous desplegables
-
-        # Crear directori de preferències si no existeix
-        os.makedirs(APP_PREFS_DIR, exist_ok=True)
-
-        self.all_installed_themes = get_installed_gtk_themes()
-        self.load_app_preferences() # Carrega temes preferits per Sol/Lluna
+        master.geometry("380x930") # Ajustem mida per als nous desplegables i la programació
+
+        # Tota la feina amb subprocessos i esperes es fa en un fil a part
+        self.runner = TaskRunner(master)
+
+        # Valors provisionals fins que les sondes d'arrencada acabin (vegeu start_startup_probes)
+        self.themes_by_root = {}
+        self.all_installed_themes = []
+        self.all_window_themes = []
+        self.theme_watcher = None
+        # Ordre de la línia d'ordres (sol/lluna) per executar quan acabin les sondes d'arrencada
+        self.startup_command = None
+        # Un sol temporitzador de Tk, armat per al proper canvi de mode automàtic
+        self.solar_scheduler = None
+        self._schedule_after_id = None
 
         # --- Botons principals Sol / Lluna i els seus desplegables de tema ---
         mode_frame_main = ttk.Frame(master, padding=(10,10))
@@ -72,42 +69,48 @@ class RedshiftControlApp:
         # --- Mode Sol ---
         sol_frame = ttk.Frame(mode_frame_main)
         sol_frame.pack(side="left", padx=(0,5), expand=True, fill="x")
-        self.sol_button = ttk.Button(sol_frame, text="☀️ Sol (Dia)", command=self.activate_mode_sol)
+        self.sol_button = ttk.Button(sol_frame, text="☀️ Sol (Dia)", command=lambda: self.run_action(self.activate_mode_sol, self.selected_sol_theme_var.get(), self._window_choice(self.selected_sol_window_var)))
         self.sol_button.pack(fill="x")
         ttk.Label(sol_frame, text="Tema per al Sol:").pack(pady=(5,0))
-        self.selected_sol_theme_var = tk.StringVar(master)
-        initial_sol_theme = self.pref_sol_theme
-        if initial_sol_theme not in self.all_installed_themes and self.all_installed_themes:
-            initial_sol_theme = DEFAULT_THEME_SOL # Fallback
-            if initial_sol_theme not in self.all_installed_themes and self.all_installed_themes: # Doble fallback
-                 initial_sol_theme = self.all_installed_themes[0]
-        self.selected_sol_theme_var.set(initial_sol_theme)
-        self.sol_theme_menu = ttk.OptionMenu(sol_frame, self.selected_sol_theme_var, initial_sol_theme, *self.all_installed_themes, command=self.save_app_preferences)
+        self.selected_sol_theme_var = tk.StringVar(master, value=LOADING_PLACEHOLDER)
+        self.sol_theme_menu = ttk.OptionMenu(sol_frame, self.selected_sol_theme_var, LOADING_PLACEHOLDER, command=self.save_app_preferences)
         self.sol_theme_menu.pack(fill="x", pady=(0,5))
+        ttk.Label(sol_frame, text="Vora de finestra:").pack()
+        self.selected_sol_window_var = tk.StringVar(master, value=LOADING_PLACEHOLDER)
+        self.sol_window_menu = ttk.OptionMenu(sol_frame, self.selected_sol_window_var, LOADING_PLACEHOLDER, command=self.save_app_preferences)
+        self.sol_window_menu.pack(fill="x", pady=(0,5))
 
         # --- Mode Lluna ---
         lluna_frame = ttk.Frame(mode_frame_main)
         lluna_frame.pack(side="right", padx=(5,0), expand=True, fill="x")
-        self.lluna_button = ttk.Button(lluna_frame, text="🌙 Lluna (Nit)", command=self.activate_mode_lluna)
+        self.lluna_button = ttk.Button(lluna_frame, text="🌙 Lluna (Nit)", command=lambda: self.run_action(self.activate_mode_lluna, self.selected_lluna_theme_var.get(), self._window_choice(self.selected_lluna_window_var)))
         self.lluna_button.pack(fill="x")
         ttk.Label(lluna_frame, text="Tema per a la Lluna:").pack(pady=(5,0))
-        self.selected_lluna_theme_var = tk.StringVar(master)
-        initial_lluna_theme = self.pref_lluna_theme
-        if initial_lluna_theme not in self.all_installed_themes and self.all_installed_themes:
-            initial_lluna_theme = DEFAULT_THEME_LLUNA # Fallback
-            if initial_lluna_theme not in self.all_installed_themes and self.all_installed_themes: # Doble fallback
-                 initial_lluna_theme = self.all_installed_themes[0]
-        self.selected_lluna_theme_var.set(initial_lluna_theme)
-        self.lluna_theme_menu = ttk.OptionMenu(lluna_frame, self.selected_lluna_theme_var, initial_lluna_theme, *self.all_installed_themes, command=self.save_app_preferences)
+        self.selected_lluna_theme_var = tk.StringVar(master, value=LOADING_PLACEHOLDER)
+        self.lluna_theme_menu = ttk.OptionMenu(lluna_frame, self.selected_lluna_theme_var, LOADING_PLACEHOLDER, command=self.save_app_preferences)
         self.lluna_theme_menu.pack(fill="x", pady=(0,5))
+        ttk.Label(lluna_frame, text="Vora de finestra:").pack()
+        self.selected_lluna_window_var = tk.StringVar(master, value=LOADING_PLACEHOLDER)
+        self.lluna_window_menu = ttk.OptionMenu(lluna_frame, self.selected_lluna_window_var, LOADING_PLACEHOLDER, command=self.save_app_preferences)
+        self.lluna_window_menu.pack(fill="x", pady=(0,5))
 
         # --- Controls Detallats ---
         details_frame = ttk.LabelFrame(master, text="Ajustaments Detallats de Redshift", padding=(10, 5))
         details_frame.pack(padx=10, pady=5, fill="x", expand=True)
-        
-        self.current_temp_val = DEFAULT_REDSHIFT_TEMP
-        self.current_brightness_val = DEFAULT_REDSHIFT_BRIGHTNESS
-        self.load_initial_redshift_config()
+
+        ttk.Label(details_frame, text="Motor de color:").pack(pady=(5,0))
+        self.color_backend_var = tk.StringVar(master, value=self.color_backend)
+        self.color_backend_menu = ttk.OptionMenu(details_frame, self.color_backend_var, self.color_backend, *COLOR_BACKENDS, command=self.on_color_backend_changed)
+        self.color_backend_menu.pack(fill="x")
+        ttk.Label(details_frame, text="Durada de la transició (s, motor natiu):").pack(pady=(5,0))
+        self.transition_duration_var = tk.StringVar(master, value=str(self.transition_duration))
+        self.transition_spinbox = ttk.Spinbox(details_frame, from_=0, to=MAX_TRANSITION_DURATION, increment=0.5,
+                                              width=6, textvariable=self.transition_duration_var,
+                                              command=self.on_transition_changed)
+        self.transition_spinbox.pack()
+        self.transition_spinbox.bind("<Return>", self.on_transition_changed)
+        self.transition_spinbox.bind("<FocusOut>", self.on_transition_changed)
+
 
         self.current_temp = tk.IntVar(value=self.current_temp_val)
         self.current_brightness = tk.DoubleVar(value=self.current_brightness_val)
@@ -115,7 +118,7 @@ class RedshiftControlApp:
         ttk.Label(details_frame, text="Temperatura (K):").pack(pady=(5,0))
         self.temp_scale = ttk.Scale(details_frame, from_=2500, to=6500, orient="horizontal",
                                    variable=self.current_temp, length=300,
-                                   command=self.update_temp_label)
+                                   command=self.on_temp_scale_moved)
         self.temp_scale.pack()
         self.temp_label_var = tk.StringVar(value=f"{self.current_temp.get()}K")
         ttk.Label(details_frame, textvariable=self.temp_label_var).pack()
@@ -123,262 +126,449 @@ class RedshiftControlApp:
         ttk.Label(details_frame, text="Brillantor (0.1 - 1.0):").pack(pady=(5,0))
         self.brightness_scale = ttk.Scale(details_frame, from_=0.1, to=1.0, orient="horizontal",
                                      variable=self.current_brightness, length=300,
-                                     command=self.update_brightness_label)
+                                     command=self.on_brightness_scale_moved)
         self.brightness_scale.pack()
         self.brightness_label_var = tk.StringVar(value=f"{self.current_brightness.get():.2f}")
         ttk.Label(details_frame, textvariable=self.brightness_label_var).pack()
 
-        self.apply_redshift_button = ttk.Button(details_frame, text="Aplicar i Desar Ajustaments Redshift", command=self.apply_and_restart_redshift_manually)
+        # Previsualització en directe: aplica els valors amb `redshift -P -O` sense desar ni reiniciar
+        self.live_preview_var = tk.BooleanVar(master, value=True)
+        ttk.Checkbutton(details_frame, text="Previsualització en directe", variable=self.live_preview_var).pack(pady=(5,0))
+        self._preview_after_id = None
+        self._preview_request = None
+        self._preview_lock = threading.Lock()
+
+        self.apply_redshift_button = ttk.Button(details_frame, text="Aplicar i Desar Ajustaments Redshift", command=lambda: self.run_action(self.apply_and_restart_redshift_manually, self.current_temp.get(), self.current_brightness.get()))
         self.apply_redshift_button.pack(pady=(10,5))
 
-        self.quit_redshift_button = ttk.Button(details_frame, text="Sortir de Redshift", command=self.quit_redshift)
+        self.quit_redshift_button = ttk.Button(details_frame, text="Sortir de Redshift", command=lambda: self.run_action(self.quit_redshift))
         self.quit_redshift_button.pack(pady=(0,10))
-        
-        self.status_label_var = tk.StringVar(value="Llest.")
+
+        # --- Preajustos amb nom (presets.ini) ---
+        presets_frame = ttk.LabelFrame(master, text="Preajustos", padding=(10, 5))
+        presets_frame.pack(padx=10, pady=5, fill="x")
+        presets_frame.columnconfigure(0, weight=1)
+        self.selected_preset_var = tk.StringVar(master)
+        self.preset_menu = ttk.OptionMenu(presets_frame, self.selected_preset_var, None)
+        self.preset_menu.grid(row=0, column=0, sticky="ew", padx=(0, 5))
+        self.apply_preset_button = ttk.Button(presets_frame, text="Aplicar", command=lambda: self.run_action(self.apply_preset, self.selected_preset_var.get()))
+        self.apply_preset_button.grid(row=0, column=1)
+        self.preset_name_var = tk.StringVar(master)
+        ttk.Entry(presets_frame, textvariable=self.preset_name_var).grid(row=1, column=0, sticky="ew", padx=(0, 5), pady=(5, 0))
+        self.save_preset_button = ttk.Button(presets_frame, text="Desar actual", command=self.on_save_preset)
+        self.save_preset_button.grid(row=1, column=1, pady=(5, 0))
+
+        # --- Canvi automàtic Sol/Lluna ---
+        schedule_frame = ttk.LabelFrame(master, text="Canvi Automàtic (sortida i posta de sol)", padding=(10, 5))
+        schedule_frame.pack(padx=10, pady=5, fill="x")
+        self.schedule_enabled_var = tk.BooleanVar(master, value=False)
+        self.schedule_check = ttk.Checkbutton(schedule_frame, text="Activar Sol/Lluna automàticament",
+                                              variable=self.schedule_enabled_var, command=self.on_schedule_changed)
+        self.schedule_check.grid(row=0, column=0, columnspan=4, sticky="w")
+        self.latitude_var = tk.StringVar(master)
+        self.longitude_var = tk.StringVar(master)
+        ttk.Label(schedule_frame, text="Latitud:").grid(row=1, column=0, sticky="w")
+        self.latitude_entry = ttk.Entry(schedule_frame, textvariable=self.latitude_var, width=9)
+        self.latitude_entry.grid(row=1, column=1, padx=(0, 10))
+        ttk.Label(schedule_frame, text="Longitud:").grid(row=1, column=2, sticky="w")
+        self.longitude_entry = ttk.Entry(schedule_frame, textvariable=self.longitude_var, width=9)
+        self.longitude_entry.grid(row=1, column=3)
+        for entry in (self.latitude_entry, self.longitude_entry):
+            entry.bind("<Return>", self.on_schedule_changed)
+            entry.bind("<FocusOut>", self.on_schedule_changed)
+        self.next_event_var = tk.StringVar(master, value="")
+        ttk.Label(schedule_frame, textvariable=self.next_event_var).grid(row=2, column=0, columnspan=4, sticky="w")
+
+        self.status_label_var = tk.StringVar(value="Carregant...")
         ttk.Label(master, textvariable=self.status_label_var).pack(pady=(5,5), side="bottom")
+        # Durada de l'última acció, per saber d'un cop d'ull si alguna cosa va lenta
+        self.last_action_var = tk.StringVar(value="")
+        ttk.Label(master, textvariable=self.last_action_var, foreground="gray").pack(side="bottom")
 
         self.update_temp_label(self.current_temp.get())
         self.update_brightness_label(self.current_brightness.get())
-        
-        self.ensure_redshift_gtk_running(is_initial_start=True, silent=True)
-
-
-    def load_app_preferences(self):
-        """Llegeix les preferències de tema desades per l'usuari."""
-        config = configparser.ConfigParser()
-        # Valors per defecte si el fitxer o les claus no existeixen
-        self.pref_sol_theme = DEFAULT_THEME_SOL
-        self.pref_lluna_theme = DEFAULT_THEME_LLUNA
-
-        if os.path.exists(APP_PREFS_FILE):
-            try:
-                config.read(APP_PREFS_FILE)
-                if 'TemesPreferits' in config:
-                    self.pref_sol_theme = config.get('TemesPreferits', 'tema_sol', fallback=DEFAULT_THEME_SOL)
-                    self.pref_lluna_theme = config.get('TemesPreferits', 'tema_lluna', fallback=DEFAULT_THEME_LLUNA)
-            except Exception as e:
-                print(f"Error llegint preferències de l'aplicació des de {APP_PREFS_FILE}: {e}")
-        else:
-            print(f"Fitxer de preferències {APP_PREFS_FILE} no trobat. S'usaran valors per defecte.")
-        
-        print(f"Tema Sol carregat/per defecte: {self.pref_sol_theme}")
-        print(f"Tema Lluna carregat/per defecte: {self.pref_lluna_theme}")
-
 
-    def save_app_preferences(self, *args): # *args és per a la crida des de StringVar.trace
-        """Guarda les seleccions de tema actuals al fitxer de preferències."""
-        config = configparser.ConfigParser()
-        if not config.has_section('TemesPreferits'):
-            config.add_section('TemesPreferits')
-        
-        config.set('TemesPreferits', 'tema_sol', self.selected_sol_theme_var.get())
-        config.set('TemesPreferits', 'tema_lluna', self.selected_lluna_theme_var.get())
-        
-        try:
-            with open(APP_PREFS_FILE, 'w') as configfile:
-                config.write(configfile)
-            print(f"Preferències de tema guardades a {APP_PREFS_FILE}")
-            self.status_label_var.set("Preferències de tema guardades.")
-        except Exception as e:
-            print(f"Error guardant preferències a {APP_PREFS_FILE}: {e}")
-            self.status_label_var.set("Error guardant preferències de tema.")
-
-
-    def activate_mode_sol(self):
-        self.status_label_var.set("Activant Mode Sol...")
-        print("\n--- Activant Mode Sol (Dia) ---")
-        self.quit_redshift(silent=True) 
-        
-        theme_to_apply = self.selected_sol_theme_var.get()
-        self.apply_mate_theme_direct(theme_to_apply, theme_to_apply, silent=True) # Assumeix mateix nom per Marco
-        
-        self.status_label_var.set(f"Mode Sol Activat (Tema: {theme_to_apply}, Redshift Apagat).")
-        print(f"Mode Sol Activat. Tema: {theme_to_apply}.")
-
-    def activate_mode_lluna(self):
-        self.status_label_var.set("Activant Mode Lluna...")
-        print("\n--- Activant Mode Lluna (Nit) ---")
-        self.ensure_redshift_gtk_running(silent=True) 
-        
-        theme_to_apply = self.selected_lluna_theme_var.get()
-        self.apply_mate_theme_direct(theme_to_apply, theme_to_apply, silent=True) # Assumeix mateix nom per Marco
-        
-        self.status_label_var.set(f"Mode Lluna Activat (Tema: {theme_to_apply}, Redshift actiu).")
-        print(f"Mode Lluna Activat. Tema: {theme_to_apply}.")
-
-    # --- Mètodes de Suport (is_process_running, quit_redshift, ensure_redshift_gtk_running, etc.) ---
-    # Aquests mètodes són pràcticament iguals que a l'última versió funcional,
-    # amb petits ajustos per a 'silent' i la lògica de quan escriure redshift.conf.
-    # He copiat el cos d'aquests mètodes de la teva última versió funcional de referència (V3 corregida)
-    # i els he enganxat aquí per brevetat, assegurant-me que els paràmetres 'silent' s'utilitzen.
-    # Si us plau, verifica que són els correctes o informa'm si cal copiar-los explícitament de nou.
-
-    def is_process_running(self, process_name):
+        # Fins que es coneguin els temes i la configuració, els controls que en depenen queden desactivats
+        self._startup_widgets = (self.sol_button, self.lluna_button, self.sol_theme_menu, self.lluna_theme_menu,
+                                 self.sol_window_menu, self.lluna_window_menu,
+                                 self.color_backend_menu, self.temp_scale, self.brightness_scale,
+                                 self.apply_redshift_button, self.schedule_check, self.transition_spinbox,
+                                 self.latitude_entry, self.longitude_entry,
+                                 self.preset_menu, self.apply_preset_button, self.save_preset_button)
+        for widget in self._startup_widgets:
+            widget.state(["disabled"])
+
+        # Les sondes (temes, preferències, redshift.conf, Redshift) s'executen després del primer frame
+        self._first_frame_shown = False
+        master.bind("<Map>", self._on_first_map, add="+")
+
+    def _on_first_map(self, event):
+        if event.widget is not self.master or self._first_frame_shown:
+            return
+        self._first_frame_shown = True
+        self.master.update_idletasks()
+        self.record_startup_timing("first_frame")
+        self.start_startup_probes()
+
+    def record_startup_timing(self, stage):
+        elapsed_ms = (time.perf_counter() - self.startup_t0) * 1000
+        self.startup_timings[stage] = elapsed_ms
+        print(f"Arrencada: {stage} en {elapsed_ms:.1f} ms")
+
+    def start_startup_probes(self):
+        """Encua les sondes d'arrencada; cadascuna omple els seus widgets en acabar."""
+        self.runner.submit(self._probe_themes_and_preferences, on_done=self._on_themes_loaded)
+        self.runner.submit(self._probe_redshift_config, on_done=self._on_redshift_config_loaded)
+        self.runner.submit(self._probe_redshift_running, on_done=self._on_redshift_probed)
+        self.runner.submit(self.load_presets, on_done=self._on_presets_loaded)
+        if self.startup_command is not None:
+            # El fil de treball executa les tasques en ordre: les preferències ja estaran llegides
+            self.handle_instance_command(self.startup_command)
+
+    def _probe_themes_and_preferences(self):
+        themes_by_root = self.load_theme_index()
+        self.load_app_preferences() # Carrega temes preferits per Sol/Lluna
+        return themes_by_root
+
+    def _on_themes_loaded(self, themes_by_root):
+        self.themes_by_root = themes_by_root
+        self.all_installed_themes = get_installed_gtk_themes(themes_by_root)
+        for option_menu, variable, preferred, default in (
+                (self.sol_theme_menu, self.selected_sol_theme_var, self.pref_sol_theme, DEFAULT_THEME_SOL),
+                (self.lluna_theme_menu, self.selected_lluna_theme_var, self.pref_lluna_theme, DEFAULT_THEME_LLUNA)):
+            initial_theme = preferred
+            if initial_theme not in self.all_installed_themes and self.all_installed_themes:
+                initial_theme = default # Fallback
+                if initial_theme not in self.all_installed_themes and self.all_installed_themes: # Doble fallback
+                     initial_theme = self.all_installed_themes[0]
+            option_menu.set_menu(initial_theme, *self.all_installed_themes)
+            variable.set(initial_theme)
+        self.all_window_themes = get_installed_window_themes(themes_by_root)
+        for option_menu, variable, preferred in (
+                (self.sol_window_menu, self.selected_sol_window_var, self.pref_sol_window_theme),
+                (self.lluna_window_menu, self.selected_lluna_window_var, self.pref_lluna_window_theme)):
+            initial_theme = preferred if preferred in self.all_window_themes else WINDOW_THEME_AUTO
+            option_menu.set_menu(initial_theme, WINDOW_THEME_AUTO, *self.all_window_themes)
+            variable.set(initial_theme)
+        self.color_backend_var.set(self.color_backend)
+        self.transition_duration_var.set(str(self.transition_duration))
+        self.schedule_enabled_var.set(self.schedule_enabled)
+        self.latitude_var.set("" if self.latitude is None else str(self.latitude))
+        self.longitude_var.set("" if self.longitude is None else str(self.longitude))
+        for widget in (self.sol_button, self.lluna_button, self.sol_theme_menu, self.lluna_theme_menu,
+                       self.sol_window_menu, self.lluna_window_menu,
+                       self.color_backend_menu, self.schedule_check, self.transition_spinbox,
+                       self.latitude_entry, self.longitude_entry):
+            widget.state(["!disabled"])
+        self.start_theme_watcher()
+        self.start_solar_schedule()
+        self.record_startup_timing("themes")
+
+    def _probe_redshift_config(self):
+        self.load_initial_redshift_config()
+        return (self.current_temp_val, self.current_brightness_val)
+
+    def _on_redshift_config_loaded(self, values):
+        temp, brightness = values
+        self.current_temp.set(temp)
+        self.current_brightness.set(brightness)
+        self.update_temp_label(temp)
+        self.update_brightness_label(brightness)
+        for widget in (self.temp_scale, self.brightness_scale, self.apply_redshift_button):
+            widget.state(["!disabled"])
+        self.record_startup_timing("config")
+
+    def _probe_redshift_running(self):
+        # Un redshift que una execució anterior va deixar aturat a mitja previsualització
+        self.resume_stopped_redshift()
+        if not self.uses_native_backend():
+            self.ensure_redshift_gtk_running(is_initial_start=True, silent=True)
+
+    def _on_redshift_probed(self, result):
+        self.record_startup_timing("redshift")
+        if self.status_label_var.get() == "Carregant...":
+            self.status_label_var.set("Llest.")
+
+    def _on_presets_loaded(self, names):
+        selected = self.selected_preset_var.get()
+        if selected not in names:
+            selected = names[0] if names else ""
+        self.preset_menu.set_menu(selected, *names)
+        self.selected_preset_var.set(selected)
+        for widget in (self.preset_menu, self.apply_preset_button, self.save_preset_button):
+            widget.state(["!disabled"])
+        self.record_startup_timing("presets")
+
+    def on_save_preset(self):
+        """Desa la temperatura i la brillantor dels sliders com a preajust (el nom escrit o el seleccionat)."""
+        name = self.preset_name_var.get().strip() or self.selected_preset_var.get()
+        self.selected_preset_var.set(name)
+        self.preset_name_var.set("")
+        self.runner.submit(self.run_timed, self.save_preset, name, self.current_temp.get(),
+                           self.current_brightness.get(), on_done=self._on_preset_saved)
+
+    def _on_preset_saved(self, result):
+        self._on_action_done(result)
+        self._on_presets_loaded(list(self.presets or ()))
+
+    def on_schedule_changed(self, *args):
         try:
-            subprocess.check_call(["pgrep", "-x", process_name], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-            return True
-        except subprocess.CalledProcessError:
-            return False
-        except FileNotFoundError: 
-            print("Avís: La comanda 'pgrep' no s'ha trobat.")
-            return False 
-
-    def quit_redshift(self, silent=False):
-        if not silent: self.status_label_var.set("Tancant Redshift...")
-        print("Intentant tancar tots els processos de Redshift...")
+            latitude = float(self.latitude_var.get().replace(",", "."))
+            longitude = float(self.longitude_var.get().replace(",", "."))
+        except ValueError:
+            latitude = longitude = None
+        changed = ((self.schedule_enabled_var.get(), latitude, longitude)
+                   != (self.schedule_enabled, self.latitude, self.longitude))
+        if not changed:
+            return
+        self.latitude, self.longitude = latitude, longitude
+        self.schedule_enabled = self.schedule_enabled_var.get()
+        self.save_app_preferences()
+        self.start_solar_schedule()
+
+    def start_solar_schedule(self):
+        """Calcula (o llegeix de la memòria cau) la taula solar al fil de treball i arma el temporitzador."""
+        self.cancel_solar_schedule()
+        location = self.schedule_location()
+        if location is None:
+            self.solar_scheduler = None
+            if self.schedule_enabled:
+                self.next_event_var.set("Cal una latitud (-90 a 90) i una longitud (-180 a 180) vàlides.")
+            return
+        self.runner.submit(self._prepare_solar_schedule, location, on_done=self._on_solar_schedule_ready)
+
+    def _prepare_solar_schedule(self, location):
+        scheduler = SolarScheduler(location[0], location[1], SOLAR_TABLE_FILE)
+        now = time.time()
+        # Carrega la taula de l'any (i la del següent, si cal) fora del fil de Tk
+        scheduler.next_event(now)
+        # Es posa la pantalla en el mode que toca ara mateix; si ja hi és, el reconciliador no fa res
+        self.run_mode(scheduler.mode_at(now))
+        return scheduler, location
+
+    def _on_solar_schedule_ready(self, result):
+        scheduler, location = result
+        # Si la ubicació ha canviat mentrestant, ja s'ha encuat un altre càlcul
+        if location != self.schedule_location():
+            return
+        self.solar_scheduler = scheduler
+        self.arm_solar_timer()
+
+    def arm_solar_timer(self):
+        self.cancel_solar_schedule()
+        event = self.solar_scheduler.next_event(time.time())
+        if event is None:
+            self.next_event_var.set("Sense sortides ni postes de sol properes (dia o nit polar).")
+            return
+        event_time, mode = event
+        delay_ms = max(0, int((event_time - time.time()) * 1000))
+        self._schedule_after_id = self.master.after(delay_ms, self._on_solar_event, event)
+        label = "Sol" if mode == "sol" else "Lluna"
+        self.next_event_var.set(f"Proper canvi: {label} a les {time.strftime('%H:%M', time.localtime(event_time))}"
+                                f" ({time.strftime('%d/%m', time.localtime(event_time))}).")
+
+    def cancel_solar_schedule(self):
+        if self._schedule_after_id is not None:
+            self.master.after_cancel(self._schedule_after_id)
+            self._schedule_after_id = None
+        self.next_event_var.set("")
+
+    def _on_solar_event(self, event):
+        self._schedule_after_id = None
+        event_time, mode = event
+        now = time.time()
+        # Si el temporitzador ha saltat massa d'hora (canvi d'hora), només es torna a armar;
+        # si ha saltat tard (suspensió), s'aplica el mode que toca ara i no el de l'esdeveniment
+        if now >= event_time - 1:
+            if now - event_time > SOLAR_EVENT_LATE_S:
+                mode = self.solar_scheduler.mode_at(now)
+            self.run_action(self.run_mode, mode)
+        self.arm_solar_timer()
+
+    def run_mode(self, mode):
+        if mode == "sol":
+            return self.activate_mode_sol()
+        return self.activate_mode_lluna()
+
+    def start_theme_watcher(self):
+        """Vigila els directoris de temes perquè els desplegables es mantinguin al dia."""
         try:
-            subprocess.run(["killall", "-q", REDSHIFT_PROCESS_NAME], check=False, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            subprocess.run(["killall", "-q", REDSHIFT_GTK_PROCESS_NAME], check=False, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            time.sleep(0.2) 
-            if not self.is_process_running(REDSHIFT_GTK_PROCESS_NAME) and not self.is_process_running(REDSHIFT_PROCESS_NAME):
-                if not silent: self.status_label_var.set("Redshift tancat.")
-                print("Tots els processos de Redshift s'han tancat.")
-                if not silent: messagebox.showinfo("Redshift", "S'han tancat els processos de Redshift.")
-            else:
-                if not silent: self.status_label_var.set("Error: Redshift encara s'està executant.")
-                print("Avís: Un o més processos de Redshift encara podrien estar executant-se.")
-                if not silent: messagebox.showwarning("Redshift", "No s'han pogut tancar tots els processos de Redshift.")
-        except Exception as e:
-            error_msg = f"Un error ha ocorregut en intentar tancar Redshift:\n{e}"
-            if not silent: 
-                self.status_label_var.set(f"Error en tancar Redshift: {e}")
-                messagebox.showerror("Error", error_msg)
-            else: 
-                print(error_msg)
-
-    def ensure_redshift_gtk_running(self, is_initial_start=False, silent=False):
-        if not silent: self.status_label_var.set("Comprovant/Iniciant Redshift...")
-        
-        if is_initial_start and not os.path.exists(CONFIG_FILE_PATH_REDSHIFT):
-            print(f"El fitxer de configuració {CONFIG_FILE_PATH_REDSHIFT} no existeix. Creant un de bàsic.")
-            self.write_redshift_config_direct(DEFAULT_REDSHIFT_TEMP, DEFAULT_REDSHIFT_BRIGHTNESS, silent=True)
-
-        if not self.is_process_running(REDSHIFT_GTK_PROCESS_NAME):
-            print(f"No s'ha trobat {REDSHIFT_GTK_PROCESS_NAME} en execució. S'intentarà iniciar.")
+            self.theme_watcher = ThemeWatcher(THEME_PATHS, self.on_theme_added, self.on_theme_removed,
+                                              initial_themes=self.themes_by_root)
+        except (OSError, AttributeError) as e:
+            print(f"No s'ha pogut iniciar la vigilància de temes: {e}")
+            return
+        # El bucle de Tk desperta només quan inotify té esdeveniments, sense cap temporitzador
+        self.master.tk.createfilehandler(self.theme_watcher.fd, tk.READABLE, self.theme_watcher.handle_events)
+
+    def start_instance_server(self, listener):
+        """Atén les ordres de les execucions posteriors de l'aplicació (vegeu single_instance.py)."""
+        self._instance_listener = listener
+        self.master.tk.createfilehandler(listener, tk.READABLE, self._on_instance_request)
+
+    def _on_instance_request(self, *args):
+        conn, _ = self._instance_listener.accept()
+        with conn:
+            conn.settimeout(INSTANCE_READ_TIMEOUT)
             try:
-                subprocess.Popen([REDSHIFT_GTK_PROCESS_NAME], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-                time.sleep(1) 
-                if self.is_process_running(REDSHIFT_GTK_PROCESS_NAME):
-                    if not silent: self.status_label_var.set(f"{REDSHIFT_GTK_PROCESS_NAME} iniciat.")
-                    print(f"{REDSHIFT_GTK_PROCESS_NAME} iniciat correctament.")
-                else: 
-                    if not silent: self.status_label_var.set(f"Error en iniciar {REDSHIFT_GTK_PROCESS_NAME}.")
-                    print(f"Sembla que {REDSHIFT_GTK_PROCESS_NAME} no s'ha iniciat correctament.")
-            except Exception as e:
-                error_msg = f"No s'ha pogut iniciar {REDSHIFT_GTK_PROCESS_NAME}:\n{e}"
-                if not silent: 
-                    self.status_label_var.set(f"Excepció en iniciar Redshift: {e}")
-                    messagebox.showerror("Error", error_msg)
-                else: print(error_msg)
-        else: 
-             if not silent: self.status_label_var.set(f"{REDSHIFT_GTK_PROCESS_NAME} ja s'està executant.")
-             print(f"{REDSHIFT_GTK_PROCESS_NAME} ja s'està executant.")
-
-    def restart_redshift_process(self, silent=False):
-        if not silent: self.status_label_var.set("Reiniciant Redshift...")
-        print("Intentant reiniciar processos Redshift...")
-        try:
-            subprocess.run(["killall", "-q", REDSHIFT_PROCESS_NAME], check=False, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            subprocess.run(["killall", "-q", REDSHIFT_GTK_PROCESS_NAME], check=False, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            time.sleep(0.5)
-            subprocess.Popen([REDSHIFT_GTK_PROCESS_NAME], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-            time.sleep(1)
-            if self.is_process_running(REDSHIFT_GTK_PROCESS_NAME):
-                if not silent: self.status_label_var.set("Redshift reiniciat.")
-                print(f"{REDSHIFT_GTK_PROCESS_NAME} reiniciat correctament.")
+                request = read_message(conn)
+            except (OSError, ValueError) as e:
+                print(f"Ordre d'una altra instància no vàlida: {e}")
+                return
+            command = request.get("command") if isinstance(request, dict) else None
+            if command in INSTANCE_COMMANDS:
+                self.handle_instance_command(command)
+                response = {"ok": True, "messages": [f"Ordre '{command}' enviada a la finestra oberta."]}
             else:
-                if not silent: self.status_label_var.set(f"Error en reiniciar {REDSHIFT_GTK_PROCESS_NAME}.")
-                print(f"Sembla que {REDSHIFT_GTK_PROCESS_NAME} no s'ha reiniciat correctament.")
-        except Exception as e:
-            error_msg = f"No s'ha pogut reiniciar Redshift:\n{e}"
-            if not silent: 
-                self.status_label_var.set(f"Excepció en reiniciar Redshift: {e}")
-                messagebox.showerror("Error reiniciant Redshift", error_msg)
-            else: print(error_msg)
-
-    def apply_and_restart_redshift_manually(self): 
-        self.status_label_var.set("Aplicant ajustaments manuals de Redshift...")
-        new_temp = self.current_temp.get()
-        new_brightness = self.current_brightness.get()
-        if not self.write_redshift_config_direct(new_temp, new_brightness, silent=False): 
-            self.status_label_var.set("Error en guardar la config de Redshift.")
+                response = {"ok": False, "messages": [f"Ordre desconeguda: {command}"]}
+            try:
+                conn.sendall(encode_message(response))
+            except OSError as e:
+                print(f"No s'ha pogut respondre a l'altra instància: {e}")
+
+    def handle_instance_command(self, command):
+        if command == "mostra":
+            self.master.deiconify()
+            self.master.lift()
+            self.master.focus_force()
+        # Sense tema explícit s'usa el preferit, que save_app_preferences manté igual que el desplegable
+        elif command == "sol":
+            self.run_action(self.activate_mode_sol)
+        elif command == "lluna":
+            self.run_action(self.activate_mode_lluna)
+
+    def _theme_menus(self):
+        return ((self.sol_theme_menu, self.selected_sol_theme_var),
+                (self.lluna_theme_menu, self.selected_lluna_theme_var))
+
+    def _window_menus(self):
+        return ((self.sol_window_menu, self.selected_sol_window_var),
+                (self.lluna_window_menu, self.selected_lluna_window_var))
+
+    def _window_choice(self, variable):
+        """Tema de finestra triat en un desplegable; "" si és l'opció automàtica."""
+        choice = variable.get()
+        return "" if choice in (WINDOW_THEME_AUTO, LOADING_PLACEHOLDER) else choice
+
+    def _select_theme(self, variable, theme_name):
+        variable.set(theme_name)
+        self.save_app_preferences(theme_name)
+
+    def _insert_menu_theme(self, themes, menus, theme_name, offset=0):
+        if theme_name in themes:
             return
-        self.restart_redshift_process(silent=False) 
+        index = bisect.bisect_left(themes, theme_name)
+        themes.insert(index, theme_name)
+        for option_menu, variable in menus:
+            menu = option_menu.nametowidget(option_menu["menu"])
+            # Com les entrades que crea OptionMenu.set_menu: radiobutton lligat a la variable del desplegable
+            menu.insert_radiobutton(index + offset, label=theme_name, variable=variable, value=theme_name,
+                                    command=lambda v=variable, t=theme_name: self._select_theme(v, t))
+
+    def on_theme_added(self, theme_name, info):
+        DisplayController.on_theme_added(self, theme_name, info)
+        if info[0] & THEME_GTK3:
+            self._insert_menu_theme(self.all_installed_themes, self._theme_menus(), theme_name)
+        if info[0] & THEME_METACITY:
+            # Als desplegables de vora, la primera opció és WINDOW_THEME_AUTO
+            self._insert_menu_theme(self.all_window_themes, self._window_menus(), theme_name, offset=1)
+        print(f"Tema nou detectat: {theme_name}")
+
+    def on_theme_removed(self, theme_name):
+        DisplayController.on_theme_removed(self, theme_name)
+        # Els temes per defecte sempre es mantenen a la llista
+        if theme_name in self.all_installed_themes and theme_name not in (DEFAULT_THEME_SOL, DEFAULT_THEME_LLUNA):
+            index = self.all_installed_themes.index(theme_name)
+            del self.all_installed_themes[index]
+            for option_menu, _ in self._theme_menus():
+                option_menu.nametowidget(option_menu["menu"]).delete(index)
+        if theme_name in self.all_window_themes:
+            index = self.all_window_themes.index(theme_name)
+            del self.all_window_themes[index]
+            for option_menu, _ in self._window_menus():
+                option_menu.nametowidget(option_menu["menu"]).delete(index + 1)
+        print(f"Tema eliminat: {theme_name}")
+
+    def run_action(self, action, *args, **kwargs):
+        """Executa una acció de Redshift/temes al fil de treball i en mostra la durada."""
+        self.runner.submit(self.run_timed, action, *args, on_done=self._on_action_done, **kwargs)
+
+    def _on_action_done(self, result):
+        name, elapsed_ms = self.last_action
+        self.last_action_var.set(f"Última acció ({name}): {elapsed_ms / 1000:.2f} s")
+
+    def set_status(self, text):
+        """Actualitza la barra d'estat; es pot cridar des de qualsevol fil."""
+        self.runner.call_in_ui(self.status_label_var.set, text)
+
+    def show_dialog(self, kind, title, message):
+        """Mostra un diàleg de messagebox des del fil de Tk."""
+        DisplayController.show_dialog(self, kind, title, message)
+        self.runner.call_in_ui(DIALOG_FUNCTIONS[kind], title, message)
 
-    def apply_mate_theme_direct(self, gtk_theme_name, window_theme_name, silent=False):
-        if not silent: self.status_label_var.set(f"Aplicant tema {gtk_theme_name}...")
-        print(f"Intentant aplicar tema GTK: {gtk_theme_name}, Tema Finestra: {window_theme_name}")
-        success_gtk = True
-        success_marco = True
-        try:
-            subprocess.run(["gsettings", "set", "org.mate.interface", "gtk-theme", gtk_theme_name], check=True, capture_output=True)
-        except Exception as e_gtk:
-            success_gtk = False
-            print(f"Error aplicant tema GTK {gtk_theme_name}: {e_gtk}")
-            if not silent: messagebox.showerror("Error Tema GTK", f"No s'ha pogut aplicar el tema GTK {gtk_theme_name}.\nError: {e_gtk}")
+    def save_app_preferences(self, *args): # *args és per a la crida des de StringVar.trace
+        """Guarda les seleccions de tema actuals al fitxer de preferències."""
+        # Mentre els desplegables encara diuen "Carregant temes..." es conserven les preferències llegides
+        if self.selected_sol_theme_var.get() != LOADING_PLACEHOLDER:
+            self.pref_sol_theme = self.selected_sol_theme_var.get()
+        if self.selected_lluna_theme_var.get() != LOADING_PLACEHOLDER:
+            self.pref_lluna_theme = self.selected_lluna_theme_var.get()
+        if self.selected_sol_window_var.get() != LOADING_PLACEHOLDER:
+            self.pref_sol_window_theme = self._window_choice(self.selected_sol_window_var)
+        if self.selected_lluna_window_var.get() != LOADING_PLACEHOLDER:
+            self.pref_lluna_window_theme = self._window_choice(self.selected_lluna_window_var)
+        self.color_backend = self.color_backend_var.get()
+        DisplayController.save_app_preferences(self)
+
+    def on_color_backend_changed(self, backend):
+        self.color_backend = backend
+        self.save_app_preferences()
+        # Amb el motor natiu, les rampes dels preajustos es precalculen
+        self.runner.submit(self.load_presets, on_done=self._on_presets_loaded)
+
+    def on_transition_changed(self, *args):
         try:
-            subprocess.run(["gsettings", "set", "org.mate.Marco.general", "theme", window_theme_name], check=True, capture_output=True)
-        except Exception as e_marco:
-            success_marco = False
-            print(f"Error aplicant tema Marco {window_theme_name}: {e_marco}")
-            if not silent : 
-                 messagebox.showwarning("Avís Tema Marco", f"No s'ha pogut aplicar el tema de finestra {window_theme_name}.\nError: {e_marco}")
-        if success_gtk and success_marco:
-            if not silent: self.status_label_var.set(f"Tema {gtk_theme_name} aplicat.")
-            if not silent: messagebox.showinfo("Tema Canviat", f"S'ha intentat aplicar el tema {gtk_theme_name}.")
-            print("Temes aplicats.")
-        elif not silent :
-             self.status_label_var.set(f"Problemes en aplicar tema {gtk_theme_name}.")
-
-    def load_initial_redshift_config(self):
-        if not os.path.exists(CONFIG_FILE_PATH_REDSHIFT):
-            print(f"Avís: {CONFIG_FILE_PATH_REDSHIFT} no existeix. S'usaran valors per defecte.")
-            self.current_temp_val = DEFAULT_REDSHIFT_TEMP
-            self.current_brightness_val = DEFAULT_REDSHIFT_BRIGHTNESS
+            duration = float(self.transition_duration_var.get().replace(",", "."))
+        except ValueError:
+            self.transition_duration_var.set(str(self.transition_duration))
             return
-        config_reader = configparser.ConfigParser()
-        try:
-            config_reader.optionxform = str 
-            config_reader.read(CONFIG_FILE_PATH_REDSHIFT)
-            if config_reader.has_section('redshift'):
-                self.current_temp_val = config_reader.getint('redshift', 'temp-night', fallback=DEFAULT_REDSHIFT_TEMP)
-                self.current_brightness_val = config_reader.getfloat('redshift', 'brightness-night', fallback=DEFAULT_REDSHIFT_BRIGHTNESS)
-            else: 
-                print(f"Secció [redshift] no trobada a {CONFIG_FILE_PATH_REDSHIFT}. Valors per defecte.")
-                self.current_temp_val = DEFAULT_REDSHIFT_TEMP
-                self.current_brightness_val = DEFAULT_REDSHIFT_BRIGHTNESS
-        except Exception as e:
-            print(f"Error llegint {CONFIG_FILE_PATH_REDSHIFT}: {e}. Valors per defecte.")
-            self.current_temp_val = DEFAULT_REDSHIFT_TEMP
-            self.current_brightness_val = DEFAULT_REDSHIFT_BRIGHTNESS
-
-    def write_redshift_config_direct(self, temp, brightness, silent=False):
-        brightness_str = f"{float(brightness):.2f}"
-        temp_str = str(int(temp))
-        config_content = f"""[redshift]
-temp-day={temp_str}
-temp-night={temp_str}
-brightness-day={brightness_str}
-brightness-night={brightness_str}
-transition=0
-location-provider=manual
-adjustment-method=randr
-[manual]
-lat=0
-lon=0
-"""
-        try:
-            with open(CONFIG_FILE_PATH_REDSHIFT, 'w', encoding='utf-8') as f:
-                f.write(config_content)
-            if not silent:
-                 messagebox.showinfo("Configuració Redshift", f"Configuració de Redshift guardada.")
-            print(f"Configuració Redshift guardada (Temp: {temp_str}K, Bright: {brightness_str})")
-            return True
-        except Exception as e:
-            error_msg = f"No s'ha pogut guardar la config de Redshift: {e}"
-            if not silent: messagebox.showerror("Error guardant config Redshift", error_msg)
-            else: print(error_msg)
-            return False
+        duration = min(max(duration, 0.0), MAX_TRANSITION_DURATION)
+        if duration != self.transition_duration:
+            self.transition_duration = duration
+            self.save_app_preferences()
+
+    def on_temp_scale_moved(self, value):
+        self.update_temp_label(value)
+        self.schedule_live_preview()
+
+    def on_brightness_scale_moved(self, value):
+        self.update_brightness_label(value)
+        self.schedule_live_preview()
+
+    def schedule_live_preview(self):
+        """Reprograma la previsualització perquè només s'apliqui l'últim valor del slider."""
+        if not self.live_preview_var.get():
+            return
+        if self._preview_after_id is not None:
+            self.master.after_cancel(self._preview_after_id)
+        self._preview_after_id = self.master.after(PREVIEW_DEBOUNCE_MS, self._submit_live_preview)
+
+    def _submit_live_preview(self):
+        self._preview_after_id = None
+        values = (self.current_temp.get(), self.current_brightness.get())
+        with self._preview_lock:
+            already_queued = self._preview_request is not None
+            self._preview_request = values
+        # Si ja hi ha una previsualització a la cua, agafarà aquests valors en executar-se
+        if not already_queued:
+            self.run_action(self.preview_redshift_values)
+
+    def preview_redshift_values(self):
+        with self._preview_lock:
+            values, self._preview_request = self._preview_request, None
+        if values is None:
+            return
+        self.preview_values(*values)
 
     def update_temp_label(self, value):
         self.temp_label_var.set(f"{int(float(value))}K")
@@ -386,7 +576,39 @@ lon=0
     def update_brightness_label(self, value):
         self.brightness_label_var.set(f"{float(value):.2f}")
 
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Control ràpid de Redshift i dels temes de MATE.")
+    parser.add_argument("mode", nargs="?", choices=("sol", "lluna"),
+                        help="mode per activar en obrir (o a la finestra ja oberta)")
+    args = parser.parse_args(argv)
+
+    instance = SingleInstance()
+    if not instance.acquire():
+        # Ja hi ha una finestra oberta: se li passa l'ordre en lloc d'obrir-ne una altra
+        try:
+            response = instance.forward({"command": args.mode or "mostra"})
+        except (OSError, ValueError) as e:
+            response = None
+            print(f"Error comunicant amb la finestra oberta: {e}")
+        if response is None:
+            print("L'aplicació ja està oberta però no respon.")
+            return 1
+        for message in response.get("messages", ()):
+            print(message)
+        return 0 if response.get("ok") else 1
+
+    try:
+        listener = instance.listen()
+        root = tk.Tk()
+        app = RedshiftControlApp(root)
+        app.startup_command = args.mode
+        if listener is not None:
+            app.start_instance_server(listener)
+        root.mainloop()
+    finally:
+        instance.close()
+    return 0
+
+
 if __name__ == "__main__":
-    root = tk.Tk()
-    app = RedshiftControlApp(root)
-    root.mainloop()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,243 @@
+"""Consulta i aturada de processos de Redshift directament a /proc, sense llançar pgrep ni killall."""
+import os
+import select
+import signal
+import time
+
+PROC_DIR = "/proc"
+# Valor de /proc/PID/sessionid quan el procés no pertany a cap sessió d'inici
+UNSET_SESSION_ID = "4294967295"
+# Temps (en segons) durant el qual una instantània de /proc es considera vàlida
+SNAPSHOT_TTL = 0.5
+# Primer i darrer interval (en segons) entre comprovacions d'una sonda de disponibilitat
+PROBE_FIRST_DELAY = 0.005
+PROBE_MAX_DELAY = 0.1
+
+
+def _process_state(pid, proc_dir=PROC_DIR):
+    """Lletra d'estat de /proc/PID/stat (b"S", b"T", b"Z"...), o None si el procés ja no existeix."""
+    try:
+        with open(os.path.join(proc_dir, str(pid), "stat"), "rb") as f:
+            stat = f.read()
+    except OSError:
+        return None
+    # El nom (entre parèntesis) pot contenir espais o ")"; l'estat és el camp que el segueix
+    end = stat.rfind(b")")
+    return stat[end + 2:end + 3]
+
+
+def _is_zombie(pid, proc_dir=PROC_DIR):
+    """Cert si el procés ja ha acabat però el pare encara no l'ha recollit (o ja no existeix)."""
+    return _process_state(pid, proc_dir) in (None, b"Z", b"X")
+
+
+def read_session_id(pid="self", proc_dir=PROC_DIR):
+    """Sessió d'inici (auditoria) del procés, o None si no en té o el nucli no ho exposa."""
+    try:
+        with open(os.path.join(proc_dir, str(pid), "sessionid"), "rb") as f:
+            session_id = f.read().strip().decode("ascii", "replace")
+    except OSError:
+        return None
+    return None if session_id in ("", UNSET_SESSION_ID) else session_id
+
+
+class ProcessScanner:
+    """Recorre /proc/*/comm una sola vegada i recorda els PID dels processos vigilats.
+
+    Els processos zombis (acabats però encara no recollits pel pare) no compten.
+
+    Amb `owner_uid` i `session_id` només es tenen en compte els processos d'aquest
+    usuari i d'aquesta sessió, de manera que en un ordinador compartit no es veuen
+    (ni s'aturen) els Redshift dels altres.
+
+    La instantània es reutilitza durant `ttl` segons; qualsevol acció que canviï
+    l'estat dels processos (matar, iniciar) ha de cridar `invalidate()`.
+    """
+
+    def __init__(self, process_names, ttl=SNAPSHOT_TTL, proc_dir=PROC_DIR, owner_uid=None, session_id=None):
+        self.process_names = frozenset(process_names)
+        self.ttl = ttl
+        self.proc_dir = proc_dir
+        self.owner_uid = owner_uid
+        self.session_id = session_id
+        self._snapshot = None
+        self._snapshot_time = 0.0
+
+    def invalidate(self):
+        self._snapshot = None
+
+    def scan(self):
+        """Fa una passada completa per /proc i retorna {nom: [pid, ...]}."""
+        found = {name: [] for name in self.process_names}
+        try:
+            entries = os.scandir(self.proc_dir)
+        except OSError as e:
+            print(f"Error llegint {self.proc_dir}: {e}")
+            return found
+        with entries:
+            for entry in entries:
+                if not entry.name.isdigit():
+                    continue
+                try:
+                    with open(os.path.join(entry.path, "comm"), "rb") as f:
+                        comm = f.read().rstrip(b"\n").decode("utf-8", "replace")
+                except OSError:
+                    # El procés ha acabat mentre el llegíem, o no tenim permís
+                    continue
+                if comm in found and self._owned(entry) and not _is_zombie(entry.name, self.proc_dir):
+                    found[comm].append(int(entry.name))
+        return found
+
+    def _owned(self, entry):
+        """Cert si el procés de /proc/`entry` és de l'usuari i la sessió vigilats."""
+        try:
+            if self.owner_uid is not None and entry.stat().st_uid != self.owner_uid:
+                return False
+        except OSError:
+            return False
+        if self.session_id is not None:
+            # Els serveis del gestor d'usuari (systemd --user) no tenen sessió i són de totes les de l'usuari
+            return read_session_id(entry.name, self.proc_dir) in (self.session_id, None)
+        return True
+
+    def snapshot(self):
+        now = time.monotonic()
+        if self._snapshot is None or now - self._snapshot_time > self.ttl:
+            self._snapshot = self.scan()
+            self._snapshot_time = now
+        return self._snapshot
+
+    def pids(self, process_name):
+        return list(self.snapshot().get(process_name, ()))
+
+    def is_running(self, process_name):
+        return bool(self.snapshot().get(process_name))
+
+    def stopped_pids(self, process_name):
+        """PID de `process_name` aturats amb SIGSTOP (estat T), que no faran res fins a rebre SIGCONT."""
+        return [pid for pid in self.pids(process_name) if _process_state(pid, self.proc_dir) == b"T"]
+
+
+def _open_pidfd(pid):
+    """Retorna un pidfd per a `pid`, o None si el procés ja no existeix o no hi ha suport."""
+    if not hasattr(os, "pidfd_open"):
+        return None
+    try:
+        return os.pidfd_open(pid)
+    except OSError:
+        return None
+
+
+def _pid_exists(pid):
+    # Un zombi ja ha sortit: només li falta que el pare el reculli
+    return not _is_zombie(pid)
+
+
+def wait_for_exit(pids, timeout):
+    """Espera que tots els `pids` acabin, fins a `timeout` segons.
+
+    Amb pidfd_open (Linux >= 5.3) l'espera la desperta el nucli en el moment
+    exacte en què cada procés surt. Retorna el conjunt de PID que continuen vius.
+    """
+    deadline = time.monotonic() + timeout
+    fds = {}
+    remaining = set()
+    for pid in pids:
+        fd = _open_pidfd(pid)
+        if fd is not None:
+            fds[fd] = pid
+        elif _pid_exists(pid):
+            remaining.add(pid)
+    try:
+        poller = select.poll()
+        for fd in fds:
+            poller.register(fd, select.POLLIN)
+        delay = PROBE_FIRST_DELAY
+        while fds or remaining:
+            left = deadline - time.monotonic()
+            if left <= 0:
+                break
+            # Sense pidfd (nuclis antics) cal tornar a mirar /proc de tant en tant
+            wait = min(left, delay) if remaining else left
+            for fd, _ in poller.poll(wait * 1000):
+                poller.unregister(fd)
+                os.close(fd)
+                del fds[fd]
+            remaining = {pid for pid in remaining if _pid_exists(pid)}
+            delay = min(delay * 2, PROBE_MAX_DELAY)
+        return set(fds.values()) | remaining
+    finally:
+        for fd in fds:
+            os.close(fd)
+
+
+def _send_signal(pids, sig):
+    for pid in pids:
+        try:
+            os.kill(pid, sig)
+        except ProcessLookupError:
+            pass
+        except PermissionError as e:
+            print(f"No es pot enviar el senyal {sig.name} al procés {pid}: {e}")
+
+
+def suspend_processes(pids):
+    """Atura els `pids` (SIGSTOP) sense acabar-los; `resume_processes` els fa continuar."""
+    _send_signal(pids, signal.SIGSTOP)
+
+
+def resume_processes(pids):
+    _send_signal(pids, signal.SIGCONT)
+
+
+def terminate_processes(pids, timeout, kill_timeout):
+    """Envia SIGTERM als `pids`, espera fins a `timeout` segons i fa SIGKILL als que quedin.
+
+    Retorna el conjunt de PID que continuen vius després d'esperar `kill_timeout`
+    segons més (normalment buit).
+    """
+    pids = set(pids)
+    if not pids:
+        return set()
+    _send_signal(pids, signal.SIGTERM)
+    # Un procés aturat (SIGSTOP) no atén SIGTERM fins que continua
+    _send_signal(pids, signal.SIGCONT)
+    remaining = wait_for_exit(pids, timeout)
+    if remaining:
+        print(f"Els processos {', '.join(map(str, sorted(remaining)))} no han respost a SIGTERM; s'envia SIGKILL.")
+        _send_signal(remaining, signal.SIGKILL)
+        remaining = wait_for_exit(remaining, kill_timeout)
+    return remaining
+
+
+def wait_until_ready(proc, probe, timeout):
+    """Espera que `probe()` sigui cert mentre el procés fill `proc` (Popen) segueixi viu.
+
+    La sonda es repeteix amb un interval creixent; entre sondes s'escolta el pidfd
+    del fill, de manera que si el procés mor l'espera acaba immediatament.
+    Retorna True si la sonda ha tingut èxit abans de `timeout`.
+    """
+    deadline = time.monotonic() + timeout
+    pidfd = _open_pidfd(proc.pid)
+    poller = select.poll()
+    if pidfd is not None:
+        poller.register(pidfd, select.POLLIN)
+    try:
+        delay = PROBE_FIRST_DELAY
+        while True:
+            if proc.poll() is not None:
+                return False
+            if probe():
+                return True
+            left = deadline - time.monotonic()
+            if left <= 0:
+                return False
+            wait = min(left, delay)
+            if pidfd is not None:
+                poller.poll(wait * 1000)
+            else:
+                time.sleep(wait)
+            delay = min(delay * 2, PROBE_MAX_DELAY)
+    finally:
+        if pidfd is not None:
+            os.close(pidfd)
@@ -0,0 +1,138 @@
+"""Supervisió del procés fill redshift-gtk: el recull quan surt i el reinicia si peta.
+
+Un fil propi espera la sortida del fill (pidfd o waitpid bloquejant, sense
+consultes periòdiques) i el recull de seguida, de manera que no queden
+processos zombis. Una sortida és inesperada si abans no s'ha cridat `release()` i el
+procés no ha acabat net (codi 0, p.ex. "Sortir" de la icona de la safata) ni per
+SIGTERM/SIGINT (algú l'ha tancat a propòsit). En aquest cas es torna a iniciar
+amb una espera que es dobla a cada fallada seguida, fins a RESTART_MAX_DELAY; si
+el procés ha aguantat STABLE_UPTIME segons, l'espera torna a començar des de
+RESTART_FIRST_DELAY.
+"""
+import os
+import select
+import signal
+import subprocess
+import threading
+import time
+
+RESTART_FIRST_DELAY = 1.0
+RESTART_MAX_DELAY = 60.0
+# Segons de funcionament a partir dels quals una sortida ja no compta com a fallada seguida
+STABLE_UPTIME = 30.0
+# Sortides que vol l'usuari i que, per tant, no fan reiniciar el procés
+DELIBERATE_EXIT_CODES = (0, -signal.SIGTERM, -signal.SIGINT)
+
+
+class RedshiftSupervisor:
+    def __init__(self, command, on_exit=None):
+        """`on_exit(codi, espera)` s'executa al fil de supervisió; `espera` és None si no es reinicia."""
+        self.command = list(command)
+        self.on_exit = on_exit
+        self._cond = threading.Condition()
+        self._proc = None
+        self._wanted = False
+        self._started_at = None
+        self._delay = RESTART_FIRST_DELAY
+        self._thread = None
+        self.restart_count = 0
+        self.last_exit_code = None
+
+    @property
+    def pid(self):
+        proc = self._proc
+        return proc.pid if proc is not None and proc.returncode is None else None
+
+    @property
+    def running(self):
+        return self.pid is not None
+
+    def uptime(self):
+        """Segons que fa que corre el fill actual, o None si no n'hi ha cap."""
+        started_at = self._started_at
+        if started_at is None or not self.running:
+            return None
+        return time.monotonic() - started_at
+
+    def start(self):
+        """Inicia el fill (si no n'hi ha cap de viu) i en comença la supervisió. Retorna el Popen."""
+        with self._cond:
+            self._wanted = True
+            self._delay = RESTART_FIRST_DELAY
+            # poll(): un fill que ja ha sortit però que el fil de supervisió encara no ha
+            # recollit té returncode None i no s'ha de prendre per viu
+            if self._proc is None or self._proc.poll() is not None:
+                try:
+                    self._spawn()
+                except OSError:
+                    self._wanted = False
+                    raise
+            proc = self._proc
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="redshift-supervisor", daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+        return proc
+
+    def release(self):
+        """Deixa de supervisar el fill (no es reiniciarà) i en retorna el Popen, o None."""
+        with self._cond:
+            self._wanted = False
+            self._cond.notify_all()
+            return self._proc if self.running else None
+
+    def _spawn(self):
+        self._proc = subprocess.Popen(self.command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        self._started_at = time.monotonic()
+
+    def _wait_exit(self, proc):
+        """Bloqueja fins que `proc` surt i el recull."""
+        pidfd = None
+        if hasattr(os, "pidfd_open"):
+            try:
+                pidfd = os.pidfd_open(proc.pid)
+            except OSError:
+                pass
+        if pidfd is not None:
+            # Amb el pidfd, Popen.poll() des d'altres fils segueix funcionant mentre esperem
+            try:
+                select.select([pidfd], [], [])
+            finally:
+                os.close(pidfd)
+        return proc.wait()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._proc is not None and self._proc.returncode is None)
+                proc = self._proc
+            returncode = self._wait_exit(proc)
+            with self._cond:
+                if proc is not self._proc:
+                    continue
+                self.last_exit_code = returncode
+                uptime = time.monotonic() - self._started_at
+                unexpected = self._wanted and returncode not in DELIBERATE_EXIT_CODES
+                if not unexpected:
+                    self._wanted = False
+                    delay = None
+                else:
+                    if uptime >= STABLE_UPTIME:
+                        self._delay = RESTART_FIRST_DELAY
+                    delay = self._delay
+                    self._delay = min(self._delay * 2, RESTART_MAX_DELAY)
+            if self.on_exit is not None:
+                self.on_exit(returncode, delay)
+            if delay is None:
+                continue
+            with self._cond:
+                # release() durant l'espera cancel·la el reinici; start() el fa de seguida
+                self._cond.wait_for(lambda: not self._wanted or self._proc is not proc, delay)
+                if not self._wanted or self._proc is not proc:
+                    continue
+                try:
+                    self._spawn()
+                    self.restart_count += 1
+                except OSError as e:
+                    print(f"No s'ha pogut reiniciar {self.command[0]}: {e}")
+                    self._wanted = False
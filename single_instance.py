@@ -0,0 +1,74 @@
+"""Una sola finestra oberta alhora: bloqueig amb flock i reenviament d'ordres.
+
+La primera instància agafa el bloqueig i escolta en un socket Unix propi. Les
+següents no creen cap finestra: envien la seva ordre (mostrar la finestra o
+activar un mode) a la instància en marxa, amb el mateix protocol que el dimoni
+de control (control_client.py), i surten.
+"""
+import fcntl
+import os
+import time
+
+from control_client import send_request
+from control_daemon import claim_socket
+from display_controller import APP_PREFS_DIR
+
+LOCK_NAME = "control_pantalla_mate-gui.lock"
+SOCKET_NAME = "control_pantalla_mate-gui.sock"
+# Temps que s'espera que la instància que té el bloqueig comenci a escoltar
+FORWARD_CONNECT_TIMEOUT = 2.0
+FORWARD_RETRY_DELAY = 0.05
+
+
+def instance_dir():
+    """$XDG_RUNTIME_DIR si existeix; si no, el directori de preferències."""
+    return os.environ.get("XDG_RUNTIME_DIR") or APP_PREFS_DIR
+
+
+class SingleInstance:
+    def __init__(self, directory=None):
+        self.directory = directory or instance_dir()
+        self.lock_path = os.path.join(self.directory, LOCK_NAME)
+        self.socket_path = os.path.join(self.directory, SOCKET_NAME)
+        self._lock_fd = None
+        self.listener = None
+
+    def acquire(self):
+        """Intenta agafar el bloqueig; retorna False si ja hi ha una altra instància."""
+        # Sense XDG_RUNTIME_DIR és el directori de preferències, que al primer ús encara no existeix
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT | os.O_CLOEXEC, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        self._lock_fd = fd
+        return True
+
+    def listen(self):
+        """Socket d'escolta per a les ordres de les altres instàncies (cal tenir el bloqueig)."""
+        self.listener = claim_socket(self.socket_path)
+        return self.listener
+
+    def forward(self, request):
+        """Envia `request` a la instància en marxa; retorna la resposta o None si no respon."""
+        deadline = time.monotonic() + FORWARD_CONNECT_TIMEOUT
+        while True:
+            response = send_request(request, self.socket_path)
+            if response is not None or time.monotonic() >= deadline:
+                return response
+            # Té el bloqueig però encara no escolta: s'està engegant
+            time.sleep(FORWARD_RETRY_DELAY)
+
+    def close(self):
+        if self.listener is not None:
+            self.listener.close()
+            self.listener = None
+            try:
+                os.unlink(self.socket_path)
+            except FileNotFoundError:
+                pass
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
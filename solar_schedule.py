@@ -0,0 +1,137 @@
+"""Hores de sortida i posta de sol calculades localment, amb una taula anual en memòria cau.
+
+Fa servir l'equació de la sortida del sol de la NOAA (anomalia mitjana,
+equació del centre, declinació i angle horari per a -0.833°, que inclou la
+refracció i el radi del disc solar). L'error és d'un o dos minuts, més que
+suficient per canviar de mode.
+
+La taula d'un any és una llista ordenada d'esdeveniments (instant UNIX, mode):
+"sol" a la sortida del sol i "lluna" a la posta. Es desa en JSON i només es
+recalcula si canvia l'any o la ubicació.
+"""
+import bisect
+import datetime
+import json
+import math
+
+from redshift_config import atomic_write_text
+
+SOLAR_TABLE_VERSION = 1
+# Altura del centre del sol a la sortida i a la posta (refracció + semidiàmetre)
+SUNRISE_ALTITUDE_DEG = -0.833
+OBLIQUITY_DEG = 23.4397
+J2000 = 2451545.0
+UNIX_EPOCH_JD = 2440587.5
+_J2000_ORDINAL = datetime.date(2000, 1, 1).toordinal()
+
+
+def _solar_day(day_number, lon):
+    """Trànsit solar (dia julià) i declinació (radiants) del dia `day_number` des de J2000."""
+    mean_solar_noon = day_number - lon / 360.0
+    m = math.radians((357.5291 + 0.98560028 * mean_solar_noon) % 360)
+    center = 1.9148 * math.sin(m) + 0.0200 * math.sin(2 * m) + 0.0003 * math.sin(3 * m)
+    ecliptic_lon = math.radians((math.degrees(m) + center + 180 + 102.9372) % 360)
+    transit = J2000 + mean_solar_noon + 0.0053 * math.sin(m) - 0.0069 * math.sin(2 * ecliptic_lon)
+    declination = math.asin(math.sin(ecliptic_lon) * math.sin(math.radians(OBLIQUITY_DEG)))
+    return transit, declination
+
+
+def _jd_to_unix(jd):
+    return (jd - UNIX_EPOCH_JD) * 86400.0
+
+
+def _unix_to_jd(timestamp):
+    return timestamp / 86400.0 + UNIX_EPOCH_JD
+
+
+def sun_events_for_day(date, lat, lon):
+    """(sortida, posta) en instants UNIX per al dia `date`, o (None, None) si és dia o nit polar."""
+    transit, declination = _solar_day(date.toordinal() - _J2000_ORDINAL, lon)
+    phi = math.radians(lat)
+    cos_hour_angle = ((math.sin(math.radians(SUNRISE_ALTITUDE_DEG)) - math.sin(phi) * math.sin(declination))
+                      / (math.cos(phi) * math.cos(declination)))
+    if not -1.0 <= cos_hour_angle <= 1.0:
+        return None, None
+    half_day = math.degrees(math.acos(cos_hour_angle)) / 360.0
+    return _jd_to_unix(transit - half_day), _jd_to_unix(transit + half_day)
+
+
+def sun_is_up(timestamp, lat, lon):
+    """Cert si a l'instant `timestamp` el sol és per sobre de l'horitzó a (lat, lon)."""
+    jd = _unix_to_jd(timestamp)
+    # Dia des de J2000 el migdia solar del qual és el més proper a l'instant
+    day_number = round(jd - J2000 + lon / 360.0)
+    transit, declination = _solar_day(day_number, lon)
+    hour_angle = math.radians((jd - transit) * 360.0)
+    phi = math.radians(lat)
+    sin_altitude = (math.sin(phi) * math.sin(declination)
+                    + math.cos(phi) * math.cos(declination) * math.cos(hour_angle))
+    return sin_altitude > math.sin(math.radians(SUNRISE_ALTITUDE_DEG))
+
+
+def build_year_events(year, lat, lon):
+    """Esdeveniments (instant, mode) ordenats des del 31 de desembre anterior fins a l'1 de gener següent."""
+    events = []
+    day = datetime.date(year, 1, 1) - datetime.timedelta(days=1)
+    last_day = datetime.date(year + 1, 1, 1)
+    while day <= last_day:
+        sunrise, sunset = sun_events_for_day(day, lat, lon)
+        if sunrise is not None:
+            events.append((int(sunrise), "sol"))
+            events.append((int(sunset), "lluna"))
+        day += datetime.timedelta(days=1)
+    events.sort()
+    return events
+
+
+def _location_key(lat, lon):
+    return [round(float(lat), 4), round(float(lon), 4)]
+
+
+def load_year_events(cache_path, year, lat, lon):
+    """Taula de l'any des de la memòria cau, o calculada (i desada) si no hi és o no és vàlida."""
+    try:
+        with open(cache_path, encoding='utf-8') as f:
+            cached = json.load(f)
+        if (cached.get("version") == SOLAR_TABLE_VERSION and cached.get("year") == year
+                and cached.get("location") == _location_key(lat, lon)):
+            return [(int(ts), mode) for ts, mode in cached["events"]]
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    events = build_year_events(year, lat, lon)
+    data = {"version": SOLAR_TABLE_VERSION, "year": year, "location": _location_key(lat, lon),
+            "events": events}
+    try:
+        atomic_write_text(cache_path, json.dumps(data))
+    except OSError as e:
+        print(f"No s'ha pogut desar la taula solar a {cache_path}: {e}")
+    return events
+
+
+class SolarScheduler:
+    """Propers canvis de mode per a una ubicació, a partir de les taules anuals."""
+
+    def __init__(self, lat, lon, cache_path):
+        self.lat = float(lat)
+        self.lon = float(lon)
+        self.cache_path = cache_path
+        self._tables = {}
+
+    def _table(self, year):
+        if year not in self._tables:
+            events = load_year_events(self.cache_path, year, self.lat, self.lon)
+            self._tables[year] = ([ts for ts, _ in events], [mode for _, mode in events])
+        return self._tables[year]
+
+    def mode_at(self, timestamp):
+        return "sol" if sun_is_up(timestamp, self.lat, self.lon) else "lluna"
+
+    def next_event(self, timestamp):
+        """(instant, mode) del primer canvi estrictament posterior a `timestamp`, o None (nit o dia polar)."""
+        year = datetime.date.fromtimestamp(timestamp).year
+        for table_year in (year, year + 1):
+            times, modes = self._table(table_year)
+            index = bisect.bisect_right(times, timestamp)
+            if index < len(times):
+                return times[index], modes[index]
+        return None
@@ -0,0 +1,37 @@
+"""Execució d'un graf petit de tasques amb dependències en un grup de fils."""
+from concurrent.futures import FIRST_COMPLETED, wait
+
+
+def run_task_graph(tasks, dependencies, executor):
+    """Executa `tasks` ({nom: funció sense arguments}) respectant `dependencies` ({nom: noms previs}).
+
+    Cada tasca comença tan bon punt han acabat totes les tasques de què depèn,
+    tant si han anat bé com si no; les dependències que no són a `tasks`
+    s'ignoren. Amb una sola tasca no es fa servir l'executor.
+    Retorna {nom: (resultat, excepció o None)}.
+    """
+    results = {}
+    if len(tasks) == 1:
+        (name, func), = tasks.items()
+        try:
+            results[name] = (func(), None)
+        except Exception as e:
+            results[name] = (None, e)
+        return results
+
+    waiting = {name: {dep for dep in dependencies.get(name, ()) if dep in tasks} for name in tasks}
+    running = {}
+    while waiting or running:
+        for name in [name for name, deps in waiting.items() if not deps]:
+            del waiting[name]
+            running[executor.submit(tasks[name])] = name
+        if not running:
+            raise ValueError(f"Dependències circulars entre: {', '.join(sorted(waiting))}")
+        done, _ = wait(running, return_when=FIRST_COMPLETED)
+        for future in done:
+            name = running.pop(future)
+            error = future.exception()
+            results[name] = (None, error) if error is not None else (future.result(), None)
+            for deps in waiting.values():
+                deps.discard(name)
+    return results
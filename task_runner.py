@@ -0,0 +1,89 @@
+"""Execució de la feina lenta (subprocessos, esperes) fora del fil principal de Tk."""
+import os
+import queue
+import threading
+import tkinter
+
+
+class TaskRunner:
+    """Un únic fil de treball que executa les tasques en ordre d'arribada.
+
+    Tk no és segur entre fils: les tasques no toquen mai els widgets directament,
+    sinó que passen per `call_in_ui()`, que encua la crida i escriu un byte en una
+    canonada que Tk vigila (`createfilehandler`). El fil principal es desperta
+    només quan hi ha alguna cosa a fer, tant si ve del fil de treball com d'un altre
+    (p.ex. el supervisor de Redshift amb l'aplicació inactiva), i no cal cap
+    temporitzador.
+    """
+
+    def __init__(self, master):
+        self.master = master
+        self._main_thread = threading.current_thread()
+        self._tasks = queue.Queue()
+        self._ui_calls = queue.Queue()
+        self._pending = 0  # Només es modifica des del fil principal
+        self._wake_read, self._wake_write = os.pipe()
+        os.set_blocking(self._wake_read, False)
+        os.set_blocking(self._wake_write, False)
+        master.tk.createfilehandler(self._wake_read, tkinter.READABLE, self._on_wake)
+        self._worker = threading.Thread(target=self._run, name="redshift-worker", daemon=True)
+        self._worker.start()
+
+    @property
+    def busy(self):
+        return self._pending > 0
+
+    def submit(self, func, *args, on_done=None, **kwargs):
+        """Encua `func(*args, **kwargs)`; `on_done(resultat)` s'executa al fil de Tk."""
+        self._pending += 1
+        self._tasks.put((func, args, kwargs, on_done))
+
+    def call_in_ui(self, func, *args):
+        """Executa `func(*args)` al fil de Tk; des d'un altre fil, tan aviat com el bucle de Tk la reculli."""
+        if threading.current_thread() is self._main_thread:
+            func(*args)
+        else:
+            self._post(func, args)
+
+    def _post(self, func, args):
+        self._ui_calls.put((func, args))
+        try:
+            os.write(self._wake_write, b"\0")
+        except BlockingIOError:
+            # Canonada plena: el fil principal ja té avisos pendents de llegir
+            pass
+
+    def _run(self):
+        while True:
+            func, args, kwargs, on_done = self._tasks.get()
+            result = None
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                print(f"Error no controlat executant {getattr(func, '__name__', func)}: {e}")
+                on_done = None
+            self._post(self._task_finished, (on_done, result))
+
+    def _task_finished(self, on_done, result):
+        self._pending -= 1
+        if on_done is not None:
+            on_done(result)
+
+    def _on_wake(self, fd, mask):
+        try:
+            while os.read(fd, 4096):
+                pass
+        except BlockingIOError:
+            pass
+        self._drain()
+
+    def _drain(self):
+        while True:
+            try:
+                func, args = self._ui_calls.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                func(*args)
+            except Exception as e:
+                print(f"Error actualitzant la interfície: {e}")
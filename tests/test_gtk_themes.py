@@ -0,0 +1,97 @@
+"""Proves de la descoberta de temes i de l'índex persistent."""
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import gtk_themes  # noqa: E402
+from gtk_themes import (THEME_DARK, THEME_GTK3, THEME_INDEX, THEME_METACITY,  # noqa: E402
+                        find_themes_by_root, window_theme_for)
+
+
+class FindThemesByRootTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.tmp.name, "themes")
+        self.index_path = os.path.join(self.tmp.name, "theme_index.json")
+        os.mkdir(self.root)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def make_theme(self, name, *entries, metacity_theme=None):
+        theme_dir = os.path.join(self.root, name)
+        os.makedirs(theme_dir, exist_ok=True)
+        for entry in entries:
+            os.makedirs(os.path.join(theme_dir, entry), exist_ok=True)
+        if metacity_theme is not None:
+            with open(os.path.join(theme_dir, "index.theme"), "w") as f:
+                f.write(f"[X-GNOME-Metatheme]\nMetacityTheme={metacity_theme}\n")
+
+    def find(self):
+        return find_themes_by_root([self.root, os.path.join(self.tmp.name, "absent")], self.index_path)[self.root]
+
+    def test_capabilities(self):
+        self.make_theme("Ambiant-MATE", "gtk-3.0", "metacity-1")
+        self.make_theme("Ambiant-MATE-Dark", "gtk-3.0", metacity_theme="Ambiant-MATE")
+        self.make_theme("Icones")
+        themes = self.find()
+        self.assertEqual(themes["Ambiant-MATE"], [THEME_GTK3 | THEME_METACITY, None])
+        self.assertEqual(themes["Ambiant-MATE-Dark"], [THEME_GTK3 | THEME_INDEX | THEME_DARK, "Ambiant-MATE"])
+        self.assertNotIn("Icones", themes)
+        self.assertEqual(window_theme_for(themes, "Ambiant-MATE-Dark"), "Ambiant-MATE")
+
+    def test_unchanged_root_is_reused_without_listing(self):
+        self.make_theme("Ambiant-MATE", "gtk-3.0")
+        first = self.find()
+        with mock.patch.object(gtk_themes, "scan_theme_dir") as scan, \
+                mock.patch("os.scandir", side_effect=AssertionError("no s'ha de llistar")):
+            self.assertEqual(self.find(), first)
+        scan.assert_not_called()
+
+    def test_changed_root_rescans_only_changed_themes(self):
+        self.make_theme("Ambiant-MATE", "gtk-3.0")
+        self.find()
+        self.make_theme("Nou", "metacity-1")
+        with mock.patch.object(gtk_themes, "scan_theme_dir", wraps=gtk_themes.scan_theme_dir) as scan:
+            themes = self.find()
+        self.assertEqual([call.args[0] for call in scan.call_args_list], [os.path.join(self.root, "Nou")])
+        self.assertEqual(set(themes), {"Ambiant-MATE", "Nou"})
+
+    def test_removed_theme_disappears(self):
+        self.make_theme("Ambiant-MATE", "gtk-3.0")
+        self.make_theme("Vell", "gtk-3.0")
+        self.find()
+        os.rmdir(os.path.join(self.root, "Vell", "gtk-3.0"))
+        os.rmdir(os.path.join(self.root, "Vell"))
+        self.assertEqual(set(self.find()), {"Ambiant-MATE"})
+
+    def test_in_place_edit_is_picked_up_on_root_change(self):
+        self.make_theme("Ambiant-MATE", "gtk-3.0")
+        self.find()
+        self.make_theme("Ambiant-MATE", "metacity-1")
+        # El mtime de l'arrel no ha canviat: es manté l'índex desat
+        self.assertEqual(self.find()["Ambiant-MATE"][0], THEME_GTK3)
+        self.make_theme("Nou", "gtk-3.0")
+        self.assertEqual(self.find()["Ambiant-MATE"][0], THEME_GTK3 | THEME_METACITY)
+
+    def test_replaced_root_is_rescanned(self):
+        self.make_theme("Ambiant-MATE", "gtk-3.0")
+        self.find()
+        os.rename(self.root, self.root + ".old")
+        os.mkdir(self.root)
+        self.make_theme("Altre", "gtk-3.0")
+        self.assertEqual(set(self.find()), {"Altre"})
+
+    def test_corrupt_index_is_rebuilt(self):
+        self.make_theme("Ambiant-MATE", "gtk-3.0")
+        with open(self.index_path, "w") as f:
+            f.write("{no és json")
+        self.assertEqual(set(self.find()), {"Ambiant-MATE"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+"""Proves de la planificació d'accions en canviar entre Sol i Lluna."""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mode_reconciler import (ACTION_APPLY_GAMMA, ACTION_APPLY_THEME, ACTION_RESET_GAMMA,  # noqa: E402
+                             ACTION_START_REDSHIFT, ACTION_STOP_REDSHIFT, DesiredState, DesktopState,
+                             plan_actions)
+
+
+def desktop(gtk_theme="Ambiant-MATE", window_theme="Ambiant-MATE", redshift_gtk_pids=(),
+            redshift_pids=(), gamma=None, tinted=False):
+    return DesktopState(gtk_theme, window_theme, list(redshift_gtk_pids), list(redshift_pids), gamma, tinted)
+
+
+SOL = DesiredState("sol", "Ambiant-MATE", "Ambiant-MATE", redshift_running=False, gamma=None)
+LLUNA_NATIU = DesiredState("lluna", "Ambiant-MATE-Dark", "Ambiant-MATE-Dark", redshift_running=False,
+                           gamma=(3500, 0.8))
+LLUNA_REDSHIFT = DesiredState("lluna", "Ambiant-MATE-Dark", "Ambiant-MATE-Dark", redshift_running=True,
+                              gamma=None)
+
+
+class PlanActionsTest(unittest.TestCase):
+    def test_nothing_to_do_when_already_applied(self):
+        actions, skipped = plan_actions(desktop(), SOL)
+        self.assertEqual(actions, [])
+        self.assertEqual(len(skipped), 2)
+
+    def test_switch_to_lluna_with_native_gamma(self):
+        actions, _ = plan_actions(desktop(redshift_pids=[42]), LLUNA_NATIU)
+        self.assertEqual(actions, [ACTION_STOP_REDSHIFT, ACTION_APPLY_GAMMA, ACTION_APPLY_THEME])
+
+    def test_gamma_already_applied_is_skipped(self):
+        current = desktop("Ambiant-MATE-Dark", "Ambiant-MATE-Dark", gamma=(3500, 0.8))
+        actions, skipped = plan_actions(current, LLUNA_NATIU)
+        self.assertEqual(actions, [])
+        self.assertIn("la gamma ja estava aplicada", skipped)
+
+    def test_gamma_is_compared_normalized(self):
+        current = desktop("Ambiant-MATE-Dark", "Ambiant-MATE-Dark", gamma=(3500, 0.8))
+        desired = LLUNA_NATIU._replace(gamma=(3500.0, 0.801))
+        self.assertEqual(plan_actions(current, desired)[0], [])
+
+    def test_redshift_gtk_already_running(self):
+        current = desktop("Ambiant-MATE-Dark", "Ambiant-MATE-Dark", redshift_gtk_pids=[7])
+        actions, skipped = plan_actions(current, LLUNA_REDSHIFT)
+        self.assertNotIn(ACTION_START_REDSHIFT, actions)
+        self.assertIn("Redshift ja estava actiu", skipped)
+
+    def test_bare_redshift_does_not_count_as_running(self):
+        current = desktop("Ambiant-MATE-Dark", "Ambiant-MATE-Dark", redshift_pids=[7])
+        self.assertEqual(plan_actions(current, LLUNA_REDSHIFT)[0], [ACTION_START_REDSHIFT])
+
+    def test_oneshot_tint_is_reset_when_nothing_else_will(self):
+        actions, _ = plan_actions(desktop(tinted=True), SOL)
+        self.assertEqual(actions, [ACTION_RESET_GAMMA])
+
+    def test_oneshot_tint_left_to_redshift(self):
+        current = desktop("Ambiant-MATE-Dark", "Ambiant-MATE-Dark", tinted=True)
+        self.assertNotIn(ACTION_RESET_GAMMA, plan_actions(current, LLUNA_REDSHIFT)[0])
+
+    def test_window_theme_none_is_left_alone(self):
+        desired = SOL._replace(window_theme=None)
+        self.assertEqual(plan_actions(desktop(window_theme="Altre"), desired)[0], [])
+
+    def test_different_window_theme_reapplies_theme(self):
+        self.assertEqual(plan_actions(desktop(window_theme="Altre"), SOL)[0], [ACTION_APPLY_THEME])
+
+
+if __name__ == "__main__":
+    unittest.main()
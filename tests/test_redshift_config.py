@@ -0,0 +1,55 @@
+"""Proves de l'escriptura de redshift.conf."""
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from redshift_config import (atomic_write_text, redshift_config_is_current,  # noqa: E402
+                             render_redshift_config, write_redshift_config)
+
+
+class WriteRedshiftConfigTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "redshift.conf")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_writes_once_and_skips_identical(self):
+        self.assertTrue(write_redshift_config(self.path, 3500, 0.8))
+        self.assertTrue(redshift_config_is_current(self.path, 3500, 0.8))
+        mtime = os.stat(self.path).st_mtime_ns
+        self.assertFalse(write_redshift_config(self.path, 3500, 0.8))
+        self.assertEqual(os.stat(self.path).st_mtime_ns, mtime)
+        self.assertTrue(write_redshift_config(self.path, 4000, 0.8))
+        self.assertFalse(redshift_config_is_current(self.path, 3500, 0.8))
+
+    def test_keeps_permissions(self):
+        write_redshift_config(self.path, 3500, 0.8)
+        os.chmod(self.path, 0o600)
+        write_redshift_config(self.path, 4000, 0.8)
+        self.assertEqual(os.stat(self.path).st_mode & 0o777, 0o600)
+
+    def test_writes_through_symlink(self):
+        target = os.path.join(self.tmp.name, "dotfiles.conf")
+        write_redshift_config(target, 3500, 0.8)
+        os.symlink(target, self.path)
+        write_redshift_config(self.path, 4000, 0.8)
+        self.assertTrue(os.path.islink(self.path))
+        self.assertTrue(redshift_config_is_current(target, 4000, 0.8))
+
+    def test_failed_write_leaves_old_file_and_no_temporaries(self):
+        write_redshift_config(self.path, 3500, 0.8)
+        with mock.patch("os.fsync", side_effect=OSError("disc ple")):
+            with self.assertRaises(OSError):
+                atomic_write_text(self.path, render_redshift_config(4000, 0.8))
+        self.assertTrue(redshift_config_is_current(self.path, 3500, 0.8))
+        self.assertEqual(os.listdir(self.tmp.name), ["redshift.conf"])
+
+
+if __name__ == "__main__":
+    unittest.main()
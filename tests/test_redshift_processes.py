@@ -0,0 +1,77 @@
+"""Proves de la lectura de /proc amb un directori /proc fals."""
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from redshift_processes import UNSET_SESSION_ID, ProcessScanner  # noqa: E402
+
+
+class ProcessScannerTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.proc_dir = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def add_process(self, pid, comm, state="S", session_id="3"):
+        path = os.path.join(self.proc_dir, str(pid))
+        os.mkdir(path)
+        with open(os.path.join(path, "comm"), "w") as f:
+            f.write(comm + "\n")
+        with open(os.path.join(path, "stat"), "w") as f:
+            # El nom pot contenir ") "; l'estat és el camp després de l'últim ")"
+            f.write(f"{pid} ({comm}) x) {state} 1 {pid} {pid} 0 -1\n")
+        with open(os.path.join(path, "sessionid"), "w") as f:
+            f.write(session_id)
+
+    def scanner(self, **kwargs):
+        return ProcessScanner(["redshift", "redshift-gtk"], ttl=0, proc_dir=self.proc_dir, **kwargs)
+
+    def test_finds_watched_processes(self):
+        self.add_process(100, "redshift")
+        self.add_process(101, "redshift-gtk")
+        self.add_process(102, "bash")
+        os.mkdir(os.path.join(self.proc_dir, "self"))
+        found = self.scanner().scan()
+        self.assertEqual(found, {"redshift": [100], "redshift-gtk": [101]})
+
+    def test_zombies_are_skipped(self):
+        self.add_process(100, "redshift", state="Z")
+        self.add_process(101, "redshift", state="X")
+        self.add_process(102, "redshift")
+        self.assertEqual(self.scanner().pids("redshift"), [102])
+
+    def test_stopped_processes(self):
+        self.add_process(100, "redshift", state="T")
+        self.add_process(101, "redshift")
+        scanner = self.scanner()
+        self.assertEqual(sorted(scanner.pids("redshift")), [100, 101])
+        self.assertEqual(scanner.stopped_pids("redshift"), [100])
+
+    def test_other_users_are_skipped(self):
+        self.add_process(100, "redshift")
+        self.assertEqual(self.scanner(owner_uid=os.getuid()).pids("redshift"), [100])
+        self.assertEqual(self.scanner(owner_uid=os.getuid() + 1).pids("redshift"), [])
+
+    def test_other_sessions_are_skipped(self):
+        self.add_process(100, "redshift", session_id="3")
+        self.add_process(101, "redshift", session_id="4")
+        # Servei de l'usuari sense sessió: compta per a totes
+        self.add_process(102, "redshift", session_id=UNSET_SESSION_ID)
+        self.assertEqual(sorted(self.scanner(session_id="3").pids("redshift")), [100, 102])
+
+    def test_snapshot_is_reused_until_invalidated(self):
+        scanner = ProcessScanner(["redshift"], ttl=60, proc_dir=self.proc_dir)
+        self.assertFalse(scanner.is_running("redshift"))
+        self.add_process(100, "redshift")
+        self.assertFalse(scanner.is_running("redshift"))
+        scanner.invalidate()
+        self.assertTrue(scanner.is_running("redshift"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+"""Proves de les hores de sortida i posta de sol i de la taula anual."""
+import datetime
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from solar_schedule import SolarScheduler, load_year_events, sun_events_for_day, sun_is_up  # noqa: E402
+
+BARCELONA = (41.39, 2.17)
+# Marge respecte a les efemèrides publicades (l'aproximació de la NOAA erra un o dos minuts)
+TOLERANCE = 3 * 60
+
+
+def utc(*args):
+    return datetime.datetime(*args, tzinfo=datetime.timezone.utc).timestamp()
+
+
+class SunEventsTest(unittest.TestCase):
+    def test_barcelona_summer_solstice(self):
+        sunrise, sunset = sun_events_for_day(datetime.date(2024, 6, 21), *BARCELONA)
+        self.assertAlmostEqual(sunrise, utc(2024, 6, 21, 4, 18), delta=TOLERANCE)
+        self.assertAlmostEqual(sunset, utc(2024, 6, 21, 19, 29), delta=TOLERANCE)
+
+    def test_barcelona_winter_solstice(self):
+        sunrise, sunset = sun_events_for_day(datetime.date(2024, 12, 21), *BARCELONA)
+        self.assertAlmostEqual(sunrise, utc(2024, 12, 21, 7, 13), delta=TOLERANCE)
+        self.assertAlmostEqual(sunset, utc(2024, 12, 21, 16, 27), delta=TOLERANCE)
+
+    def test_polar_day_and_night(self):
+        self.assertEqual(sun_events_for_day(datetime.date(2024, 6, 21), 78.2, 15.6), (None, None))
+        self.assertEqual(sun_events_for_day(datetime.date(2024, 12, 21), 78.2, 15.6), (None, None))
+        self.assertTrue(sun_is_up(utc(2024, 6, 21, 0, 0), 78.2, 15.6))
+        self.assertFalse(sun_is_up(utc(2024, 12, 21, 12, 0), 78.2, 15.6))
+
+    def test_sun_is_up_around_events(self):
+        sunrise, sunset = sun_events_for_day(datetime.date(2024, 3, 20), *BARCELONA)
+        self.assertFalse(sun_is_up(sunrise - 120, *BARCELONA))
+        self.assertTrue(sun_is_up(sunrise + 120, *BARCELONA))
+        self.assertTrue(sun_is_up(sunset - 120, *BARCELONA))
+        self.assertFalse(sun_is_up(sunset + 120, *BARCELONA))
+
+
+class SolarSchedulerTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache_path = os.path.join(self.tmp.name, "solar.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_next_event_alternates(self):
+        scheduler = SolarScheduler(*BARCELONA, self.cache_path)
+        noon = utc(2024, 6, 21, 12, 0)
+        self.assertEqual(scheduler.mode_at(noon), "sol")
+        sunset, mode = scheduler.next_event(noon)
+        self.assertEqual(mode, "lluna")
+        self.assertEqual(scheduler.mode_at(sunset + 60), "lluna")
+        sunrise, mode = scheduler.next_event(sunset)
+        self.assertEqual(mode, "sol")
+        self.assertGreater(sunrise, sunset)
+
+    def test_next_event_crosses_new_year(self):
+        scheduler = SolarScheduler(*BARCELONA, self.cache_path)
+        _, mode = scheduler.next_event(utc(2024, 12, 31, 22, 0))
+        self.assertEqual(mode, "sol")
+
+    def test_table_is_cached_per_location(self):
+        events = load_year_events(self.cache_path, 2024, *BARCELONA)
+        with open(self.cache_path, encoding="utf-8") as f:
+            cached = json.load(f)
+        self.assertEqual(cached["year"], 2024)
+        self.assertEqual(load_year_events(self.cache_path, 2024, *BARCELONA), events)
+        madrid = load_year_events(self.cache_path, 2024, 40.42, -3.70)
+        self.assertNotEqual(madrid, events)
+
+
+if __name__ == "__main__":
+    unittest.main()
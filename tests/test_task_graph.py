@@ -0,0 +1,68 @@
+"""Proves de l'execució del graf de tasques amb dependències."""
+import os
+import sys
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from task_graph import run_task_graph  # noqa: E402
+
+
+class RunTaskGraphTest(unittest.TestCase):
+    def setUp(self):
+        self.executor = ThreadPoolExecutor(max_workers=4)
+        self.order = []
+        self.lock = threading.Lock()
+
+    def tearDown(self):
+        self.executor.shutdown()
+
+    def task(self, name, result=None, error=None):
+        def run():
+            with self.lock:
+                self.order.append(name)
+            if error is not None:
+                raise error
+            return result
+        return run
+
+    def test_dependency_runs_first(self):
+        tasks = {"stop": self.task("stop", 1), "gamma": self.task("gamma", 2), "theme": self.task("theme", 3)}
+        results = run_task_graph(tasks, {"gamma": ("stop",)}, self.executor)
+        self.assertLess(self.order.index("stop"), self.order.index("gamma"))
+        self.assertEqual(results, {"stop": (1, None), "gamma": (2, None), "theme": (3, None)})
+
+    def test_failure_is_reported_and_dependants_still_run(self):
+        error = RuntimeError("no s'ha pogut aturar")
+        tasks = {"stop": self.task("stop", error=error), "gamma": self.task("gamma", 2)}
+        results = run_task_graph(tasks, {"gamma": ("stop",)}, self.executor)
+        self.assertEqual(results["stop"], (None, error))
+        self.assertEqual(results["gamma"], (2, None))
+        self.assertEqual(self.order, ["stop", "gamma"])
+
+    def test_missing_dependencies_are_ignored(self):
+        results = run_task_graph({"gamma": self.task("gamma", 2), "theme": self.task("theme", 3)},
+                                 {"gamma": ("stop",)}, self.executor)
+        self.assertEqual(results["gamma"], (2, None))
+
+    def test_single_task_runs_inline(self):
+        tasks = {"theme": lambda: threading.current_thread()}
+        results = run_task_graph(tasks, {}, None)
+        self.assertIs(results["theme"][0], threading.current_thread())
+
+    def test_single_task_failure(self):
+        error = ValueError("tema")
+        self.assertEqual(run_task_graph({"theme": self.task("theme", error=error)}, {}, None),
+                         {"theme": (None, error)})
+
+    def test_cycle_raises(self):
+        tasks = {"a": self.task("a"), "b": self.task("b")}
+        with self.assertRaises(ValueError):
+            run_task_graph(tasks, {"a": ("b",), "b": ("a",)}, self.executor)
+        self.assertEqual(self.order, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,168 @@
+"""Proves del motor natiu de gamma; no necessiten cap servidor X (es fa servir un Xlib fals)."""
+import ctypes
+import os
+import sys
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import xrandr_gamma  # noqa: E402
+from xrandr_gamma import (NEUTRAL_GAMMA, NEUTRAL_TEMP, RAMP_CACHE_SIZE, RR_CONNECTED, GammaEngine,  # noqa: E402
+                          OutputProfile, compute_ramps, whitepoint)
+
+
+class ComputeRampsTest(unittest.TestCase):
+    def test_neutral_is_identity(self):
+        red, green, blue = compute_ramps(256, NEUTRAL_TEMP, 1.0)
+        self.assertEqual(len(red), 256)
+        self.assertEqual(red[0], 0)
+        self.assertEqual(red[-1], 65535)
+        self.assertEqual(list(red), list(green))
+        self.assertEqual(list(green), list(blue))
+
+    def test_warm_temperature_dims_blue(self):
+        red, green, blue = compute_ramps(256, 3000, 1.0)
+        self.assertEqual(red[-1], 65535)
+        self.assertLess(green[-1], red[-1])
+        self.assertLess(blue[-1], green[-1])
+
+    def test_brightness_scales_top(self):
+        red, _, _ = compute_ramps(256, NEUTRAL_TEMP, 0.5)
+        self.assertEqual(red[-1], int(0.5 * 65535 + 0.5))
+
+    def test_gamma_bends_midpoint(self):
+        linear, _, _ = compute_ramps(256, NEUTRAL_TEMP, 1.0)
+        bright, _, dark = compute_ramps(256, NEUTRAL_TEMP, 1.0, (2.0, 1.0, 0.5))
+        self.assertGreater(bright[128], linear[128])
+        self.assertLess(dark[128], linear[128])
+        self.assertEqual(bright[-1], linear[-1])
+
+    def test_whitepoint_is_clamped(self):
+        self.assertEqual(whitepoint(100), whitepoint(1000))
+        self.assertEqual(whitepoint(NEUTRAL_TEMP), (1.0, 1.0, 1.0))
+
+
+class FakeX:
+    """Xlib i XRandR falsos: sortides connectades fixes i registre de les rampes escrites."""
+
+    def __init__(self, outputs):
+        # [(nom de sortida, crtc, mida de la rampa)]
+        self.outputs = outputs
+        self.writes = []
+
+    def load_library(self, name):
+        def ptr(**fields):
+            return SimpleNamespace(contents=SimpleNamespace(**fields))
+
+        def output_info(display, resources, index):
+            name, crtc, _ = self.outputs[index]
+            return ptr(connection=RR_CONNECTED, crtc=crtc, name=name.encode(), nameLen=len(name))
+
+        def alloc_gamma(size):
+            return ptr(size=size, red=(ctypes.c_ushort * size)(), green=(ctypes.c_ushort * size)(),
+                       blue=(ctypes.c_ushort * size)())
+
+        def set_crtc_gamma(display, crtc, xgamma):
+            g = xgamma.contents
+            self.writes.append((crtc, (list(g.red), list(g.green), list(g.blue))))
+
+        functions = {
+            "X11": dict(XOpenDisplay=lambda name: 1, XDefaultRootWindow=lambda display: 1,
+                        XCloseDisplay=lambda display: 0, XFlush=lambda display: 0,
+                        XPending=lambda display: 0, XNextEvent=lambda display, event: 0),
+            "Xrandr": dict(
+                XRRGetScreenResourcesCurrent=lambda display, root: ptr(
+                    noutput=len(self.outputs), outputs=list(range(len(self.outputs)))),
+                XRRFreeScreenResources=lambda resources: None,
+                XRRGetOutputInfo=output_info,
+                XRRFreeOutputInfo=lambda info: None,
+                XRRQueryExtension=lambda display, event_base, error_base: 0,
+                XRRSelectInput=lambda display, window, mask: None,
+                XRRGetCrtcGammaSize=lambda display, crtc: next(s for _, c, s in self.outputs if c == crtc),
+                XRRAllocGamma=alloc_gamma,
+                XRRFreeGamma=lambda xgamma: None,
+                XRRSetCrtcGamma=set_crtc_gamma),
+        }[name]
+        # Com les funcions de ctypes, han d'acceptar restype i argtypes
+        return SimpleNamespace(**{key: (lambda f: lambda *a: f(*a))(f) for key, f in functions.items()})
+
+
+def ramps_list(ramps):
+    return tuple(list(ramp) for ramp in ramps)
+
+
+class GammaEngineTest(unittest.TestCase):
+    def setUp(self):
+        self.x = FakeX([("HDMI-1", 1, 16), ("DP-1", 2, 16)])
+        patches = [mock.patch.object(xrandr_gamma, "_load_library", self.x.load_library),
+                   mock.patch.object(xrandr_gamma, "compute_ramps", wraps=compute_ramps)]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.compute = xrandr_gamma.compute_ramps
+        self.engine = GammaEngine()
+
+    def written(self, crtc):
+        return [ramps for c, ramps in self.x.writes if c == crtc][-1]
+
+    def test_outputs(self):
+        self.assertEqual(self.engine.outputs(), ["HDMI-1", "DP-1"])
+        self.assertTrue(self.engine.available())
+
+    def test_apply_writes_every_crtc(self):
+        self.engine.apply(4000, 0.8)
+        self.assertEqual(self.written(1), ramps_list(compute_ramps(16, 4000, 0.8)))
+        self.assertEqual(self.written(2), self.written(1))
+        self.assertEqual(self.engine.last_applied, (4000, 0.8))
+
+    def test_same_request_reuses_ramps(self):
+        self.engine.apply(4000, 0.8)
+        # Els dos CRTC tenen la mateixa mida: les rampes es calculen una vegada
+        self.assertEqual(self.compute.call_count, 1)
+
+    def test_unchanged_crtcs_are_not_rewritten(self):
+        self.engine.apply(4000, 0.8)
+        self.engine.apply(4000, 0.8)
+        self.assertEqual(len(self.x.writes), 2)
+        self.engine.reset()
+        self.engine.invalidate()
+        self.engine.apply(NEUTRAL_TEMP, 1.0)
+        self.assertEqual(len(self.x.writes), 6)
+
+    def test_cache_is_bounded(self):
+        for temp in range(3000, 3000 + RAMP_CACHE_SIZE):
+            self.engine.apply(temp, 1.0)
+        self.engine.apply(3000, 1.0)
+        self.assertEqual(self.compute.call_count, RAMP_CACHE_SIZE)
+        self.engine.apply(3000 + RAMP_CACHE_SIZE, 1.0)
+        # La memòria cau és plena: en surt la rampa més antiga
+        self.engine.apply(3000, 1.0)
+        self.assertEqual(self.compute.call_count, RAMP_CACHE_SIZE + 2)
+
+    def test_pinned_ramps_survive_eviction(self):
+        self.engine.precompute([(4500, 0.9, NEUTRAL_GAMMA)])
+        for temp in range(3000, 3000 + RAMP_CACHE_SIZE + 5):
+            self.engine.apply(temp, 1.0)
+        calls = self.compute.call_count
+        self.engine.apply(4500, 0.9)
+        self.assertEqual(self.compute.call_count, calls)
+        self.assertEqual(self.written(1), ramps_list(compute_ramps(16, 4500, 0.9)))
+
+    def test_output_profile_shifts_values(self):
+        self.engine.set_output_profiles({"HDMI-1": OutputProfile(-500, 0.5, NEUTRAL_GAMMA)})
+        self.engine.apply(4000, 0.8)
+        self.assertEqual(self.written(1), ramps_list(compute_ramps(16, 3500, 0.4)))
+        self.assertEqual(self.written(2), ramps_list(compute_ramps(16, 4000, 0.8)))
+
+    def test_output_profile_gamma_multiplies_requested(self):
+        self.engine.set_output_profiles({"HDMI-1": OutputProfile(0, 1.0, (1.0, 0.5, 2.0))})
+        self.engine.apply(4000, 0.8, (0.8, 0.9, 1.0))
+        self.assertEqual(self.written(1), ramps_list(compute_ramps(16, 4000, 0.8, (0.8, 0.45, 2.0))))
+        # Amb una correcció de gamma general, last_applied no descriu el mode
+        self.assertIsNone(self.engine.last_applied)
+
+
+if __name__ == "__main__":
+    unittest.main()
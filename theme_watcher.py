@@ -0,0 +1,200 @@
+"""Vigilància dels directoris de temes amb inotify (via ctypes, sense dependències)."""
+import ctypes
+import ctypes.util
+import os
+import struct
+
+from gtk_themes import is_theme, scan_theme_dir
+
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CLOSE_WRITE = 0x00000008
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+
+_EVENT_HEADER = struct.Struct("iIII")
+_ROOT_MASK = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+# Dins d'un tema nou: també IN_CLOSE_WRITE, perquè index.theme es crea buit i s'omple després
+_PENDING_MASK = IN_CREATE | IN_MOVED_TO | IN_CLOSE_WRITE | IN_ONLYDIR
+_THEME_ENTRIES = ("gtk-2.0", "gtk-3.0", "metacity-1", "index.theme")
+_READ_SIZE = 64 * 1024
+
+
+class Inotify:
+    """Embolcall mínim de inotify_init1/inotify_add_watch/inotify_rm_watch."""
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._rm_watch = libc.inotify_rm_watch
+        self._rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self.fd = fd
+
+    def add_watch(self, path, mask):
+        wd = self._add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), path)
+        return wd
+
+    def rm_watch(self, wd):
+        self._rm_watch(self.fd, wd)
+
+    def read_events(self):
+        """Retorna una llista de (wd, mask, nom) amb tots els esdeveniments disponibles."""
+        events = []
+        while True:
+            try:
+                data = os.read(self.fd, _READ_SIZE)
+            except BlockingIOError:
+                return events
+            offset = 0
+            while offset < len(data):
+                wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+                offset += length
+                events.append((wd, mask, name))
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class ThemeWatcher:
+    """Manté el conjunt de temes instal·lats al dia i n'informa amb deltes.
+
+    Cada esdeveniment d'inotify es tradueix en una crida a `on_added(nom, info)`
+    (info = [capacitats, tema Marco], vegeu gtk_themes.py) o `on_removed(nom)`
+    només quan el conjunt global canvia; mai es torna a escanejar cap arrel
+    sencera. Un tema que apareix mentre s'executa (p.ex. a mig copiar) es
+    continua vigilant fins que s'elimina: cada cop que s'hi afegeix gtk-3.0,
+    metacity-1 o index.theme es torna a llegir, i si en canvia la informació es
+    torna a cridar `on_added` amb la nova.
+    """
+
+    def __init__(self, theme_paths, on_added, on_removed, initial_themes=None):
+        self.on_added = on_added
+        self.on_removed = on_removed
+        self.inotify = Inotify()
+        self._roots = {}  # wd -> arrel de temes
+        self._pending = {}  # wd -> (arrel, nom d'un tema aparegut en execució)
+        self._missing = {}  # wd del directori pare -> arrel que encara no existeix
+        self._themes = {}  # arrel -> {tema: [capacitats, tema Marco]}
+        # Si ja es coneix el contingut de cada arrel (índex de temes) no cal llistar-la
+        initial_themes = initial_themes or {}
+        for path in theme_paths:
+            self._watch_root(path, initial_themes.get(path))
+
+    @property
+    def fd(self):
+        return self.inotify.fd
+
+    def themes(self):
+        return set().union(*self._themes.values()) if self._themes else set()
+
+    def _watch_root(self, path, known_themes=None):
+        try:
+            wd = self.inotify.add_watch(path, _ROOT_MASK)
+        except OSError:
+            # Si l'arrel no existeix, es vigila el directori pare fins que es creï
+            try:
+                parent_wd = self.inotify.add_watch(os.path.dirname(path), IN_CREATE | IN_MOVED_TO | IN_ONLYDIR)
+                self._missing[parent_wd] = path
+            except OSError as e:
+                print(f"No es pot vigilar {path}: {e}")
+            return
+        self._roots[wd] = path
+        if known_themes is not None:
+            self._themes[path] = dict(known_themes)
+            return
+        self._themes[path] = {}
+        # Arrel nova: es llista una sola vegada, en començar a vigilar-la
+        try:
+            names = os.listdir(path)
+        except OSError:
+            names = []
+        for name in names:
+            self._theme_appeared(path, name, settling=False)
+
+    def _theme_appeared(self, root, name, settling=True):
+        """Tema nou a `root`; amb `settling`, se'n vigila el contingut encara que ja sigui vàlid."""
+        theme_dir = os.path.join(root, name)
+        info = scan_theme_dir(theme_dir)
+        if is_theme(info):
+            self._add(root, name, info)
+        if (settling or not is_theme(info)) and os.path.isdir(theme_dir):
+            try:
+                wd = self.inotify.add_watch(theme_dir, _PENDING_MASK)
+                self._pending[wd] = (root, name)
+            except OSError:
+                pass
+
+    def _add(self, root, name, info):
+        was_present = name in self.themes()
+        root_themes = self._themes.setdefault(root, {})
+        previous = root_themes.get(name)
+        root_themes[name] = info
+        if not was_present or (previous is not None and previous != info):
+            self.on_added(name, info)
+
+    def _remove(self, root, name):
+        themes = self._themes.get(root, {})
+        if name not in themes:
+            return
+        del themes[name]
+        if name not in self.themes():
+            self.on_removed(name)
+
+    def _drop_pending(self, root, name):
+        for wd, value in list(self._pending.items()):
+            if value == (root, name):
+                self.inotify.rm_watch(wd)
+                del self._pending[wd]
+
+    def handle_events(self, *args):
+        """Processa els esdeveniments pendents (callback del descriptor de fitxer)."""
+        for wd, mask, name in self.inotify.read_events():
+            if mask & IN_IGNORED:
+                self._roots.pop(wd, None)
+                self._pending.pop(wd, None)
+                continue
+            if wd in self._roots:
+                root = self._roots[wd]
+                if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                    for theme in list(self._themes.get(root, ())):
+                        self._remove(root, theme)
+                elif mask & (IN_CREATE | IN_MOVED_TO):
+                    # També pot ser un enllaç simbòlic a un directori de tema
+                    self._theme_appeared(root, name)
+                elif mask & (IN_DELETE | IN_MOVED_FROM):
+                    self._drop_pending(root, name)
+                    self._remove(root, name)
+            elif wd in self._pending:
+                if name in _THEME_ENTRIES:
+                    # El tema pot estar encara a mig copiar: es continua vigilant
+                    root, theme = self._pending[wd]
+                    info = scan_theme_dir(os.path.join(root, theme))
+                    if is_theme(info):
+                        self._add(root, theme, info)
+            elif wd in self._missing:
+                path = self._missing[wd]
+                if name == os.path.basename(path):
+                    del self._missing[wd]
+                    self.inotify.rm_watch(wd)
+                    self._watch_root(path)
+
+    def close(self):
+        self.inotify.close()
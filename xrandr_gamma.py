@@ -0,0 +1,431 @@
+"""Motor de color natiu: calcula les rampes de gamma i les aplica amb XRandR via ctypes.
+
+Per a una temperatura fixa (dia = nit, sense transició) no cal tenir cap procés de
+Redshift resident: n'hi ha prou amb escriure les rampes de cada CRTC una vegada.
+
+El motor es fa servir des de diversos fils (la transició, el fil de treball i el
+grup de fils dels canvis de mode): tots els mètodes públics passen per un mateix
+bloqueig, de manera que la connexió X i les memòries cau no es toquen mai alhora.
+La connexió és del motor i no es comparteix amb Tk; per això n'hi ha prou amb el
+bloqueig i no es crida XInitThreads.
+
+Cada sortida (monitor) pot tenir un perfil propi (`OutputProfile`) que corregeix
+la temperatura, la brillantor i la gamma que es demanen per a totes. Les sortides
+es llisten en connectar i només es tornen a llistar quan XRandR avisa d'un canvi
+(monitor connectat, desconnectat o reconfigurat).
+"""
+import ctypes
+import ctypes.util
+import functools
+import math
+import threading
+from array import array
+from collections import namedtuple
+
+NEUTRAL_TEMP = 6500
+MIN_TEMP = 1000
+MAX_TEMP = 25000
+# Nombre màxim de rampes calculades que es guarden en memòria
+RAMP_CACHE_SIZE = 32
+NEUTRAL_GAMMA = (1.0, 1.0, 1.0)
+
+# Correcció d'una sortida: es suma `temp_shift` (K) a la temperatura i es multipliquen
+# la brillantor per `brightness` i la gamma demanada per `gamma` (r, g, b), canal a canal.
+OutputProfile = namedtuple("OutputProfile", "temp_shift brightness gamma")
+DEFAULT_OUTPUT_PROFILE = OutputProfile(0, 1.0, NEUTRAL_GAMMA)
+
+# Constants de XRandR
+RR_CONNECTED = 0
+RR_SCREEN_CHANGE_NOTIFY_MASK = 1 << 0
+RR_CRTC_CHANGE_NOTIFY_MASK = 1 << 1
+RR_OUTPUT_CHANGE_NOTIFY_MASK = 1 << 2
+RR_SCREEN_CHANGE_NOTIFY = 0
+RR_NOTIFY = 1
+# XEvent és una unió de 24 longs
+_XEVENT_LONGS = 24
+
+
+class GammaEngineError(Exception):
+    """No s'ha pogut obrir la pantalla X o aplicar les rampes de gamma."""
+
+
+def _blackbody_rgb(temp):
+    """Aproximació del color d'un cos negre a `temp` K (mètode de Tanner Helland)."""
+    t = temp / 100.0
+    if t <= 66:
+        r = 255.0
+        g = 99.4708025861 * math.log(t) - 161.1195681661
+    else:
+        r = 329.698727446 * (t - 60) ** -0.1332047592
+        g = 288.1221695283 * (t - 60) ** -0.0755148492
+    if t >= 66:
+        b = 255.0
+    elif t <= 19:
+        b = 0.0
+    else:
+        b = 138.5177312231 * math.log(t - 10) - 305.0447927307
+    return tuple(min(max(c, 0.0), 255.0) / 255.0 for c in (r, g, b))
+
+
+_NEUTRAL_RGB = _blackbody_rgb(NEUTRAL_TEMP)
+
+
+def whitepoint(temp):
+    """Multiplicadors (r, g, b) per a `temp`, normalitzats perquè 6500K sigui (1, 1, 1)."""
+    temp = min(max(int(temp), MIN_TEMP), MAX_TEMP)
+    return tuple(min(c / n, 1.0) for c, n in zip(_blackbody_rgb(temp), _NEUTRAL_RGB))
+
+
+_base_ramps = {}
+
+
+def _base_ramp(size):
+    """Rampa lineal 0..1 de `size` punts, compartida entre tots els càlculs."""
+    ramp = _base_ramps.get(size)
+    if ramp is None:
+        step = 1.0 / (size - 1) if size > 1 else 0.0
+        ramp = _base_ramps[size] = array('d', (i * step for i in range(size)))
+    return ramp
+
+
+def compute_ramps(size, temp, brightness, gamma=NEUTRAL_GAMMA):
+    """Retorna les rampes (vermell, verd, blau) com a array('H') de `size` valors."""
+    base = _base_ramp(size)
+    brightness = min(max(float(brightness), 0.0), 1.0)
+    ramps = []
+    for white, g in zip(whitepoint(temp), gamma):
+        scale = white * brightness * 65535.0
+        if g == 1.0:
+            ramps.append(array('H', (int(v * scale + 0.5) for v in base)))
+        else:
+            inv = 1.0 / g
+            ramps.append(array('H', (int((v ** inv) * scale + 0.5) for v in base)))
+    return tuple(ramps)
+
+
+# --- Estructures de Xlib/XRandR ---
+
+class _XRRScreenResources(ctypes.Structure):
+    _fields_ = [
+        ("timestamp", ctypes.c_ulong),
+        ("configTimestamp", ctypes.c_ulong),
+        ("ncrtc", ctypes.c_int),
+        ("crtcs", ctypes.POINTER(ctypes.c_ulong)),
+        ("noutput", ctypes.c_int),
+        ("outputs", ctypes.POINTER(ctypes.c_ulong)),
+        ("nmode", ctypes.c_int),
+        ("modes", ctypes.c_void_p),
+    ]
+
+
+class _XRROutputInfo(ctypes.Structure):
+    _fields_ = [
+        ("timestamp", ctypes.c_ulong),
+        ("crtc", ctypes.c_ulong),
+        ("name", ctypes.c_char_p),
+        ("nameLen", ctypes.c_int),
+        ("mm_width", ctypes.c_ulong),
+        ("mm_height", ctypes.c_ulong),
+        ("connection", ctypes.c_ushort),
+        ("subpixel_order", ctypes.c_ushort),
+        ("ncrtc", ctypes.c_int),
+        ("crtcs", ctypes.POINTER(ctypes.c_ulong)),
+        ("nclone", ctypes.c_int),
+        ("clones", ctypes.POINTER(ctypes.c_ulong)),
+        ("nmode", ctypes.c_int),
+        ("npreferred", ctypes.c_int),
+        ("modes", ctypes.POINTER(ctypes.c_ulong)),
+    ]
+
+
+class _XRRCrtcGamma(ctypes.Structure):
+    _fields_ = [
+        ("size", ctypes.c_int),
+        ("red", ctypes.POINTER(ctypes.c_ushort)),
+        ("green", ctypes.POINTER(ctypes.c_ushort)),
+        ("blue", ctypes.POINTER(ctypes.c_ushort)),
+    ]
+
+
+def _ramp_key(size, temp, brightness, gamma):
+    return (size, int(temp), round(float(brightness), 3), tuple(gamma))
+
+
+def _locked(method):
+    """Executa el mètode amb el bloqueig del motor agafat."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def _load_library(name):
+    path = ctypes.util.find_library(name)
+    if path is None:
+        raise GammaEngineError(f"No s'ha trobat la biblioteca lib{name}.")
+    return ctypes.CDLL(path)
+
+
+class GammaEngine:
+    """Aplica rampes de gamma a tots els CRTC actius de la pantalla X.
+
+    La connexió amb el servidor X i la llista de sortides s'obren la primera vegada
+    que es necessiten i es reutilitzen. Cada canvi envia, en un sol lot (un únic
+    XFlush), una petició per cada CRTC la rampa del qual ha canviat; els que ja
+    tenen la rampa demanada no es toquen.
+    """
+
+    def __init__(self, display_name=None):
+        self.display_name = display_name
+        # Reentrant: reset() i la relectura de sortides criden altres mètodes públics
+        self._lock = threading.RLock()
+        self._xlib = None
+        self._xrandr = None
+        self._display = None
+        self._root = None
+        self._event_base = None
+        self._crtcs = None  # {crtc: (mida de la rampa, nom de la primera sortida)}
+        self._xgamma = {}  # {crtc: XRRCrtcGamma reservat}, es reutilitza entre canvis
+        self._crtc_applied = {}  # {crtc: clau de la rampa escrita}
+        self._ramp_cache = {}
+        # Rampes calculades per endavant (p.ex. dels preajustos); no surten mai de la memòria cau
+        self._pinned_requests = []
+        self._pinned_ramps = {}
+        # {nom de sortida: OutputProfile}; les que no hi són fan servir DEFAULT_OUTPUT_PROFILE
+        self.output_profiles = {}
+        # (temperatura, brillantor) de l'última aplicació correcta, o None si és desconegut
+        self.last_applied = None
+
+    def _load(self):
+        if self._xrandr is not None:
+            return
+        xlib = _load_library("X11")
+        xrandr = _load_library("Xrandr")
+        xlib.XOpenDisplay.restype = ctypes.c_void_p
+        xlib.XOpenDisplay.argtypes = [ctypes.c_char_p]
+        xlib.XDefaultRootWindow.restype = ctypes.c_ulong
+        xlib.XDefaultRootWindow.argtypes = [ctypes.c_void_p]
+        xlib.XCloseDisplay.argtypes = [ctypes.c_void_p]
+        xlib.XFlush.argtypes = [ctypes.c_void_p]
+        xrandr.XRRGetScreenResourcesCurrent.restype = ctypes.POINTER(_XRRScreenResources)
+        xrandr.XRRGetScreenResourcesCurrent.argtypes = [ctypes.c_void_p, ctypes.c_ulong]
+        xrandr.XRRFreeScreenResources.argtypes = [ctypes.POINTER(_XRRScreenResources)]
+        xrandr.XRRGetOutputInfo.restype = ctypes.POINTER(_XRROutputInfo)
+        xrandr.XRRGetOutputInfo.argtypes = [ctypes.c_void_p, ctypes.POINTER(_XRRScreenResources), ctypes.c_ulong]
+        xrandr.XRRFreeOutputInfo.argtypes = [ctypes.POINTER(_XRROutputInfo)]
+        xrandr.XRRQueryExtension.restype = ctypes.c_int
+        xrandr.XRRQueryExtension.argtypes = [ctypes.c_void_p, ctypes.POINTER(ctypes.c_int), ctypes.POINTER(ctypes.c_int)]
+        xrandr.XRRSelectInput.argtypes = [ctypes.c_void_p, ctypes.c_ulong, ctypes.c_int]
+        xlib.XPending.restype = ctypes.c_int
+        xlib.XPending.argtypes = [ctypes.c_void_p]
+        xlib.XNextEvent.argtypes = [ctypes.c_void_p, ctypes.c_void_p]
+        xrandr.XRRGetCrtcGammaSize.restype = ctypes.c_int
+        xrandr.XRRGetCrtcGammaSize.argtypes = [ctypes.c_void_p, ctypes.c_ulong]
+        xrandr.XRRAllocGamma.restype = ctypes.POINTER(_XRRCrtcGamma)
+        xrandr.XRRAllocGamma.argtypes = [ctypes.c_int]
+        xrandr.XRRFreeGamma.argtypes = [ctypes.POINTER(_XRRCrtcGamma)]
+        xrandr.XRRSetCrtcGamma.argtypes = [ctypes.c_void_p, ctypes.c_ulong, ctypes.POINTER(_XRRCrtcGamma)]
+        self._xlib, self._xrandr = xlib, xrandr
+
+    def _connect(self):
+        self._load()
+        if self._display is None:
+            # Connexió pròpia, separada de la de Tk: només es fa servir des dels mètodes amb
+            # @_locked, així que el bloqueig del motor basta i no cal XInitThreads (que
+            # hauria d'anar abans de qualsevol altra crida a Xlib del procés, també la de Tk)
+            name = self.display_name.encode() if self.display_name else None
+            display = self._xlib.XOpenDisplay(name)
+            if not display:
+                raise GammaEngineError(f"No s'ha pogut obrir la pantalla X {self.display_name or ''}".strip() + ".")
+            self._display = display
+            self._root = self._xlib.XDefaultRootWindow(display)
+            event_base, error_base = ctypes.c_int(), ctypes.c_int()
+            if self._xrandr.XRRQueryExtension(display, ctypes.byref(event_base), ctypes.byref(error_base)):
+                self._event_base = event_base.value
+                self._xrandr.XRRSelectInput(display, self._root, RR_SCREEN_CHANGE_NOTIFY_MASK
+                                            | RR_CRTC_CHANGE_NOTIFY_MASK | RR_OUTPUT_CHANGE_NOTIFY_MASK)
+        if self._crtcs is None:
+            self._crtcs = self._query_crtcs()
+            self._pin_ramps()
+        return self._display
+
+    def _process_events(self):
+        """Buida la cua d'esdeveniments de X; si XRandR ha avisat d'un canvi, cal tornar a llistar.
+
+        Només es crida des d'`apply`, de manera que consultar el motor (`available`,
+        `outputs`) no fa cap lectura del servidor X.
+        """
+        if self._event_base is None:
+            return
+        event = (ctypes.c_long * _XEVENT_LONGS)()
+        changed = False
+        while self._xlib.XPending(self._display):
+            self._xlib.XNextEvent(self._display, event)
+            event_type = ctypes.cast(event, ctypes.POINTER(ctypes.c_int))[0]
+            if event_type in (self._event_base + RR_SCREEN_CHANGE_NOTIFY, self._event_base + RR_NOTIFY):
+                changed = True
+        if changed:
+            print("Canvi de monitors detectat; es tornen a llistar les sortides.")
+            self.refresh_outputs()
+
+    def _query_crtcs(self):
+        """{crtc: (mida de la rampa, nom de sortida)} dels CRTC amb alguna sortida connectada."""
+        resources = self._xrandr.XRRGetScreenResourcesCurrent(self._display, self._root)
+        if not resources:
+            raise GammaEngineError("XRandR no ha retornat els recursos de la pantalla.")
+        try:
+            res = resources.contents
+            crtcs = {}
+            for i in range(res.noutput):
+                info_ptr = self._xrandr.XRRGetOutputInfo(self._display, resources, res.outputs[i])
+                if not info_ptr:
+                    continue
+                try:
+                    info = info_ptr.contents
+                    if info.connection != RR_CONNECTED or not info.crtc or info.crtc in crtcs:
+                        continue
+                    name = info.name[:info.nameLen].decode("utf-8", "replace")
+                    crtc = info.crtc
+                finally:
+                    self._xrandr.XRRFreeOutputInfo(info_ptr)
+                size = self._xrandr.XRRGetCrtcGammaSize(self._display, crtc)
+                if size > 1:
+                    crtcs[crtc] = (size, name)
+            return crtcs
+        finally:
+            self._xrandr.XRRFreeScreenResources(resources)
+
+    @_locked
+    def outputs(self):
+        """Noms de les sortides connectades i actives, en l'ordre de XRandR."""
+        self._connect()
+        return [name for _, name in self._crtcs.values()]
+
+    @_locked
+    def set_output_profiles(self, profiles):
+        """Canvia els perfils per sortida; s'apliquen al proper `apply`."""
+        self.output_profiles = dict(profiles)
+        if self._crtcs is not None:
+            self._pin_ramps()
+
+    @_locked
+    def precompute(self, requests):
+        """Calcula ara les rampes de cada (temp, brillantor, gamma) per a tots els monitors.
+
+        Les rampes es guarden a part de la memòria cau normal, de manera que aplicar
+        després qualsevol d'aquests valors és només enviar-les al servidor X.
+        """
+        self._pinned_requests = [(int(t), float(b), tuple(g)) for t, b, g in requests]
+        self._connect()
+        self._pin_ramps()
+
+    def _pin_ramps(self):
+        pinned = {}
+        for temp, brightness, gamma in self._pinned_requests:
+            for size, name in self._crtcs.values():
+                values = self._output_values(name, temp, brightness, gamma)
+                key = _ramp_key(size, *values)
+                pinned[key] = self._pinned_ramps.get(key) or compute_ramps(size, *values)
+        self._pinned_ramps = pinned
+
+    @_locked
+    def available(self):
+        try:
+            self._connect()
+            return bool(self._crtcs)
+        except GammaEngineError as e:
+            print(f"Motor de color natiu no disponible: {e}")
+            return False
+
+    def _ramps(self, size, temp, brightness, gamma):
+        key = _ramp_key(size, temp, brightness, gamma)
+        ramps = self._pinned_ramps.get(key) or self._ramp_cache.get(key)
+        if ramps is None:
+            if len(self._ramp_cache) >= RAMP_CACHE_SIZE:
+                self._ramp_cache.pop(next(iter(self._ramp_cache)))
+            ramps = self._ramp_cache[key] = compute_ramps(size, temp, brightness, gamma)
+        return ramps
+
+    def _output_values(self, name, temp, brightness, gamma):
+        profile = self.output_profiles.get(name, DEFAULT_OUTPUT_PROFILE)
+        if profile is DEFAULT_OUTPUT_PROFILE:
+            return temp, brightness, gamma
+        return (min(max(int(temp) + profile.temp_shift, MIN_TEMP), MAX_TEMP),
+                float(brightness) * profile.brightness,
+                tuple(g * p for g, p in zip(gamma, profile.gamma)))
+
+    def _crtc_gamma(self, crtc, size):
+        xgamma = self._xgamma.get(crtc)
+        if xgamma is None:
+            xgamma = self._xrandr.XRRAllocGamma(size)
+            if not xgamma:
+                raise GammaEngineError("No s'ha pogut reservar memòria per a la rampa de gamma.")
+            self._xgamma[crtc] = xgamma
+        return xgamma
+
+    @_locked
+    def apply(self, temp, brightness, gamma=NEUTRAL_GAMMA):
+        """Aplica la temperatura i la brillantor (corregides pel perfil de cada sortida) a tots els CRTC."""
+        self.last_applied = None
+        self._connect()
+        self._process_events()
+        # Si XRandR ha avisat d'un canvi de monitors, aquí es tornen a llistar
+        display = self._connect()
+        changed = 0
+        for crtc, (size, name) in self._crtcs.items():
+            out_temp, out_brightness, out_gamma = self._output_values(name, temp, brightness, gamma)
+            key = _ramp_key(size, out_temp, out_brightness, out_gamma)
+            if self._crtc_applied.get(crtc) == key:
+                continue
+            red, green, blue = self._ramps(size, out_temp, out_brightness, out_gamma)
+            xgamma = self._crtc_gamma(crtc, size)
+            # Fins que no s'hagi escrit, la rampa d'aquest CRTC és desconeguda
+            self._crtc_applied.pop(crtc, None)
+            g = xgamma.contents
+            nbytes = size * ctypes.sizeof(ctypes.c_ushort)
+            ctypes.memmove(g.red, red.buffer_info()[0], nbytes)
+            ctypes.memmove(g.green, green.buffer_info()[0], nbytes)
+            ctypes.memmove(g.blue, blue.buffer_info()[0], nbytes)
+            self._xrandr.XRRSetCrtcGamma(display, crtc, xgamma)
+            self._crtc_applied[crtc] = key
+            changed += 1
+        if changed:
+            self._xlib.XFlush(display)
+        # last_applied només descriu rampes sense correcció de gamma general (les dels modes Sol/Lluna)
+        if tuple(gamma) == NEUTRAL_GAMMA:
+            self.last_applied = (int(temp), round(float(brightness), 2))
+
+    @_locked
+    def reset(self):
+        """Torna a escriure rampes neutres a tots els CRTC, encara que algú altre les hagi canviat."""
+        self.invalidate()
+        self.apply(NEUTRAL_TEMP, 1.0)
+
+    @_locked
+    def invalidate(self):
+        """Oblida quines rampes hi ha a la pantalla (p.ex. perquè Redshift les ha canviat)."""
+        self._crtc_applied = {}
+        self.last_applied = None
+
+    def _free_gammas(self):
+        for xgamma in self._xgamma.values():
+            self._xrandr.XRRFreeGamma(xgamma)
+        self._xgamma = {}
+
+    @_locked
+    def refresh_outputs(self):
+        """Torna a llegir la llista de sortides (p.ex. després de connectar un monitor)."""
+        self._crtcs = None
+        self._free_gammas()
+        self.invalidate()
+
+    @_locked
+    def close(self):
+        if self._display is not None:
+            self._free_gammas()
+            self._xlib.XCloseDisplay(self._display)
+            self._display = None
+            self._event_base = None
+            self._crtcs = None
+            self.invalidate()